@@ -14,6 +14,11 @@ Post (посты), Category (категории), Location (местополож
 строк, чтобы улучшить читаемость интерфейса администрирования.
 """
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.urls import path
+
+from .export import EXPORT_MODELS, iter_export, parse_names
 from .models import Category, Comment, Location, Post
 
 LENGTH_STRING = 50  # Максимальная длина строки для отображения
@@ -54,6 +59,37 @@ class PostAdmin(admin.ModelAdmin):
         """Возвращает сокращенную версию текста поста."""
         return f'{object.text[:LENGTH_STRING]}...'  # Сокращает текст до определенной длины
 
+    def get_urls(self):
+        """Добавляет адрес потоковой выгрузки постов и комментариев."""
+        return [
+            path('export/', self.admin_site.admin_view(self.export_view),
+                 name='blog_post_export'),
+        ] + super().get_urls()
+
+    def export_view(self, request):
+        """
+        Отдаёт выгрузку NDJSON потоком: /admin/blog/post/export/?models=
+        posts,comments&gzip=1. Нужны права на просмотр выгружаемых моделей.
+        """
+        try:
+            names = parse_names(request.GET.get('models', 'posts,comments'))
+        except ValueError as error:
+            return HttpResponseBadRequest(str(error))
+        for name in names:
+            opts = EXPORT_MODELS[name]._meta
+            if not request.user.has_perm(f'{opts.app_label}.view_'
+                                         f'{opts.model_name}'):
+                raise PermissionDenied
+        compress = request.GET.get('gzip') == '1'
+        filename = '-'.join(names) + ('.ndjson.gz' if compress else '.ndjson')
+        response = StreamingHttpResponse(
+            iter_export(names, compress=compress),
+            content_type='application/gzip' if compress
+            else 'application/x-ndjson',
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -0,0 +1,254 @@
+"""
+Замеры скорости страниц сайта внутри процесса.
+
+Каждый сценарий — запрос тестового клиента Django к одной странице:
+лента, категория, профиль, глубокая страница комментариев поста, формы
+создания и редактирования, списки админки. Для каждого запроса
+записываются полное время ответа, количество и время SQL-запросов
+и время отрисовки шаблона верхнего уровня. Запросы выполняются
+в транзакции, которая затем откатывается, так что формы не меняют
+данные между повторами.
+
+Сводка по сценариям сравнивается с сохранённой базовой линией
+в JSON: рост времени больше порога или рост числа запросов считается
+регрессией.
+"""
+import json
+import time
+from contextlib import contextmanager
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Count
+from django.template.backends.django import Template
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Category, Post
+from .synthetic import Generator
+
+User = get_user_model()
+
+PERCENTILES = (50, 90, 95)
+# Какие показатели сравнивать с базовой линией и как: время сравнивается
+# с порогом в долях, число запросов — точно.
+TIMED_METRICS = ('wall_p50', 'wall_p95', 'sql_time_p50', 'render_p50')
+COUNTED_METRICS = ('queries_max',)
+
+
+def percentile(values, percent):
+    """Процентиль по методу ближайшего ранга."""
+    values = sorted(values)
+    if not values:
+        return 0.0
+    rank = max(int(round(percent / 100 * len(values))) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+class Sample:
+    """Показатели одного запроса."""
+
+    def __init__(self):
+        self.wall = 0.0
+        self.queries = 0
+        self.sql_time = 0.0
+        self.render_time = 0.0
+        self.status = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            self.queries += 1
+
+
+@contextmanager
+def measure_rendering(sample_getter):
+    """
+    Учитывает время `render()` шаблонов верхнего уровня.
+
+    Вложенные отрисовки (виджеты форм тоже рисуются шаблонами) не
+    суммируются повторно. Ленивые запросы, выполненные из шаблона,
+    входят во время отрисовки.
+    """
+    render = Template.render
+    depth = [0]
+
+    def timed_render(template, context=None, request=None):
+        if depth[0]:
+            return render(template, context, request)
+        depth[0] += 1
+        started = time.perf_counter()
+        try:
+            return render(template, context, request)
+        finally:
+            depth[0] -= 1
+            sample_getter().render_time += time.perf_counter() - started
+
+    with mock.patch.object(Template, 'render', timed_render):
+        yield
+
+
+@contextmanager
+def temporary_database(path):
+    """Подменяет файл основной базы на время замеров."""
+    settings_dict = connection.settings_dict
+    name = settings_dict['NAME']
+    connection.close()
+    settings_dict['NAME'] = str(path)
+    try:
+        yield
+    finally:
+        connection.close()
+        settings_dict['NAME'] = name
+
+
+def prepare_dataset(size, seed=0):
+    """
+    Создаёт схему и данные: size постов, по пять комментариев на пост
+    и одного пользователя на сотню постов.
+    """
+    call_command('migrate', verbosity=0, interactive=False)
+    Generator(timezone.now(), seed=seed).generate(
+        users=size // 100 + 5, categories=10, locations=50,
+        posts=size, comments=size * 5,
+    )
+
+
+class Scenario:
+    """Запрос к странице: метод, адрес, пользователь и данные формы."""
+
+    def __init__(self, name, path, user=None, method='get', data=None):
+        self.name = name
+        self.path = path
+        self.user = user
+        self.method = method
+        self.data = data or {}
+
+
+def build_scenarios(password):
+    """
+    Подбирает страницы по текущим данным: самую наполненную категорию,
+    самого активного автора и пост с наибольшим числом комментариев.
+    """
+    posts = Post.objects.filter_posts_for_publication()
+    category = Category.objects.filter(is_published=True).annotate(
+        total=Count('posts')
+    ).order_by('-total').first()
+    busiest = posts.annotate(total=Count('comments')).order_by(
+        '-total'
+    ).first()
+    if category is None or busiest is None:
+        raise ValueError('Для замеров нужны опубликованные посты.')
+    author = busiest.author
+    index_pages = (posts.count() - 1) // 10 + 1
+    author.set_password(password)
+    author.save(update_fields=['password'])
+    admin, _ = User.objects.get_or_create(
+        username='benchmark-admin',
+        defaults={'is_staff': True, 'is_superuser': True},
+    )
+    admin.set_password(password)
+    admin.save()
+    last_page = max((busiest.total - 1) // 10 + 1, 1)  # Глубокая страница
+    form = {
+        'title': 'Замер', 'text': 'Текст замера',
+        'pub_date': timezone.now().strftime('%Y-%m-%dT%H:%M'),
+        'category': category.pk,
+    }
+    return [
+        Scenario('index', reverse('blog:index')),
+        Scenario('index_deep', reverse('blog:index') + f'?page={index_pages}'),
+        Scenario('category_posts', reverse(
+            'blog:category_posts', args=[category.slug]
+        )),
+        Scenario('profile', reverse('blog:profile', args=[author.username])),
+        Scenario('post_detail', reverse(
+            'blog:post_detail', args=[busiest.pk]
+        ) + f'?page={last_page}'),
+        Scenario('create_form', reverse('blog:create_post'), author),
+        Scenario('create_post', reverse('blog:create_post'), author,
+                 'post', form),
+        Scenario('edit_post', reverse('blog:edit_post', args=[busiest.pk]),
+                 author, 'post', form),
+        Scenario('admin_posts', reverse('admin:blog_post_changelist'),
+                 admin),
+        Scenario('admin_comments', reverse('admin:blog_comment_changelist'),
+                 admin),
+    ]
+
+
+def run_scenario(scenario, password, repeat=20, warmup=2):
+    """Выполняет сценарий repeat раз и возвращает показатели запросов."""
+    client = Client()
+    if scenario.user is not None:
+        client.login(username=scenario.user.username, password=password)
+    samples = []
+    current = [Sample()]
+    with measure_rendering(lambda: current[0]):
+        for run in range(warmup + repeat):
+            sample = current[0] = Sample()
+            with connection.execute_wrapper(sample), transaction.atomic():
+                started = time.perf_counter()
+                response = getattr(client, scenario.method)(
+                    scenario.path, scenario.data
+                )
+                sample.wall = time.perf_counter() - started
+                transaction.set_rollback(True)
+            sample.status = response.status_code
+            if run >= warmup:
+                samples.append(sample)
+    return samples
+
+
+def summarize(samples):
+    """Сводка показателей сценария в миллисекундах."""
+    summary = {}
+    for percent in PERCENTILES:
+        summary[f'wall_p{percent}'] = round(1000 * percentile(
+            [sample.wall for sample in samples], percent
+        ), 3)
+    summary['sql_time_p50'] = round(1000 * percentile(
+        [sample.sql_time for sample in samples], 50
+    ), 3)
+    summary['render_p50'] = round(1000 * percentile(
+        [sample.render_time for sample in samples], 50
+    ), 3)
+    summary['queries_max'] = max(sample.queries for sample in samples)
+    summary['statuses'] = sorted({sample.status for sample in samples})
+    return summary
+
+
+def compare(results, baseline, threshold=0.2, min_delta=1.0):
+    """
+    Возвращает регрессии относительно базовой линии.
+
+    Время считается выросшим, если оно больше базового более чем
+    в (1 + threshold) раз и при этом не меньше чем на min_delta мс —
+    так шум на быстрых страницах не превращается в регрессию.
+    """
+    regressions = []
+    for key, summary in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        for metric in TIMED_METRICS:
+            old, new = base.get(metric), summary[metric]
+            if old is not None and new > old * (1 + threshold) \
+                    and new - old >= min_delta:
+                regressions.append((key, metric, old, new))
+        for metric in COUNTED_METRICS:
+            old, new = base.get(metric), summary[metric]
+            if old is not None and new > old:
+                regressions.append((key, metric, old, new))
+    return regressions
+
+
+def load_baseline(path):
+    """Читает базовую линию из JSON-файла."""
+    return json.loads(path.read_text(encoding='utf-8'))
@@ -0,0 +1,134 @@
+"""
+Нагрузочное тестирование сайта по HTTP.
+
+Клиенты работают в потоках или отдельных процессах и выполняют
+смесь операций с заданными весами:
+    - anonymous_read: анонимное чтение ленты, категорий, постов, профилей;
+    - user_read: те же страницы от имени вошедшего пользователя;
+    - comment: отправка комментария (запись в базу);
+    - create_post: создание поста (запись в базу).
+
+Модуль использует только стандартную библиотеку и `core.http_bench`,
+поэтому процессы-клиенты запускаются без настройки Django. Адреса
+страниц и учётные записи готовит команда `load_test` в основном
+процессе и передаёт клиентам словарём. Сервер можно запустить здесь же
+(`core.http_bench.serve`) или указать адрес уже запущенного.
+"""
+import random
+import time
+from urllib.error import URLError
+
+from core.http_bench import Client, percentile
+
+DEFAULT_MIX = {
+    'anonymous_read': 60,
+    'user_read': 25,
+    'comment': 10,
+    'create_post': 5,
+}
+WRITE_OPERATIONS = ('comment', 'create_post')
+
+
+def run_client(number, base_url, targets, mix, duration, think_time=0.0,
+               seed=0):
+    """
+    Выполняет операции в течение duration секунд.
+
+    Функция верхнего уровня, чтобы её можно было запускать и в потоке,
+    и в процессе. Возвращает список (операция, задержка, код ответа,
+    ошибка).
+    """
+    rng = random.Random(seed * 1000 + number)
+    operations, weights = zip(*mix.items())
+    anonymous = Client(base_url)
+    user = Client(base_url)
+    samples = []
+    needs_login = any(
+        mix.get(name) for name in ('user_read', *WRITE_OPERATIONS)
+    )
+    if needs_login:
+        username = targets['users'][number % len(targets['users'])]
+        user.login(targets['login_path'], username, targets['password'],
+                   targets['session_cookie'])
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        operation = rng.choices(operations, weights)[0]
+        client = anonymous if operation == 'anonymous_read' else user
+        path, data = rng.choice(targets['reads']), None
+        if operation == 'comment':
+            path = rng.choice(targets['comment_paths'])
+            data = {'text': f'Комментарий под нагрузкой {rng.random()}'}
+        elif operation == 'create_post':
+            path = targets['create_path']
+            data = {
+                'title': 'Пост под нагрузкой', 'text': 'Текст',
+                'pub_date': '2020-01-01T00:00',
+                'category': rng.choice(targets['category_ids']),
+                'is_published': 'on',
+            }
+        started = time.perf_counter()
+        error = None
+        try:
+            status = client.request(path, data)
+        except (URLError, OSError) as exception:
+            status, error = None, type(exception).__name__
+        latency = time.perf_counter() - started
+        if error is None and status >= 400:
+            error = f'HTTP {status}'
+        elif error is None and client.redirected_to(
+                targets['login_path'], targets['login_url']):
+            error = 'login redirect'  # Сессия потеряна, запись не прошла
+        samples.append((operation, latency, status, error))
+        if think_time:
+            time.sleep(rng.uniform(0, 2 * think_time))
+    return samples
+
+
+def report(samples, elapsed):
+    """Сводка: пропускная способность, процентили задержки, ошибки."""
+    def summary(items):
+        latencies = [latency for _, latency, _, _ in items]
+        errors = [error for _, _, _, error in items if error]
+        result = {
+            'requests': len(items),
+            'throughput': round(len(items) / elapsed, 2),
+            'error_rate': round(len(errors) / len(items), 4) if items else 0,
+        }
+        for percent in (50, 95, 99):
+            result[f'p{percent}_ms'] = round(
+                1000 * percentile(latencies, percent), 2
+            )
+        if errors:
+            result['errors'] = {
+                error: errors.count(error) for error in set(errors)
+            }
+        return result
+
+    by_operation = {}
+    for sample in samples:
+        by_operation.setdefault(sample[0], []).append(sample)
+    return {
+        'duration': round(elapsed, 2),
+        'total': summary(samples),
+        'operations': {
+            operation: summary(items)
+            for operation, items in sorted(by_operation.items())
+        },
+    }
+
+
+def parse_mix(value):
+    """Разбирает смесь операций вида 'anonymous_read=60,comment=10'."""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(
+                f'Неизвестная операция {name!r}; доступны: '
+                + ', '.join(DEFAULT_MIX)
+            )
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise ValueError('Хотя бы у одной операции вес должен быть больше 0.')
+    return mix
@@ -0,0 +1,114 @@
+"""
+Замеры скорости основных страниц на синтетических данных разного объёма.
+
+Для каждого объёма создаётся временная база SQLite, заполняется
+генератором `generate_blog_data` и прогоняются сценарии из
+`blog.benchmark`. Результаты сравниваются с базовой линией; при
+регрессиях или без файла базовой линии команда завершается с ошибкой.
+
+Запуск:
+    python manage.py benchmark_views --sizes 1000 10000 --save-baseline
+    python manage.py benchmark_views --sizes 1000 10000 --threshold 0.25
+"""
+import json
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    setup_test_environment, teardown_test_environment,
+)
+
+from blog.benchmark import (
+    build_scenarios, compare, load_baseline, prepare_dataset, run_scenario,
+    summarize, temporary_database,
+)
+
+PASSWORD = 'benchmark-password'  # Пароль пользователей сценариев
+
+
+class Command(BaseCommand):
+    help = ('Замеряет время ответа, SQL и отрисовку шаблонов основных '
+            'страниц и сравнивает их с базовой линией.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[1000, 10000],
+            help='Сколько постов создавать для каждого прогона.',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Сколько раз выполнять каждый сценарий.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--baseline',
+            default=settings.BASE_DIR / 'benchmarks' / 'views.json',
+            help='Файл базовой линии.',
+        )
+        parser.add_argument(
+            '--save-baseline', action='store_true',
+            help='Записать результаты как новую базовую линию.',
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Допустимый рост времени, доля от базовой линии.',
+        )
+        parser.add_argument(
+            '--output', help='Куда записать результаты в JSON.',
+        )
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat должен быть больше 0.')
+        baseline_path = Path(options['baseline'])
+        if not options['save_baseline'] and not baseline_path.exists():
+            raise CommandError(
+                f'Нет базовой линии {baseline_path}: запишите её '
+                'с --save-baseline или укажите --baseline.'
+            )
+        results = {}
+        setup_test_environment(debug=False)
+        try:
+            for size in options['sizes']:
+                results.update(self.run_size(size, options))
+        finally:
+            teardown_test_environment()
+
+        report = json.dumps(results, indent=2, ensure_ascii=False)
+        if options['output']:
+            Path(options['output']).write_text(report, encoding='utf-8')
+        if options['save_baseline']:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(report, encoding='utf-8')
+            self.stdout.write(f'Базовая линия записана в {baseline_path}')
+            return
+        regressions = compare(
+            results, load_baseline(baseline_path), options['threshold']
+        )
+        for key, metric, old, new in regressions:
+            self.stderr.write(f'{key} {metric}: {old} -> {new}')
+        if regressions:
+            raise CommandError(f'Найдено регрессий: {len(regressions)}.')
+
+    def run_size(self, size, options):
+        results = {}
+        with tempfile.TemporaryDirectory() as directory, \
+                temporary_database(Path(directory) / 'benchmark.sqlite3'):
+            self.stdout.write(f'Создаём данные: {size} постов…')
+            prepare_dataset(size, options['seed'])
+            for scenario in build_scenarios(PASSWORD):
+                samples = run_scenario(scenario, PASSWORD, options['repeat'])
+                summary = summarize(samples)
+                results[f'{size}:{scenario.name}'] = summary
+                self.stdout.write(
+                    f'{size:>8} {scenario.name:<16} '
+                    f'p50 {summary["wall_p50"]:>8.2f} мс  '
+                    f'p95 {summary["wall_p95"]:>8.2f} мс  '
+                    f'SQL {summary["queries_max"]:>3} / '
+                    f'{summary["sql_time_p50"]:>7.2f} мс  '
+                    f'шаблон {summary["render_p50"]:>7.2f} мс  '
+                    f'{summary["statuses"]}'
+                )
+        return results
@@ -0,0 +1,74 @@
+"""
+Выгрузка постов и комментариев в NDJSON без загрузки таблиц в память.
+
+Запуск:
+    python manage.py export_blog --output blog.ndjson.gz
+    python manage.py export_blog --models posts > posts.ndjson
+"""
+import gzip
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from blog.export import CHUNK_SIZE, EXPORT_MODELS, iter_ndjson, parse_names
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты и комментарии в NDJSON (при желании с gzip).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--models', default=','.join(EXPORT_MODELS),
+            help='Что выгружать, через запятую: posts, comments.',
+        )
+        parser.add_argument(
+            '--output', '-o',
+            help='Файл выгрузки; по умолчанию стандартный вывод. '
+                 'Файл с расширением .gz сжимается.',
+        )
+        parser.add_argument(
+            '--gzip', action='store_true',
+            help='Сжать выгрузку gzip, даже если расширение не .gz.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Сколько строк читать из базы за один запрос.',
+        )
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Псевдоним базы из DATABASES.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            names = parse_names(options['models'])
+        except ValueError as error:
+            raise CommandError(error)
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size должен быть больше 0.')
+        lines = iter_ndjson(
+            names, options['chunk_size'], options['database']
+        )
+        output = options['output']
+        compress = options['gzip'] or (output or '').endswith('.gz')
+        if output is None and compress:
+            self.write(gzip.open(sys.stdout.buffer, 'wt', encoding='utf-8'),
+                       lines)
+        elif output is None:
+            self.write(self.stdout, lines, close=False)
+        elif compress:
+            self.write(gzip.open(output, 'wt', encoding='utf-8'), lines)
+        else:
+            self.write(open(output, 'w', encoding='utf-8'), lines)
+
+    def write(self, file, lines, close=True):
+        count = 0
+        try:
+            for line in lines:
+                file.write(line)
+                count += 1
+        finally:
+            if close:
+                file.close()
+        self.stderr.write(f'Выгружено записей: {count}', self.style.SUCCESS)
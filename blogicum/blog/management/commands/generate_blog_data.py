@@ -0,0 +1,100 @@
+"""
+Заполнение базы синтетическими данными блога.
+
+Запуск:
+    python manage.py generate_blog_data --posts 1000000 --seed 42
+    python manage.py generate_blog_data --users 10 --posts 100 \
+        --now 2024-01-01T00:00:00+00:00
+"""
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from blog.synthetic import CHUNK_SIZE, Generator
+
+COMMENTS_PER_POST = 5  # Сколько комментариев в среднем приходится на пост
+
+
+class Command(BaseCommand):
+    help = ('Создаёт пользователей, категории, места, посты и комментарии '
+            'со случайным, но воспроизводимым содержимым.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--locations', type=int, default=200)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument(
+            '--comments', type=int,
+            help='Сколько комментариев создать; по умолчанию '
+                 f'{COMMENTS_PER_POST} на пост.',
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Зерно генератора: одинаковое зерно даёт одинаковые данные.',
+        )
+        parser.add_argument(
+            '--now',
+            help='Момент, от которого отсчитываются даты (ISO 8601); '
+                 'по умолчанию текущее время.',
+        )
+        parser.add_argument(
+            '--password',
+            help='Общий пароль пользователей; по умолчанию войти под ними '
+                 'нельзя.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Сколько строк вставлять за одну транзакцию.',
+        )
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Псевдоним базы из DATABASES.',
+        )
+
+    def handle(self, *args, **options):
+        counts = {
+            name: options[name]
+            for name in ('users', 'categories', 'locations', 'posts')
+        }
+        counts['comments'] = options['comments']
+        if counts['comments'] is None:
+            counts['comments'] = counts['posts'] * COMMENTS_PER_POST
+        if min(counts.values()) < 0 or options['chunk_size'] < 1:
+            raise CommandError('Количества не могут быть отрицательными.')
+        if counts['posts'] and not (counts['users'] and counts['categories']):
+            raise CommandError('Для постов нужны пользователи и категории.')
+        now = timezone.now()
+        if options['now']:
+            now = parse_datetime(options['now'])
+            if now is None or timezone.is_naive(now):
+                raise CommandError('--now: укажите дату с часовым поясом.')
+        password = '!'
+        if options['password']:
+            password = make_password(
+                options['password'], salt=f'synthetic{options["seed"]}'
+            )
+
+        generator = Generator(
+            now, seed=options['seed'], using=options['database'],
+            chunk_size=options['chunk_size'], password=password,
+            progress=self.report,
+        )
+        self.created = {}
+        started = time.monotonic()
+        generator.generate(**counts)
+        elapsed = time.monotonic() - started
+        total = sum(self.created.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано {total} строк за {elapsed:.1f} с '
+            f'({total / max(elapsed, 1e-9):.0f} строк/с).'
+        ))
+
+    def report(self, model, count):
+        label = model._meta.label
+        self.created[label] = self.created.get(label, 0) + count
+        self.stdout.write(f'{label}: {self.created[label]}')
@@ -0,0 +1,175 @@
+"""
+Нагрузка на сайт смесью чтений и записей из нескольких клиентов.
+
+По умолчанию сервер `blogicum.wsgi.application` запускается в этом же
+процессе на свободном порту; с --url нагрузка идёт на уже запущенный
+сервер (например, с продакшен-профилем базы). Результат — JSON
+с пропускной способностью, процентилями задержки и долей ошибок.
+
+Запуск:
+    python manage.py load_test --clients 16 --duration 30
+    python manage.py load_test --mode process --clients 8 \
+        --mix anonymous_read=50,comment=50 --output load.json
+"""
+import json
+import multiprocessing
+import secrets
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.shortcuts import resolve_url
+from django.urls import reverse
+
+from blog.loadtest import DEFAULT_MIX, parse_mix, report, run_client
+from blog.models import Category, Post
+from blog.views import NUMBER_OF_POSTS
+from core.http_bench import LoginError, serve
+
+User = get_user_model()
+
+
+def prepare_targets(clients, password, pages=50):
+    """
+    Собирает адреса страниц для чтения, записи и учётные записи клиентов.
+
+    Для каждого клиента создаётся пользователь `load-user-<n>` с паролем
+    password, общим на время прогона. Возвращает словарь, который можно
+    передать в процесс.
+    """
+    posts = list(
+        Post.objects.filter_posts_for_publication().order_by(
+            '-pub_date'
+        ).values_list('pk', 'author__username')[:pages]
+    )
+    slugs = list(Category.objects.filter(is_published=True).values_list(
+        'slug', flat=True
+    )[:pages])
+    if not posts or not slugs:
+        raise ValueError('Для нагрузки нужны опубликованные посты.')
+    reads = [reverse('blog:index')]
+    if len(posts) > NUMBER_OF_POSTS:
+        reads.append(reverse('blog:index') + '?page=2')
+    reads += [reverse('blog:post_detail', args=[pk]) for pk, _ in posts]
+    reads += [reverse('blog:profile', args=[name]) for _, name in posts]
+    reads += [reverse('blog:category_posts', args=[slug]) for slug in slugs]
+    users = []
+    for number in range(clients):
+        user, _ = User.objects.get_or_create(username=f'load-user-{number}')
+        user.set_password(password)
+        user.save(update_fields=['password'])
+        users.append(user.username)
+    return {
+        'reads': reads,
+        'comment_paths': [
+            reverse('blog:add_comment', args=[pk]) for pk, _ in posts
+        ],
+        'create_path': reverse('blog:create_post'),
+        'login_path': reverse('login'),
+        # Куда LoginRequiredMixin отправляет клиента без сессии
+        'login_url': resolve_url(settings.LOGIN_URL),
+        'session_cookie': settings.SESSION_COOKIE_NAME,
+        'category_ids': list(Category.objects.filter(
+            is_published=True
+        ).values_list('pk', flat=True)[:pages]),
+        'users': users,
+        'password': password,
+    }
+
+
+class Command(BaseCommand):
+    help = ('Нагружает сайт смесью чтений и записей и выводит '
+            'пропускную способность, задержки и ошибки в JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clients', type=int, default=8,
+            help='Сколько клиентов работает одновременно.',
+        )
+        parser.add_argument(
+            '--mode', choices=('thread', 'process'), default='thread',
+            help='Запускать клиентов в потоках или в процессах.',
+        )
+        parser.add_argument(
+            '--duration', type=float, default=10,
+            help='Сколько секунд длится нагрузка.',
+        )
+        parser.add_argument(
+            '--mix', default=','.join(
+                f'{name}={weight}' for name, weight in DEFAULT_MIX.items()
+            ),
+            help='Веса операций: anonymous_read, user_read, comment, '
+                 'create_post.',
+        )
+        parser.add_argument(
+            '--think-time', type=float, default=0.0,
+            help='Средняя пауза клиента между запросами, секунды.',
+        )
+        parser.add_argument(
+            '--url',
+            help='Адрес запущенного сервера; по умолчанию сервер '
+                 'запускается в этом процессе.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Куда записать отчёт JSON.')
+
+    def handle(self, *args, **options):
+        # Аргументы проверяются до того, как в базе появятся пользователи
+        if options['clients'] < 1 or options['duration'] <= 0:
+            raise CommandError('Нужен хотя бы один клиент и длительность.')
+        try:
+            mix = parse_mix(options['mix'])
+            # Случайный пароль на прогон; после прогона он сбрасывается
+            targets = prepare_targets(
+                options['clients'], secrets.token_urlsafe(16)
+            )
+        except ValueError as error:
+            raise CommandError(error)
+
+        server, base_url = None, options['url']
+        if base_url is None:
+            from blogicum.wsgi import application
+            server, base_url = serve(application)
+        base_url = base_url.rstrip('/')
+        if options['mode'] == 'process':
+            # spawn: дочерние процессы не наследуют потоки сервера
+            executor = ProcessPoolExecutor(
+                options['clients'],
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        else:
+            executor = ThreadPoolExecutor(options['clients'])
+        started = time.monotonic()
+        try:
+            with executor:
+                futures = [
+                    executor.submit(
+                        run_client, number, base_url, targets, mix,
+                        options['duration'], options['think_time'],
+                        options['seed'],
+                    )
+                    for number in range(options['clients'])
+                ]
+                samples = [
+                    sample for future in futures for sample in future.result()
+                ]
+        except LoginError as error:
+            raise CommandError(error)
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+            User.objects.filter(username__in=targets['users']).update(
+                password=make_password(None)
+            )
+        result = report(samples, time.monotonic() - started)
+        result.update(mode=options['mode'], clients=options['clients'],
+                      mix=mix)
+        output = json.dumps(result, indent=2, ensure_ascii=False)
+        if options['output']:
+            Path(options['output']).write_text(output, encoding='utf-8')
+        self.stdout.write(output)
@@ -0,0 +1,249 @@
+"""
+Генератор синтетических данных блога большого объёма.
+
+Данные похожи на настоящие: даты публикации растянуты на несколько лет
+и сгущаются к настоящему времени, есть неопубликованные и отложенные
+посты, скрытые категории и места, а комментарии распределены
+неравномерно — у немногих постов их сотни, у большинства единицы.
+Авторы постов и комментариев тоже выбираются с перекосом.
+
+Faker вызывается только для заготовок текста: на каждую строку
+тратится лишь выбор из готовых вариантов, а строки пишутся в базу
+через executemany порциями. При одинаковых seed и now генератор
+создаёт одни и те же данные.
+"""
+import random
+from array import array
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.core.management.color import no_style
+from django.db import connections, transaction
+from django.db.models import Max
+from faker import Faker
+
+from core.transfer import insert_rows
+from .models import Category, Comment, Location, Post
+
+User = get_user_model()
+
+CHUNK_SIZE = 10000  # Сколько строк вставлять за одну транзакцию
+POOL_SIZE = 500  # Сколько заготовок текста каждого вида создаёт Faker
+
+YEARS = 5  # На сколько лет в прошлое растянуты публикации
+FUTURE_DAYS = 30  # Насколько далеко вперёд отложены будущие посты
+FUTURE_SHARE = 0.03  # Доля отложенных постов
+UNPUBLISHED_POSTS = 0.05  # Доля снятых с публикации постов
+UNPUBLISHED_CATEGORIES = 0.1  # Доля скрытых категорий
+UNPUBLISHED_LOCATIONS = 0.15  # Доля скрытых мест
+WITHOUT_LOCATION = 0.2  # Доля постов без места
+COMMENT_DELAY_DAYS = 2  # Среднее время от публикации до комментария
+# Параметр распределения Парето: чем меньше, тем сильнее перекос
+SKEW = 1.2
+
+
+class Generator:
+    """Создаёт пользователей, категории, места, посты и комментарии."""
+
+    def __init__(self, now, seed=0, using='default', chunk_size=CHUNK_SIZE,
+                 password='!', progress=None):
+        self.now = now
+        self.rng = random.Random(seed)
+        self.faker = Faker('ru_RU')
+        self.faker.seed_instance(seed)
+        self.using = using
+        self.chunk_size = chunk_size
+        self.password = password
+        self.progress = progress or (lambda model, count: None)
+        self.pools = {}
+
+    def pool(self, name, make):
+        """Возвращает заготовки текста, создавая их при первом обращении."""
+        if name not in self.pools:
+            self.pools[name] = [make() for _ in range(POOL_SIZE)]
+        return self.pools[name]
+
+    def next_id(self, model):
+        """Первый свободный первичный ключ: данные дописываются к имеющимся."""
+        last = model._base_manager.using(self.using).aggregate(
+            last=Max('pk')
+        )['last']
+        return (last or 0) + 1
+
+    def weights(self, count):
+        """Накопленные веса с перекосом для `random.choices`."""
+        return list(accumulate(
+            self.rng.paretovariate(SKEW) for _ in range(count)
+        ))
+
+    def past(self, years=YEARS):
+        """Момент в прошлом; недавние даты встречаются чаще давних."""
+        span = years * 365 * 24 * 3600
+        return self.now - timedelta(
+            seconds=self.rng.triangular(0, span, 0)
+        )
+
+    def write(self, model, attnames, rows):
+        """Вставляет строки порциями, каждую в своей транзакции."""
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == self.chunk_size:
+                self.flush(model, attnames, chunk)
+                chunk = []
+        if chunk:
+            self.flush(model, attnames, chunk)
+
+    def flush(self, model, attnames, chunk):
+        with transaction.atomic(using=self.using):
+            insert_rows(self.using, model, attnames, chunk)
+        self.progress(model, len(chunk))
+
+    def users(self, count):
+        first = self.next_id(User)
+        first_names = self.pool('first_names', self.faker.first_name)
+        last_names = self.pool('last_names', self.faker.last_name)
+        logins = self.pool('logins', self.faker.user_name)
+        rng = self.rng
+
+        def rows():
+            for pk in range(first, first + count):
+                username = f'{rng.choice(logins)}_{pk}'
+                yield (
+                    pk, self.password, username, rng.choice(first_names),
+                    rng.choice(last_names), f'{username}@example.com',
+                    False, False, True, self.past(),
+                )
+
+        self.write(User, (
+            'id', 'password', 'username', 'first_name', 'last_name',
+            'email', 'is_superuser', 'is_staff', 'is_active', 'date_joined',
+        ), rows())
+        return list(range(first, first + count))
+
+    def categories(self, count):
+        first = self.next_id(Category)
+        titles = self.pool(
+            'category_titles', lambda: self.faker.word().capitalize()
+        )
+        descriptions = self.pool('descriptions', self.faker.paragraph)
+        rng = self.rng
+        self.write(Category, (
+            'id', 'is_published', 'created_at', 'title', 'description',
+            'slug',
+        ), (
+            (
+                pk, rng.random() >= UNPUBLISHED_CATEGORIES, self.past(),
+                rng.choice(titles), rng.choice(descriptions),
+                f'category-{pk}',
+            )
+            for pk in range(first, first + count)
+        ))
+        return list(range(first, first + count))
+
+    def locations(self, count):
+        first = self.next_id(Location)
+        cities = self.pool('cities', self.faker.city)
+        rng = self.rng
+        self.write(Location, ('id', 'is_published', 'created_at', 'name'), (
+            (
+                pk, rng.random() >= UNPUBLISHED_LOCATIONS, self.past(),
+                rng.choice(cities),
+            )
+            for pk in range(first, first + count)
+        ))
+        return list(range(first, first + count))
+
+    def posts(self, count, users, categories, locations):
+        """Создаёт посты и возвращает их pk и даты публикации."""
+        first = self.next_id(Post)
+        titles = self.pool('titles', lambda: self.faker.sentence()[:-1])
+        texts = self.pool('texts', lambda: self.faker.text(1000))
+        rng = self.rng
+        author_weights = self.weights(len(users))
+        category_weights = self.weights(len(categories))
+        pub_dates = array('d')
+
+        def rows():
+            for pk in range(first, first + count):
+                if rng.random() < FUTURE_SHARE:
+                    pub_date = self.now + timedelta(
+                        seconds=rng.uniform(3600, FUTURE_DAYS * 24 * 3600)
+                    )
+                    created_at = self.now - timedelta(
+                        seconds=rng.uniform(0, 7 * 24 * 3600)
+                    )
+                else:
+                    pub_date = self.past()
+                    created_at = pub_date - timedelta(
+                        seconds=rng.uniform(0, 24 * 3600)
+                    )
+                pub_dates.append(pub_date.timestamp())
+                location = None
+                if locations and rng.random() >= WITHOUT_LOCATION:
+                    location = rng.choice(locations)
+                yield (
+                    pk, rng.random() >= UNPUBLISHED_POSTS, created_at,
+                    rng.choice(titles), rng.choice(texts), pub_date,
+                    rng.choices(users, cum_weights=author_weights)[0],
+                    location,
+                    rng.choices(categories, cum_weights=category_weights)[0],
+                    '',
+                )
+
+        self.write(Post, (
+            'id', 'is_published', 'created_at', 'title', 'text', 'pub_date',
+            'author_id', 'location_id', 'category_id', 'image',
+        ), rows())
+        return range(first, first + count), pub_dates
+
+    def comments(self, count, users, posts, pub_dates):
+        """Распределяет комментарии по уже вышедшим постам с перекосом."""
+        first = self.next_id(Comment)
+        texts = self.pool('comments', self.faker.sentence)
+        rng = self.rng
+        now = self.now.timestamp()
+        published = [
+            (pk, pub_date) for pk, pub_date in zip(posts, pub_dates)
+            if pub_date <= now
+        ]
+        if not published:
+            return
+        post_weights = self.weights(len(published))
+        author_weights = self.weights(len(users))
+        tz = self.now.tzinfo
+
+        def rows():
+            for pk in range(first, first + count):
+                post, pub_date = rng.choices(
+                    published, cum_weights=post_weights
+                )[0]
+                delay = rng.expovariate(1 / (COMMENT_DELAY_DAYS * 24 * 3600))
+                created_at = min(pub_date + delay, now)
+                yield (
+                    pk, datetime.fromtimestamp(created_at, tz),
+                    rng.choice(texts), post,
+                    rng.choices(users, cum_weights=author_weights)[0],
+                )
+
+        self.write(Comment, (
+            'id', 'created_at', 'text', 'post_id', 'author_id',
+        ), rows())
+
+    def generate(self, users, categories, locations, posts, comments):
+        """Создаёт все данные и обновляет счётчики первичных ключей."""
+        user_ids = self.users(users)
+        category_ids = self.categories(categories)
+        location_ids = self.locations(locations)
+        post_ids, pub_dates = self.posts(
+            posts, user_ids, category_ids, location_ids
+        )
+        self.comments(comments, user_ids, post_ids, pub_dates)
+        connection = connections[self.using]
+        sql_list = connection.ops.sequence_reset_sql(
+            no_style(), [User, Category, Location, Post, Comment]
+        )
+        with connection.cursor() as cursor:
+            for sql in sql_list:
+                cursor.execute(sql)
@@ -20,6 +20,15 @@ NUMBER_OF_POSTS = 10
 class AuthorView(UserPassesTestMixin):
     """Класс, который проверяет является ли текущий пользователь автором."""
 
+    def get_object(self, queryset=None):
+        """
+        Загружает объект один раз за запрос: он нужен и для проверки
+        авторства, и для формы.
+        """
+        if not hasattr(self, '_object'):
+            self._object = super().get_object(queryset)
+        return self._object
+
     def test_func(self):
         return self.get_object().author == self.request.user
 
@@ -31,6 +40,7 @@ class PostView(AuthorView, LoginRequiredMixin):
     template_name = 'blog/create.html'
     form_class = PostForm
     pk_url_kwarg = 'post_id'
+    query_budget = 9
 
     def handle_no_permission(self):
         """
@@ -62,6 +72,7 @@ class CommentView(LoginRequiredMixin):
     form_class = CommentForm
     template_name = 'blog/comment.html'
     pk_url_kwarg = 'comment_id'
+    query_budget = 5
 
     def get_success_url(self):
         return reverse('blog:post_detail',
@@ -74,6 +85,7 @@ class IndexListView(ListView):
     template_name = 'blog/index.html'
     paginate_by = NUMBER_OF_POSTS
     queryset = Post.objects.filter_posts_for_publication().count_comments()
+    query_budget = 4
 
 
 class PostDetailView(ListView):
@@ -81,21 +93,26 @@ class PostDetailView(ListView):
 
     template_name = 'blog/detail.html'
     paginate_by = NUMBER_OF_POSTS
+    query_budget = 7
 
     def get_object(self):
         """
         Получает объект поста, связанным с данным идентификатором,
-        проверяя права доступа.
+        проверяя права доступа. Пост загружается один раз за запрос.
         """
-        post = get_object_or_404(Post, pk=self.kwargs['post_id'])
-        if self.request.user == post.author:
-            return post
-        return get_object_or_404(Post.objects.filter_posts_for_publication(),
-                                 pk=self.kwargs['post_id'])
+        if hasattr(self, '_post'):
+            return self._post
+        posts = Post.objects.select_related('author', 'category', 'location')
+        post = get_object_or_404(posts, pk=self.kwargs['post_id'])
+        if self.request.user != post.author:
+            post = get_object_or_404(posts.filter_posts_for_publication(),
+                                     pk=self.kwargs['post_id'])
+        self._post = post
+        return post
 
     def get_queryset(self):
         """Возвращает комментарии к конкретному посту."""
-        return self.get_object().comments.all()
+        return self.get_object().comments.select_related('author')
 
     def get_context_data(self, **kwargs):
         """
@@ -147,6 +164,7 @@ class CreatePostView(LoginRequiredMixin, CreateView):
     model = Post  # Модель, с которой будет работать представление
     form_class = PostForm  # Форма, используемая для создания поста
     template_name = 'blog/create.html'  # Шаблон для отображения
+    query_budget = 7  # Проверка категории и места в форме — по 2 запроса
 
     def form_valid(self, form):
         """
@@ -188,14 +206,18 @@ class CategoryDetailView(ListView):
     template_name = 'blog/category.html'
     paginate_by = NUMBER_OF_POSTS
     slug_url_kwarg = 'category_slug'
+    query_budget = 5
 
     def get_category(self):
         """
         Получает объект категории по переданному слагу и проверяет,
-        что она опубликована.
+        что она опубликована. Категория загружается один раз за запрос.
         """
-        return get_object_or_404(
-            Category, slug=self.kwargs[self.slug_url_kwarg], is_published=True)
+        if not hasattr(self, '_category'):
+            self._category = get_object_or_404(
+                Category, slug=self.kwargs[self.slug_url_kwarg],
+                is_published=True)
+        return self._category
 
     def get_context_data(self, **kwargs):
         """
@@ -211,7 +233,8 @@ class CategoryDetailView(ListView):
         Возвращает список постов, относящихся к данной категории,
         которые могут быть опубликованы.
         """
-        return self.get_category().posts.filter_posts_for_publication()
+        return self.get_category().posts.filter_posts_for_publication(
+        ).count_comments()
 
 
 class ProfileView(ListView):
@@ -220,13 +243,17 @@ class ProfileView(ListView):
     template_name = 'blog/profile.html'
     paginate_by = NUMBER_OF_POSTS
     slug_url_kwarg = 'username'
+    query_budget = 5
 
     def get_profile(self):
         """
         Получает объект пользователя по имени пользователя,
-        проверяя его существование.
+        проверяя его существование. Профиль загружается один раз за запрос.
         """
-        return get_object_or_404(User, username=self.kwargs['username'])
+        if not hasattr(self, '_profile'):
+            self._profile = get_object_or_404(
+                User, username=self.kwargs['username'])
+        return self._profile
 
     def get_queryset(self):
         """
@@ -256,6 +283,7 @@ class ProfileEditView(LoginRequiredMixin, UpdateView):
 
     template_name = 'blog/user.html'
     fields = ('first_name', 'last_name', 'email')
+    query_budget = 3
     slug_url_kwarg = 'username'
     slug_field = 'username'
 
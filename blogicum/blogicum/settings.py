@@ -2,6 +2,7 @@
 В данном файле у меня описаны основные настройки для моего проекта.
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -21,6 +22,7 @@ ALLOWED_HOSTS = ['127.0.0.1', 'localhost']  # Разрешенные хосты
 INSTALLED_APPS = [
     'blog.apps.BlogConfig',  # Приложение блога
     'pages.apps.PagesConfig',  # Приложение страниц
+    'core.apps.CoreConfig',  # Общие модели и служебные команды
     'django.contrib.admin',  # Админ-панель Django
     'django.contrib.auth',  # Модуль аутентификации
     'django.contrib.contenttypes',  # Модуль для работы с типами контента
@@ -36,13 +38,27 @@ MEDIA_ROOT = BASE_DIR / 'media'  # Папка для хранения загру
 MEDIA_URL = 'media/'  # URL для доступа к медиафайлам
 
 MIDDLEWARE = [
+    'debug_toolbar.middleware.DebugToolbarMiddleware',  # Панель отладки (только при DEBUG)
+    'core.metrics.MetricsMiddleware',  # Метрики запросов по представлениям
+    'core.timing.ServerTimingMiddleware',  # Заголовок Server-Timing: SQL, шаблоны, кэш
+    'core.log.RequestLogMiddleware',  # Журнал запросов в JSON
+    'core.access_log.AccessLogMiddleware',  # Выборочный журнал запросов для воспроизведения
+    'core.query_budget.QueryBudgetMiddleware',  # Бюджеты количества SQL-запросов представлений
+    'core.nplusone.NPlusOneMiddleware',  # Поиск запросов N+1 при разработке
+    'core.slow_queries.SlowQueryMiddleware',  # Журнал медленных SQL с планом
+    'core.query_stats.QueryStatsMiddleware',  # Статистика SQL по отпечаткам
+    'core.routers.ReplicaPinningMiddleware',  # Чтение своих записей из основной базы
     'django.middleware.security.SecurityMiddleware',  # Защита приложения
     'django.contrib.sessions.middleware.SessionMiddleware',  # Обработка сессий
     'django.middleware.common.CommonMiddleware',  # Общие промежуточные действия
     'django.middleware.csrf.CsrfViewMiddleware',  # Защита от CSRF-атак
     'django.contrib.auth.middleware.AuthenticationMiddleware',  # Аутентификация пользователя
     'django.contrib.messages.middleware.MessageMiddleware',  # Обработка сообщений
+    'core.query_guard.QueryGuardMiddleware',  # Бюджет времени SQL на запрос
     'django.middleware.clickjacking.XFrameOptionsMiddleware',  # Защита от Clickjacking
+    'core.sampler.SamplerMiddleware',  # Постоянный выборочный профилировщик
+    'core.memory.MemoryProfilerMiddleware',  # Снимки tracemalloc для выбранных запросов
+    'core.profiling.ProfilingMiddleware',  # cProfile для выбранных запросов
 ]
 
 ROOT_URLCONF = 'blogicum.urls'  # Модуль с URL-ами приложения
@@ -51,7 +67,7 @@ TEMPLATES_DIR = BASE_DIR / 'templates'  # Директория для шабло
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',  # Движок шаблонов Django
+        'BACKEND': 'core.backends.templates.DjangoTemplates',  # Движок шаблонов Django с замером отрисовки
         'DIRS': [TEMPLATES_DIR],  # Директория для дополнительных шаблонов
         'APP_DIRS': True,  # Включает поиск шаблонов в директории приложений
         'OPTIONS': {
@@ -60,6 +76,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.server_timing',
             ],
         },
     },
@@ -78,6 +95,131 @@ DATABASES = {
     }
 }
 
+# Профиль базы данных: 'development' (по умолчанию) или 'production'
+DATABASE_PROFILE = os.getenv('BLOGICUM_DB_PROFILE', 'development')
+
+if DATABASE_PROFILE == 'production':
+    DATABASES['default'].update({
+        'ENGINE': 'core.backends.sqlite3',  # SQLite с WAL и настроенными PRAGMA
+        'CONN_MAX_AGE': 600,  # Соединение живёт в потоке воркера до 10 минут
+        'OPTIONS': {
+            'timeout': 5,  # Ожидание блокировки на уровне драйвера, секунды
+        },
+    })
+
+# Пул соединений для потоковых WSGI/ASGI-серверов: BLOGICUM_DB_POOL=1
+if os.getenv('BLOGICUM_DB_POOL'):
+    DATABASES['default'].update({
+        'ENGINE': 'core.backends.sqlite3',  # Бэкенд с поддержкой пула
+        'CONN_MAX_AGE': 0,  # После запроса соединение возвращается в пул
+    })
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+        'max_size': 8,  # Максимум соединений на процесс
+        'max_idle': 300,  # Простаивающее соединение закрывается через 5 минут
+        'timeout': 5,  # Сколько секунд ждать свободного соединения
+        'health_check_interval': 30,  # Проверять соединения, простоявшие дольше
+    }
+
+# Реплики только для чтения; BLOGICUM_DB_REPLICAS=local включает локальную
+# копию SQLite, которую обновляет команда refresh_replica
+DATABASE_REPLICAS = []
+
+if os.getenv('BLOGICUM_DB_REPLICAS') == 'local':
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': BASE_DIR / 'db.replica.sqlite3',  # Файл локальной реплики
+        'TEST': {'MIRROR': 'default'},  # В тестах реплика совпадает с основной базой
+    }
+    DATABASE_REPLICAS = ['replica']
+
+# Отдельная база для сессий; включается BLOGICUM_DB_BOOKKEEPING=1,
+# таблицы создаёт команда migrate --database=bookkeeping. Журнал админки
+# остаётся в основной базе: при удалении пользователя или типа контента
+# Django ищет его записи через внешние ключи в той же базе
+BOOKKEEPING_DATABASE = None
+BOOKKEEPING_APPS = ('sessions',)
+
+if os.getenv('BLOGICUM_DB_BOOKKEEPING'):
+    DATABASES['bookkeeping'] = {
+        'ENGINE': 'core.backends.sqlite3',  # SQLite с WAL и настроенными PRAGMA
+        'NAME': BASE_DIR / 'db.bookkeeping.sqlite3',  # Файл служебной базы
+        'CONN_MAX_AGE': DATABASES['default'].get('CONN_MAX_AGE', 0),
+        'OPTIONS': {
+            # Пользователи и типы контента остаются в основной базе
+            'pragmas': {'foreign_keys': 'OFF'},
+            # Основная база подключается только для чтения, чтобы работали JOIN
+            'attach': {'content': f"file:{DATABASES['default']['NAME']}?mode=ro"},
+        },
+    }
+    BOOKKEEPING_DATABASE = 'bookkeeping'
+
+DATABASE_ROUTERS = [
+    'core.routers.BookkeepingRouter',  # Сессии в служебной базе
+    'core.routers.ReplicaRouter',  # Чтение с реплик, запись в основную базу
+]
+
+REPLICA_PIN_SECONDS = 15  # Сколько секунд после записи пользователь читает из основной базы
+
+# Бюджет времени SQL на один HTTP-запрос, секунды (0 — без ограничения)
+QUERY_TIME_BUDGET = 2.0
+
+# Бюджеты для отдельных маршрутов и пространств имён
+QUERY_TIME_BUDGETS = {
+    'admin': 10.0,  # Поиск и фильтры в админке могут работать дольше
+    'blog:index': 0.5,  # Публичные ленты должны отвечать быстро
+    'blog:category_posts': 0.5,
+    'blog:profile': 0.5,
+}
+
+QUERY_GUARD_DATABASES = ('default',)  # Базы, для которых действует бюджет
+
+BACKUP_DIR = BASE_DIR / 'backups'  # Каталог снимков команды backup_db
+
+# Доля запросов, попадающих в журнал для replay_access_log (0 — выключено)
+ACCESS_LOG_SAMPLE_RATE = float(os.getenv('BLOGICUM_ACCESS_LOG_SAMPLE', 0))
+ACCESS_LOG_DIR = BASE_DIR / 'access_log'  # Каталог файлов журнала запросов
+# Части имён параметров пути и query, значения которых не пишутся в журнал
+ACCESS_LOG_REDACT = (
+    'token', 'uidb64', 'key', 'secret', 'password', 'signature', 'code',
+)
+
+QUERY_BUDGET_ENFORCE = DEBUG  # Ошибка при превышении query_budget представления
+
+NPLUSONE_ENABLED = DEBUG  # Поиск повторяющихся запросов (N+1) в каждом запросе
+NPLUSONE_THRESHOLD = 5  # Сколько повторов одного запроса считать N+1
+
+# Заголовок Server-Timing: всегда при DEBUG, в продакшене по переменной
+SERVER_TIMING_ENABLED = DEBUG or os.getenv('BLOGICUM_SERVER_TIMING') == '1'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.InstrumentedLocMemCache',  # Кэш в памяти с учётом попаданий
+    },
+}
+
+# Порог медленного SQL-запроса для журнала с EXPLAIN, с (0 — выключено)
+SLOW_QUERY_THRESHOLD = float(os.getenv('BLOGICUM_SLOW_QUERY_MS', 100)) / 1000
+
+METRICS_ENABLED = os.getenv('BLOGICUM_METRICS', '1') == '1'  # Сбор метрик запросов
+# Общий каталог снимков метрик воркеров; без него — метрики одного процесса
+METRICS_DIR = os.getenv('BLOGICUM_METRICS_DIR')
+METRICS_FLUSH_INTERVAL = 1  # Как часто процесс записывает снимок, с
+# Токен сборщика метрик (Authorization: Bearer); без него — только сотрудники
+METRICS_TOKEN = os.getenv('BLOGICUM_METRICS_TOKEN')
+METRICS_MAX_AGE = 3600  # Через сколько секунд без обновления снимок процесса удаляется
+
+QUERY_STATS_ENABLED = os.getenv('BLOGICUM_QUERY_STATS', '1') == '1'  # Статистика SQL
+# Каталог снимков статистики SQL; без него статистика только в памяти
+QUERY_STATS_DIR = os.getenv('BLOGICUM_QUERY_STATS_DIR')
+QUERY_STATS_FLUSH_INTERVAL = 30  # Как часто процесс сбрасывает снимок, с
+
+PROFILE_DIR = BASE_DIR / 'profiles'  # Каталог профилей cProfile
+PROFILE_RING_SIZE = 50  # Сколько последних профилей хранить
+# Доля запросов, профилируемых без заголовка и параметра (0 — выключено)
+PROFILE_SAMPLE_RATE = float(os.getenv('BLOGICUM_PROFILE_SAMPLE', 0))
+PROFILE_HEADER = 'X-Blogicum-Profile'  # Заголовок с токеном profile_token
+PROFILE_TOKEN_MAX_AGE = 60 * 60  # Срок действия токена профилирования, с
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -131,10 +273,76 @@ INTERNAL_IPS = [
     '127.0.0.1',  # Локальные IP-адреса для отладки
 ]
 
+DEBUG_TOOLBAR_PANELS = [  # Панели отладки: стандартные и панели блога
+    'debug_toolbar.panels.history.HistoryPanel',
+    'debug_toolbar.panels.versions.VersionsPanel',
+    'debug_toolbar.panels.timer.TimerPanel',
+    'debug_toolbar.panels.settings.SettingsPanel',
+    'debug_toolbar.panels.headers.HeadersPanel',
+    'debug_toolbar.panels.request.RequestPanel',
+    'debug_toolbar.panels.sql.SQLPanel',
+    'core.panels.TemplateQueriesPanel',  # SQL-запросы по шаблонам
+    'debug_toolbar.panels.staticfiles.StaticFilesPanel',
+    'debug_toolbar.panels.templates.TemplatesPanel',
+    'debug_toolbar.panels.cache.CachePanel',
+    'core.panels.CacheLayersPanel',  # Попадания и промахи по слоям кэша
+    'core.panels.PaginatorPanel',  # Цена подсчёта объектов пагинатором
+    'core.panels.DuplicateLoadsPanel',  # Повторные загрузки объектов моделей
+    'debug_toolbar.panels.signals.SignalsPanel',
+    'debug_toolbar.panels.logging.LoggingPanel',
+    'debug_toolbar.panels.redirects.RedirectsPanel',
+    'debug_toolbar.panels.profiling.ProfilingPanel',
+]
+
 EMAIL_BACKEND = 'django.core.mail.backends.dummy.EmailBackend'  # Используемый бэкенд для отправки почты (только для тестирования)
 
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'  # Директория для хранения отправленных писем (в тестовом режиме)
 
+REQUEST_LOG_ENABLED = os.getenv('BLOGICUM_REQUEST_LOG', '1') == '1'  # Журнал запросов в JSON
+LOG_DIR = Path(os.getenv('BLOGICUM_LOG_DIR', BASE_DIR / 'logs'))  # Каталог журналов
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'console': {'format': '%(levelname)s %(name)s: %(message)s'},
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'console',
+        },
+        'access': {
+            '()': 'core.log.AsyncRotatingFileHandler',  # Запись из фонового потока
+            'filename': LOG_DIR / 'access.jsonl',
+            'max_bytes': 50 * 1024 * 1024,  # Ротация после 50 МБ
+            'backup_count': 5,  # Сколько старых файлов хранить
+        },
+    },
+    'loggers': {
+        'blogicum.access': {
+            'handlers': ['access'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+    'root': {'handlers': ['console'], 'level': 'WARNING'},
+}
+
+SAMPLER_ENABLED = os.getenv('BLOGICUM_SAMPLER', '1') == '1'  # Выборочный профилировщик
+SAMPLER_DIR = LOG_DIR / 'samples'  # Каталог файлов collapsed stacks
+SAMPLER_INTERVAL = 0.1  # Период снятия стеков, с (10 раз в секунду)
+SAMPLER_FLUSH_INTERVAL = 60  # Как часто дописывать стеки в файл, с
+SAMPLER_MAX_OVERHEAD = 0.01  # Допустимая доля времени на снятие стеков
+SAMPLER_MAX_FILES = 500  # Сколько последних файлов стеков хранить
+
+# Профилирование памяти tracemalloc: замедляет работу, включать на время
+TRACEMALLOC_ENABLED = os.getenv('BLOGICUM_TRACEMALLOC') == '1'
+TRACEMALLOC_SAMPLE_RATE = float(os.getenv('BLOGICUM_TRACEMALLOC_SAMPLE', 0.1))  # Доля запросов
+TRACEMALLOC_FRAMES = 25  # Глубина стека выделения, чтобы дойти до кода проекта
+TRACEMALLOC_TOP = 20  # Сколько мест выделения записывать в отчёт
+TRACEMALLOC_DIR = LOG_DIR / 'memory'  # Каталог отчётов tracemalloc
+
 CSRF_FAILURE_VIEW = 'pages.views.csrf_failure'  # Представление для обработки ошибок CSRF
 
 LOGIN_REDIRECT_URL = 'blog:index'  # URL для перенаправления после успешной аутентификации пользователя
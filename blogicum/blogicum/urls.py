@@ -11,6 +11,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('blog.urls')),
     path('pages/', include('pages.urls')),
+    path('staff/', include('core.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('auth/registration/', include('users.urls')),
 ]
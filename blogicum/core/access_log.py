@@ -0,0 +1,227 @@
+"""
+Выборочный журнал запросов и его воспроизведение.
+
+`AccessLogMiddleware` записывает долю `ACCESS_LOG_SAMPLE_RATE` запросов
+в файлы `ACCESS_LOG_DIR/access-ГГГГММДД.tsv`, по строке на запрос:
+
+    время  метод  маршрут  путь  query  класс  код  длительность_мс
+
+Класс пользователя — anonymous, user или staff. Тела запросов
+и данные пользователей не записываются, а секреты в адресе (токены
+сброса пароля, параметры query из `ACCESS_LOG_REDACT`) заменяются
+на `REDACTED`, поэтому журнал компактен и его можно переносить
+на машину разработчика.
+
+Команда `replay_access_log` проигрывает журнал против локального
+сервера с исходными или ускоренными интервалами и сравнивает
+распределения задержек по маршрутам между двумя прогонами.
+"""
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from core.http_bench import percentile
+
+FIELDS = (
+    'timestamp', 'method', 'route', 'path', 'query', 'user_class',
+    'status', 'duration',
+)
+REPLAYABLE_METHODS = ('GET', 'HEAD')  # Тела POST не пишутся в журнал
+REDACTED = 'REDACTED'
+
+
+def user_class(user):
+    """Класс пользователя для журнала: anonymous, user или staff."""
+    if user is None or not user.is_authenticated:
+        return 'anonymous'
+    return 'staff' if user.is_staff else 'user'
+
+
+def is_secret(name):
+    """Похоже ли имя параметра на секрет из `ACCESS_LOG_REDACT`."""
+    name = name.lower()
+    return any(word in name for word in settings.ACCESS_LOG_REDACT)
+
+
+def redact_path(path, resolver_match):
+    """Заменяет секретные части пути (например, `<token>`) на REDACTED."""
+    if resolver_match is None:
+        return path
+    segments = path.split('/')
+    for name, value in resolver_match.kwargs.items():
+        if is_secret(name):
+            value = str(value)
+            segments = [
+                REDACTED if segment == value else segment
+                for segment in segments
+            ]
+    return '/'.join(segments)
+
+
+def redact_query(query):
+    """Заменяет значения секретных параметров query на REDACTED."""
+    if not query:
+        return query
+    params = parse_qsl(query, keep_blank_values=True)
+    if not any(is_secret(name) for name, _ in params):
+        return query
+    return urlencode([
+        (name, REDACTED if is_secret(name) else value)
+        for name, value in params
+    ])
+
+
+def format_entry(entry):
+    """Строка журнала; табуляции и переводы строк из значений удаляются."""
+    return '\t'.join(
+        str(entry[field]).replace('\t', ' ').replace('\n', ' ')
+        for field in FIELDS
+    ) + '\n'
+
+
+def parse_entry(line):
+    entry = dict(zip(FIELDS, line.rstrip('\n').split('\t')))
+    entry['timestamp'] = float(entry['timestamp'])
+    entry['status'] = int(entry['status'])
+    entry['duration'] = float(entry['duration'])
+    return entry
+
+
+def read_log(paths):
+    """Возвращает записи журналов в порядке времени."""
+    entries = []
+    for path in paths:
+        with open(path, encoding='utf-8') as file:
+            entries.extend(parse_entry(line) for line in file if line.strip())
+    entries.sort(key=lambda entry: entry['timestamp'])
+    return entries
+
+
+class AccessLogMiddleware:
+    """Записывает выборку запросов в журнал для воспроизведения."""
+
+    def __init__(self, get_response):
+        if not settings.ACCESS_LOG_SAMPLE_RATE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.directory = Path(settings.ACCESS_LOG_DIR)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.skip_prefixes = ('/' + settings.MEDIA_URL.lstrip('/'),
+                              settings.STATIC_URL, '/__debug__/')
+
+    def __call__(self, request):
+        if random.random() >= settings.ACCESS_LOG_SAMPLE_RATE \
+                or request.path.startswith(self.skip_prefixes):
+            return self.get_response(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        duration = time.perf_counter() - started
+        match = request.resolver_match
+        self.write({
+            'timestamp': f'{time.time():.3f}',
+            'method': request.method,
+            'route': match.view_name if match else '-',
+            'path': redact_path(request.path, match),
+            'query': redact_query(request.META.get('QUERY_STRING', '')),
+            'user_class': user_class(getattr(request, 'user', None)),
+            'status': response.status_code,
+            'duration': f'{1000 * duration:.2f}',
+        })
+        return response
+
+    def write(self, entry):
+        path = self.directory / time.strftime('access-%Y%m%d.tsv')
+        # Короткая запись в режиме 'a' атомарна и между процессами
+        with open(path, 'a', encoding='utf-8') as file:
+            file.write(format_entry(entry))
+
+
+def replay(entries, clients, speed=1.0, workers=8):
+    """
+    Проигрывает записи журнала и возвращает задержки по маршрутам.
+
+    clients — HTTP-клиенты по классам пользователей. speed=1 сохраняет
+    исходные интервалы между запросами, speed=2 проигрывает вдвое
+    быстрее, speed=0 отправляет запросы без пауз. Результат:
+    {маршрут: {'latencies': [...], 'errors': N}}.
+    """
+    results = defaultdict(lambda: {'latencies': [], 'errors': 0})
+    lock = threading.Lock()
+    entries = [
+        entry for entry in entries
+        if entry['method'] in REPLAYABLE_METHODS
+    ]
+    if not entries:
+        return {}
+
+    def send(entry):
+        client = clients.get(entry['user_class'], clients['anonymous'])
+        path = entry['path']
+        if entry['query']:
+            path += '?' + entry['query']
+        started = time.perf_counter()
+        try:
+            status = client.request(path)
+        except OSError:
+            status = None
+        latency = time.perf_counter() - started
+        failed = status is None or status >= 500 \
+            or (status >= 400) != (entry['status'] >= 400)
+        with lock:
+            result = results[entry['route']]
+            result['latencies'].append(round(1000 * latency, 3))
+            result['errors'] += failed
+
+    first = entries[0]['timestamp']
+    started = time.monotonic()
+    with ThreadPoolExecutor(workers) as executor:
+        for entry in entries:
+            if speed:
+                delay = (entry['timestamp'] - first) / speed
+                pause = started + delay - time.monotonic()
+                if pause > 0:
+                    time.sleep(pause)
+            executor.submit(send, entry)
+    return dict(results)
+
+
+def summarize(results):
+    """Процентили задержек по маршрутам, мс."""
+    return {
+        route: {
+            'requests': len(result['latencies']),
+            'errors': result['errors'],
+            **{
+                f'p{percent}': round(
+                    percentile(result['latencies'], percent), 2
+                )
+                for percent in (50, 95, 99)
+            },
+        }
+        for route, result in sorted(results.items())
+    }
+
+
+def compare(base, new, threshold=0.2):
+    """
+    Сравнивает два прогона по маршрутам.
+
+    Возвращает строки (маршрут, показатель, было, стало, изменение)
+    и признак регрессии — роста p50 или p95 больше чем на threshold.
+    """
+    base, new = summarize(base), summarize(new)
+    rows = []
+    for route in sorted(base.keys() & new.keys()):
+        for metric in ('p50', 'p95', 'p99'):
+            old, current = base[route][metric], new[route][metric]
+            change = (current - old) / old if old else 0.0
+            regression = metric in ('p50', 'p95') and change > threshold
+            rows.append((route, metric, old, current, change, regression))
+    return rows
@@ -0,0 +1,16 @@
+"""
+Конфигурация служебного приложения 'core'.
+
+Здесь собраны общие для всего проекта вещи: абстрактные модели,
+инструменты сборки статики и обслуживания базы данных.
+"""
+
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    """Конфигурация приложения 'core'."""
+
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core'  # Имя приложения
+    verbose_name = 'Ядро проекта'  # Читаемое имя приложения
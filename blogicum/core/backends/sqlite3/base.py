@@ -0,0 +1,144 @@
+"""
+Бэкенд SQLite для продакшена.
+
+Отличается от стандартного `django.db.backends.sqlite3` только тем, что
+сразу после открытия соединения выполняет набор PRAGMA: журнал WAL
+(читатели не блокируются писателем), `synchronous=NORMAL`, увеличенный
+кэш страниц, отображение файла в память и ожидание блокировки вместо
+мгновенной ошибки `database is locked`.
+
+Значения можно переопределить в настройках:
+    'OPTIONS': {'pragmas': {'cache_size': -131072}}
+
+С `OPTIONS['pool']` соединения берутся из общего пула процесса
+(см. `pool.py`) и возвращаются в него при закрытии:
+    'OPTIONS': {'pool': {'max_size': 8, 'max_idle': 300, 'timeout': 5}}
+
+Через `OPTIONS['attach']` к соединению подключаются другие файлы SQLite:
+так служебная база видит таблицы пользователей основной базы в JOIN.
+    'OPTIONS': {'attach': {'content': 'file:db.sqlite3?mode=ro'}}
+
+Если внешние ключи выключены (`'pragmas': {'foreign_keys': 'OFF'}`), база
+может хранить ссылки на таблицы другой базы, например на `auth_user`.
+Такие ссылки `check_constraints` не проверяет, поэтому
+`loaddata --database=...` загружает их без ошибок.
+"""
+from itertools import chain
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError
+from django.db.backends.sqlite3 import base
+
+from .pool import get_pool
+
+PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',  # Читатели не ждут писателя
+    'synchronous': 'NORMAL',  # В режиме WAL этого достаточно для надёжности
+    'cache_size': -65536,  # 64 МБ кэша страниц (отрицательное значение в КиБ)
+    'mmap_size': 268435456,  # 256 МБ файла читается через mmap
+    'busy_timeout': 5000,  # Ждать освобождения блокировки до 5 секунд
+    'temp_store': 'MEMORY',  # Временные таблицы и сортировки в памяти
+}
+
+
+def apply_pragmas(connection, pragmas):
+    """Выполняет PRAGMA на сыром соединении sqlite3."""
+    for name, value in pragmas.items():
+        if not name.isidentifier():
+            raise ImproperlyConfigured(f'Некорректное имя PRAGMA: {name!r}.')
+        connection.execute(f'PRAGMA {name} = {value}')
+
+
+def attach_databases(connection, databases):
+    """Подключает к соединению дополнительные файлы баз под своими схемами."""
+    for schema, path in databases.items():
+        if not schema.isidentifier():
+            raise ImproperlyConfigured(f'Некорректное имя схемы: {schema!r}.')
+        connection.execute(f'ATTACH DATABASE ? AS {schema}', (str(path),))
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """Соединение SQLite, настраивающее PRAGMA при каждом подключении."""
+
+    pragmas = PRODUCTION_PRAGMAS
+    pool = None
+
+    def get_connection_params(self):
+        """Убирает из параметров подключения PRAGMA, ATTACH и пул."""
+        kwargs = super().get_connection_params()
+        self.pragmas = {**PRODUCTION_PRAGMAS, **kwargs.pop('pragmas', {})}
+        self.attached = kwargs.pop('attach', {})
+        self.pool_options = kwargs.pop('pool', None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        """Берёт соединение из пула или открывает новое."""
+        if self.pool_options is None or self.is_in_memory_db():
+            return self.open_connection(conn_params)
+        self.pool = get_pool(
+            self.alias, conn_params['database'],
+            lambda: self.open_connection(conn_params),
+            **self.pool_options,
+        )
+        return self.pool.acquire()
+
+    def open_connection(self, conn_params):
+        """Открывает соединение и применяет к нему PRAGMA."""
+        connection = super().get_new_connection(conn_params)
+        apply_pragmas(connection, self.pragmas)
+        attach_databases(connection, self.attached)
+        return connection
+
+    def _close(self):
+        """Возвращает соединение в пул вместо закрытия."""
+        if self.pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            self.pool.release(self.connection)
+
+    @property
+    def foreign_keys_disabled(self):
+        """Выключены ли внешние ключи через `OPTIONS['pragmas']`."""
+        return str(self.pragmas.get('foreign_keys', 'ON')).upper() == 'OFF'
+
+    def enable_constraint_checking(self):
+        """Не включает внешние ключи, если они выключены в настройках."""
+        if self.foreign_keys_disabled:
+            return
+        super().enable_constraint_checking()
+
+    def check_constraints(self, table_names=None):
+        """Пропускает ссылки на таблицы, которых нет в этой базе."""
+        if not self.foreign_keys_disabled:
+            return super().check_constraints(table_names)
+        with self.cursor() as cursor:
+            local_tables = set(self.introspection.table_names(cursor))
+            if table_names is None:
+                table_names = local_tables
+            violations = chain.from_iterable(
+                cursor.execute(
+                    'PRAGMA foreign_key_check(%s)'
+                    % self.ops.quote_name(table_name)
+                ).fetchall()
+                for table_name in table_names
+            )
+            for table_name, rowid, referenced_table, index in violations:
+                if referenced_table not in local_tables:
+                    continue  # Таблица в другой базе, проверить её нельзя
+                foreign_key = cursor.execute(
+                    'PRAGMA foreign_key_list(%s)'
+                    % self.ops.quote_name(table_name)
+                ).fetchall()[index]
+                column_name = foreign_key[3]
+                bad_value = cursor.execute(
+                    'SELECT %s FROM %s WHERE rowid = %%s' % (
+                        self.ops.quote_name(column_name),
+                        self.ops.quote_name(table_name),
+                    ),
+                    (rowid,),
+                ).fetchone()[0]
+                raise IntegrityError(
+                    f'Строка {rowid} таблицы {table_name} ссылается на '
+                    f'отсутствующую запись {referenced_table}: '
+                    f'{column_name} = {bad_value!r}.'
+                )
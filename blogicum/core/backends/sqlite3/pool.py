@@ -0,0 +1,162 @@
+"""
+Ограниченный пул соединений SQLite.
+
+Пул общий для всех потоков процесса: поток берёт готовое соединение
+в начале запроса и возвращает его в конце, поэтому открытие файла,
+регистрация функций и PRAGMA выполняются один раз на соединение, а не
+на каждый запрос. Размер пула ограничен: если все соединения заняты,
+поток ждёт освобождения не дольше `timeout` секунд.
+
+Соединение, пролежавшее без дела дольше `max_idle` секунд, закрывается,
+а перед выдачей давно не использованного соединения выполняется
+проверка `SELECT 1`.
+"""
+import sqlite3
+import threading
+import time
+from collections import Counter, deque
+
+
+class PoolTimeout(sqlite3.OperationalError):
+    """Все соединения пула заняты, а время ожидания истекло."""
+
+
+class ConnectionPool:
+    """Потокобезопасный пул соединений с ограничением размера."""
+
+    def __init__(self, factory, max_size=10, max_idle=300, timeout=5,
+                 health_check_interval=30):
+        self._factory = factory
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._idle = deque()  # Пары (соединение, время возврата в пул)
+        self._in_use = 0
+        self._condition = threading.Condition()
+        self._stats = Counter()
+
+    def acquire(self):
+        """Выдаёт соединение из пула, при необходимости открывая новое."""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            connection, released_at = self._reserve(deadline)
+            if connection is None:
+                return self._create()
+            if self._is_healthy(connection, released_at):
+                self._count('reused')
+                return connection
+            self._count('failed_health_checks')
+            self._close(connection)
+
+    def release(self, connection):
+        """Возвращает соединение в пул, откатив незавершённую транзакцию."""
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+        except sqlite3.Error:
+            self._count('failed_releases')
+            self._close(connection)
+            return
+        with self._condition:
+            self._in_use -= 1
+            self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    def close_all(self):
+        """Закрывает все свободные соединения пула."""
+        with self._condition:
+            idle, self._idle = self._idle, deque()
+        for connection, _ in idle:
+            connection.close()
+
+    def metrics(self):
+        """Возвращает счётчики пула и текущую занятость."""
+        with self._condition:
+            return {
+                **self._stats,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'max_size': self.max_size,
+            }
+
+    def _reserve(self, deadline):
+        """
+        Занимает место в пуле.
+
+        Возвращает свободное соединение или (None, None), если разрешено
+        открыть новое. Соединения, простоявшие дольше max_idle, закрываются.
+        """
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                while self._idle and now - self._idle[0][1] > self.max_idle:
+                    connection, _ = self._idle.popleft()
+                    connection.close()
+                    self._stats['expired'] += 1
+                if self._idle:
+                    self._in_use += 1
+                    return self._idle.pop()
+                if self._in_use < self.max_size:
+                    self._in_use += 1
+                    return None, None
+                remaining = deadline - now
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeout(
+                        f'Все {self.max_size} соединений пула заняты.'
+                    )
+                self._stats['waits'] += 1
+                self._condition.wait(remaining)
+
+    def _create(self):
+        try:
+            connection = self._factory()
+        except Exception:
+            self._close(None)
+            raise
+        self._count('created')
+        return connection
+
+    def _is_healthy(self, connection, released_at):
+        if time.monotonic() - released_at < self.health_check_interval:
+            return True
+        try:
+            connection.execute('SELECT 1').fetchone()
+        except sqlite3.Error:
+            return False
+        return True
+
+    def _count(self, name):
+        with self._condition:
+            self._stats[name] += 1
+
+    def _close(self, connection):
+        """Закрывает занятое соединение и освобождает его место в пуле."""
+        if connection is not None:
+            try:
+                connection.close()
+            except sqlite3.Error:
+                pass
+        with self._condition:
+            self._in_use -= 1
+            self._condition.notify()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, database, factory, **options):
+    """Возвращает пул для файла базы, создавая его при первом вызове."""
+    with _pools_lock:
+        if (alias, database) not in _pools:
+            _pools[alias, database] = ConnectionPool(factory, **options)
+        return _pools[alias, database]
+
+
+def pool_metrics():
+    """Возвращает метрики всех пулов процесса по псевдонимам баз."""
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.metrics() for (alias, _), pool in pools.items()}
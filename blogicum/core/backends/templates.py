@@ -0,0 +1,33 @@
+"""
+Шаблонный движок Django с замером времени отрисовки.
+
+Отличается от `django.template.backends.django.DjangoTemplates` только
+тем, что шаблоны, отрисованные во время замера Server-Timing
+(см. `core.timing`), записывают своё время в счётчики запроса.
+"""
+from django.template import TemplateDoesNotExist
+from django.template.backends import django as django_backend
+
+from core.timing import current_stats
+
+
+class Template(django_backend.Template):
+
+    def render(self, context=None, request=None):
+        stats = current_stats()
+        if stats is None:
+            return super().render(context, request)
+        with stats.template(self.origin.template_name):
+            return super().render(context, request)
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django_backend.reraise(exc, self)
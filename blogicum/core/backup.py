@@ -0,0 +1,133 @@
+"""
+Копирование баз SQLite через online backup API.
+
+Backup API копирует базу постранично и не требует остановки записи:
+основная база продолжает принимать запросы, а копия получается
+согласованной на момент окончания копирования.
+
+Здесь же собраны функции снимков: снимок копируется порциями страниц
+с паузами, проверяется `PRAGMA integrity_check`, сжимается gzip,
+рядом записывается контрольная сумма SHA-256, а старые снимки удаляются.
+"""
+import gzip
+import hashlib
+import os
+import shutil
+import sqlite3
+import time
+from contextlib import closing
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
+def database_path(alias):
+    """Возвращает путь к файлу базы SQLite по псевдониму из DATABASES."""
+    config = settings.DATABASES[alias]
+    if not config['ENGINE'].endswith('sqlite3'):
+        raise ImproperlyConfigured(
+            f'База {alias!r} не является SQLite: backup API недоступен.'
+        )
+    return str(config['NAME'])
+
+
+def online_copy(source_path, target_path, pages=-1, sleep=0.0,
+                progress=None):
+    """
+    Копирует базу source_path в target_path и возвращает время копирования.
+
+    При pages=-1 база копируется за один шаг, иначе — порциями по pages
+    страниц с паузой sleep секунд между порциями.
+    """
+    started = time.monotonic()
+    with closing(sqlite3.connect(source_path)) as source, \
+            closing(sqlite3.connect(target_path)) as target:
+        source.backup(target, pages=pages, sleep=sleep, progress=progress)
+    return time.monotonic() - started
+
+
+def refresh_replica(replica_alias, source_alias='default'):
+    """Обновляет локальную реплику копией основной базы."""
+    return online_copy(
+        database_path(source_alias), database_path(replica_alias)
+    )
+
+
+SNAPSHOT_SUFFIXES = ('.sqlite3', '.sqlite3.gz')
+CHUNK_SIZE = 1024 * 1024  # Размер блока при сжатии и подсчёте суммы
+
+
+def file_checksum(path):
+    """Считает SHA-256 файла, читая его блоками."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def integrity_check(path):
+    """Возвращает результат `PRAGMA integrity_check` для файла базы."""
+    with closing(sqlite3.connect(path)) as connection:
+        return connection.execute('PRAGMA integrity_check').fetchone()[0]
+
+
+def create_snapshot(source_path, directory, prefix, pages=1024, sleep=0.05,
+                    compress=True, verify=True, progress=None):
+    """
+    Создаёт проверенный снимок базы и возвращает путь к нему.
+
+    Рядом со снимком сохраняется файл `<снимок>.sha256` в формате
+    утилиты sha256sum.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S-%f')
+    target = directory / f'{prefix}-{stamp}.sqlite3'
+    partial = target.with_name(target.name + '.partial')
+    try:
+        online_copy(source_path, str(partial), pages, sleep, progress)
+        if verify:
+            result = integrity_check(str(partial))
+            if result != 'ok':
+                raise sqlite3.DatabaseError(
+                    f'Снимок {target.name} повреждён: {result}'
+                )
+        if compress:
+            target = target.with_name(target.name + '.gz')
+            with open(partial, 'rb') as source, \
+                    gzip.open(target, 'wb') as output:
+                shutil.copyfileobj(source, output, CHUNK_SIZE)
+        else:
+            os.replace(partial, target)
+    finally:
+        partial.unlink(missing_ok=True)
+    checksum_path = target.with_name(target.name + '.sha256')
+    checksum_path.write_text(f'{file_checksum(target)}  {target.name}\n')
+    return target
+
+
+def verify_snapshot(path):
+    """Сверяет снимок с сохранённой рядом контрольной суммой."""
+    path = Path(path)
+    expected = path.with_name(path.name + '.sha256').read_text().split()[0]
+    return file_checksum(path) == expected
+
+
+def rotate_snapshots(directory, prefix, keep):
+    """
+    Удаляет старые снимки, оставляя keep последних; возвращает удалённые.
+
+    При keep=0 снимки не удаляются.
+    """
+    snapshots = sorted(
+        path for path in Path(directory).glob(f'{prefix}-*')
+        if path.name.endswith(SNAPSHOT_SUFFIXES)
+    )
+    removed = snapshots[:-keep] if keep else []
+    for path in removed:
+        path.unlink()
+        path.with_name(path.name + '.sha256').unlink(missing_ok=True)
+    return removed
@@ -0,0 +1,27 @@
+"""
+Кэш в памяти процесса с учётом попаданий для Server-Timing.
+
+Во время замера (см. `core.timing`) чтения `get` и `get_many`
+записывают попадания, промахи и затраченное время в счётчики
+запроса; без замера работают как обычный `LocMemCache`.
+"""
+import time
+
+from django.core.cache.backends.locmem import LocMemCache
+
+from core.timing import current_stats
+
+MISSING = object()
+
+
+class InstrumentedLocMemCache(LocMemCache):
+
+    def get(self, key, default=None, version=None):
+        stats = current_stats()
+        if stats is None:
+            return super().get(key, default, version)
+        started = time.perf_counter()
+        value = super().get(key, MISSING, version)
+        stats.cache_lookup(value is not MISSING,
+                           time.perf_counter() - started)
+        return default if value is MISSING else value
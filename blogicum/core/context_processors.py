@@ -0,0 +1,7 @@
+"""Контекстные процессоры служебного приложения."""
+from core.timing import current_stats
+
+
+def server_timing(request):
+    """Счётчики Server-Timing текущего запроса (None без замера)."""
+    return {'server_timing': current_stats()}
@@ -0,0 +1,96 @@
+"""
+Потоковое чтение фикстур в формате `dumpdata`.
+
+`loaddata` читает файл целиком, а здесь записи читаются по одной:
+JSON-массив разбирается порциями по мере чтения файла, NDJSON (одна
+запись на строку) — построчно. Файлы с расширением `.gz` распаковываются
+на лету. В памяти одновременно находится только текущая порция файла.
+"""
+import gzip
+import json
+from pathlib import Path
+
+CHUNK_SIZE = 1024 * 1024  # Сколько символов читать из файла за раз
+NDJSON_SUFFIXES = ('.ndjson', '.jsonl')
+WHITESPACE = ' \t\r\n'
+
+
+def open_text(path):
+    """Открывает файл фикстуры как текст, распаковывая gzip."""
+    path = Path(path)
+    if path.suffix == '.gz':
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+def iter_json_array(file, chunk_size=CHUNK_SIZE):
+    """Возвращает элементы JSON-массива по одному, не читая файл целиком."""
+    decoder = json.JSONDecoder()
+    buffer, started = '', False
+    for chunk in iter(lambda: file.read(chunk_size), ''):
+        buffer += chunk
+        pos = 0
+        if not started:
+            pos = _skip(buffer, pos, WHITESPACE)
+            if pos == len(buffer):
+                continue
+            if buffer[pos] != '[':
+                raise ValueError('Фикстура должна быть JSON-массивом.')
+            started, pos = True, pos + 1
+        records, pos = _decode_records(decoder, buffer, pos)
+        yield from records
+        if pos is None:
+            return
+        buffer = buffer[pos:]
+    if buffer.strip() or not started:
+        raise ValueError('Фикстура обрывается посреди JSON-массива.')
+    raise ValueError('В фикстуре нет закрывающей скобки массива.')
+
+
+def _decode_records(decoder, buffer, pos):
+    """
+    Разбирает записи, целиком поместившиеся в буфер.
+
+    Возвращает записи и позицию, с которой продолжить разбор, или None
+    вместо позиции, если массив закончился.
+    """
+    records = []
+    while True:
+        pos = _skip(buffer, pos, WHITESPACE + ',')
+        if pos < len(buffer) and buffer[pos] == ']':
+            return records, None
+        try:
+            record, pos = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            return records, pos  # Запись не поместилась: дочитываем файл
+        records.append(record)
+
+
+def iter_ndjson(file):
+    """Возвращает записи NDJSON-файла по одной."""
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_records(path, fmt=None):
+    """
+    Возвращает записи фикстуры по одной.
+
+    Формат определяется по расширению (`.ndjson`, `.jsonl`, в том числе
+    со сжатием `.gz`), если не задан явно как 'json' или 'ndjson'.
+    """
+    name = Path(path).name.removesuffix('.gz')
+    if fmt is None:
+        fmt = 'ndjson' if name.endswith(NDJSON_SUFFIXES) else 'json'
+    with open_text(path) as file:
+        if fmt == 'ndjson':
+            yield from iter_ndjson(file)
+        else:
+            yield from iter_json_array(file)
+
+
+def _skip(buffer, pos, characters):
+    while pos < len(buffer) and buffer[pos] in characters:
+        pos += 1
+    return pos
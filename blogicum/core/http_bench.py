@@ -0,0 +1,130 @@
+"""
+HTTP-клиент и сервер для замеров сайта.
+
+Общие части нагрузочного теста (`blog.loadtest`) и воспроизведения
+журнала запросов (`core.access_log`): клиент с cookie и CSRF-токеном
+Django, WSGI-сервер в фоновом потоке и процентили задержек. Модуль
+использует только стандартную библиотеку, поэтому его можно запускать
+в процессах без настройки Django.
+"""
+import statistics
+import threading
+from http.cookiejar import Cookie, CookieJar, eff_request_host
+from socketserver import ThreadingMixIn
+from urllib.error import HTTPError
+from urllib.parse import urlencode, urlsplit
+from urllib.request import (
+    HTTPCookieProcessor, HTTPRedirectHandler, Request, build_opener,
+)
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+TIMEOUT = 30  # Сколько секунд ждать ответа сервера
+
+
+class QuietHandler(WSGIRequestHandler):
+    """Обработчик запросов без записи каждой строки в stderr."""
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ThreadingServer(ThreadingMixIn, WSGIServer):
+    """WSGI-сервер, обрабатывающий каждый запрос в своём потоке."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def serve(application, host='127.0.0.1', port=0):
+    """Запускает сервер в фоновом потоке и возвращает его и базовый URL."""
+    server = make_server(
+        host, port, application, server_class=ThreadingServer,
+        handler_class=QuietHandler,
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://{host}:{server.server_port}'
+
+
+class LoginError(RuntimeError):
+    """Клиент не смог войти: форма входа не выдала сессию."""
+
+
+class NoRedirect(HTTPRedirectHandler):
+    """Не следовать перенаправлениям: 302 после формы — это успех."""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Client:
+    """HTTP-клиент с cookie и CSRF-токеном Django."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.location = ''  # Куда перенаправил последний ответ
+        self.cookies = CookieJar()
+        self.opener = build_opener(
+            HTTPCookieProcessor(self.cookies), NoRedirect
+        )
+
+    def request(self, path, data=None):
+        """Возвращает код ответа; ответ 3xx не считается ошибкой."""
+        body = None
+        if data is not None:
+            data = dict(data, csrfmiddlewaretoken=self.csrf_token())
+            body = urlencode(data).encode()
+        self.location = ''
+        try:
+            with self.opener.open(self.base_url + path, body,
+                                  timeout=TIMEOUT) as response:
+                response.read()
+                return response.status
+        except HTTPError as error:
+            error.read()
+            self.location = error.headers.get('Location', '')
+            return error.code
+
+    def redirected_to(self, *paths):
+        """Перенаправил ли последний ответ на одну из страниц paths."""
+        return bool(self.location) \
+            and urlsplit(self.location).path in paths
+
+    def set_cookie(self, name, value):
+        """Добавляет cookie для сервера base_url, например ключ сессии."""
+        # Домен как у cookie из ответа: для 'localhost' это 'localhost.local'
+        _, domain = eff_request_host(Request(self.base_url))
+        self.cookies.set_cookie(Cookie(
+            0, name, value, None, False, domain, False, False, '/', True,
+            False, None, False, None, None, {},
+        ))
+
+    def csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return ''
+
+    def has_cookie(self, name):
+        return any(cookie.name == name for cookie in self.cookies)
+
+    def login(self, path, username, password, session_cookie='sessionid'):
+        """Входит через форму; без перенаправления и сессии — LoginError."""
+        self.request(path)
+        status = self.request(path, {
+            'username': username, 'password': password,
+        })
+        if not 300 <= status < 400 or self.redirected_to(path) \
+                or not self.has_cookie(session_cookie):
+            raise LoginError(
+                f'Не удалось войти как {username}: HTTP {status}.'
+            )
+        return status
+
+
+def percentile(values, percent):
+    """Процентиль с интерполяцией; для одного значения — оно само."""
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method='inclusive')[
+        percent - 1
+    ]
@@ -0,0 +1,196 @@
+"""
+Структурированный журнал запросов в JSON.
+
+`RequestLogMiddleware` пишет в журнал `blogicum.access` строку на каждый
+запрос: маршрут, метод, путь, код ответа, длительность, число
+SQL-запросов, обращения к кэшу, класс пользователя и размер ответа.
+Счётчики берутся из `core.timing.RequestStats` — общего с заголовком
+Server-Timing, а без него промежуточный слой заводит их сам.
+
+Запись в файл идёт через очередь: `AsyncRotatingFileHandler` только
+кладёт запись в очередь, а фоновый поток `QueueListener` форматирует
+её `JsonFormatter` и пишет в файл с ротацией по размеру. Поток запроса
+никогда не ждёт диск; при переполненной очереди запись отбрасывается
+и учитывается в счётчике `dropped`, который виден в метриках как
+`blogicum_log_dropped_total`. Файл и поток создаются при первой записи,
+поэтому команды вроде `migrate` или `shell`, которые ничего не пишут
+в журнал, не заводят ни каталога, ни потока. В процессе, созданном
+fork'ом (воркеры `gunicorn --preload`), очередь и поток создаются заново.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import time
+import weakref
+from contextlib import ExitStack
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from core.access_log import user_class
+from core.timing import STATS, RequestStats, current_stats
+
+# Атрибуты LogRecord, которые не переносятся в JSON как поля
+RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord(
+    '', 0, '', 0, '', None, None
+))) | {'message', 'asctime'}
+
+logger = logging.getLogger('blogicum.access')
+
+_handlers = weakref.WeakSet()  # Обработчики процесса для метрик
+
+
+class JsonFormatter(logging.Formatter):
+    """Запись журнала одной строкой JSON, поля из extra — на верхнем уровне."""
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        data.update(
+            (key, value) for key, value in vars(record).items()
+            if key not in RECORD_ATTRIBUTES
+        )
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class AsyncRotatingFileHandler(QueueHandler):
+    """
+    Обработчик, пишущий в файл с ротацией из фонового потока.
+
+    Параметры задаются в LOGGING как у RotatingFileHandler:
+    filename, max_bytes, backup_count; queue_size ограничивает очередь.
+    """
+
+    def __init__(self, filename, max_bytes=10 * 1024 * 1024, backup_count=5,
+                 queue_size=10000):
+        super().__init__(queue.Queue(queue_size))
+        self.filename = Path(filename)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.dropped = 0
+        self.listener = None
+        self._running = False
+        self._closed = False
+        _handlers.add(self)
+        handler = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: (
+            handler() and handler().restart_after_fork()
+        ))
+
+    def start(self):
+        """Создаёт файл журнала и запускает поток записи."""
+        self.filename.parent.mkdir(parents=True, exist_ok=True)
+        target = RotatingFileHandler(
+            self.filename, maxBytes=self.max_bytes,
+            backupCount=self.backup_count, encoding='utf-8', delay=True,
+        )
+        target.setFormatter(JsonFormatter())
+        self.listener = QueueListener(self.queue, target)
+        self.listener.start()
+        self._running = True
+        atexit.register(self.stop)
+
+    def prepare(self, record):
+        # Поля записи не трогаем: их форматирует JsonFormatter в потоке
+        return record
+
+    def enqueue(self, record):
+        # Вызывается под блокировкой обработчика, поток стартует один раз
+        if self.listener is None and not self._closed:
+            self.start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def restart_after_fork(self):
+        """Запускает поток записи в процессе, созданном fork'ом."""
+        if self._running:
+            # Очередь родителя могла остаться заблокированной его потоком
+            self.queue = queue.Queue(self.queue.maxsize)
+            self.listener = QueueListener(self.queue, *self.listener.handlers)
+            self.listener.start()
+
+    def stop(self):
+        """Дописывает очередь и останавливает поток."""
+        self._closed = True
+        if self._running:
+            self._running = False
+            self.listener.stop()
+            for handler in self.listener.handlers:
+                handler.close()
+
+
+def log_metrics():
+    """Число отброшенных записей по файлам журналов процесса."""
+    dropped = {}
+    for handler in list(_handlers):
+        name = handler.filename.name
+        dropped[name] = dropped.get(name, 0) + handler.dropped
+    return dropped
+
+
+def cache_status(stats):
+    if not stats.cache_hits and not stats.cache_misses:
+        return 'none'
+    if not stats.cache_misses:
+        return 'hit'
+    return 'miss' if not stats.cache_hits else 'partial'
+
+
+def request_fields(request, response, stats):
+    """Поля строки журнала запросов."""
+    match = request.resolver_match
+    return {
+        'route': match.view_name if match else None,
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code,
+        'duration_ms': round(1000 * (time.perf_counter() - stats.started), 2),
+        'queries': stats.sql_count,
+        'sql_ms': round(1000 * stats.sql_time, 2),
+        'cache': cache_status(stats),
+        'user_class': user_class(getattr(request, 'user', None)),
+        'bytes': None if response.streaming else len(response.content),
+    }
+
+
+class RequestLogMiddleware:
+    """Пишет строку журнала `blogicum.access` на каждый запрос."""
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_LOG_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = current_stats()
+        if stats is not None:
+            response = self.get_response(request)
+        else:
+            stats = RequestStats()
+            token = STATS.set(stats)
+            try:
+                with ExitStack() as stack:
+                    for alias in connections:
+                        stack.enter_context(
+                            connections[alias].execute_wrapper(stats)
+                        )
+                    response = self.get_response(request)
+            finally:
+                STATS.reset(token)
+        logger.info('%s %s %s', request.method, request.path,
+                    response.status_code,
+                    extra=request_fields(request, response, stats))
+        return response
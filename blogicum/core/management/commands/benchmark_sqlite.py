@@ -0,0 +1,188 @@
+"""
+Нагрузочное сравнение профилей подключения к SQLite.
+
+Команда создаёт временную базу с таблицей, похожей на `blog_post`,
+и запускает параллельно потоки-читатели (постраничная лента) и
+потоки-писатели (вставка записей). Один и тот же сценарий прогоняется
+для трёх профилей:
+    - development: стандартный журнал и новое соединение на каждый запрос;
+    - production: PRAGMA из `core.backends.sqlite3` и постоянное
+      соединение на поток;
+    - pooled: те же PRAGMA, но соединение на каждую операцию берётся
+      из общего пула `core.backends.sqlite3.pool`.
+
+Запуск:
+    python manage.py benchmark_sqlite --readers 8 --writers 2 --duration 5
+"""
+import functools
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from core.backends.sqlite3.base import PRODUCTION_PRAGMAS, apply_pragmas
+from core.backends.sqlite3.pool import ConnectionPool
+
+PAGE_SIZE = 10  # Количество записей на странице ленты
+
+SCHEMA = """
+CREATE TABLE post (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title VARCHAR(256) NOT NULL,
+    text TEXT NOT NULL,
+    pub_date DATETIME NOT NULL
+);
+CREATE INDEX post_pub_date ON post (pub_date);
+"""
+
+PROFILES = {
+    'development': {'pragmas': {}, 'persistent': False, 'pooled': False},
+    'production': {
+        'pragmas': PRODUCTION_PRAGMAS, 'persistent': True, 'pooled': False,
+    },
+    'pooled': {
+        'pragmas': PRODUCTION_PRAGMAS, 'persistent': False, 'pooled': True,
+    },
+}
+
+
+def create_database(path, rows):
+    """Создаёт базу с тестовой таблицей и заполняет её."""
+    connection = sqlite3.connect(path)
+    connection.executescript(SCHEMA)
+    connection.executemany(
+        'INSERT INTO post (title, text, pub_date) VALUES (?, ?, ?)',
+        (
+            (f'Пост {i}', 'Текст ' * 50, f'2023-01-01 00:00:{i % 60:02d}')
+            for i in range(rows)
+        ),
+    )
+    connection.commit()
+    connection.close()
+
+
+def open_connection(path, pragmas):
+    """Открывает соединение, которое можно передавать между потоками."""
+    connection = sqlite3.connect(path, timeout=5, check_same_thread=False)
+    apply_pragmas(connection, pragmas)
+    return connection
+
+
+class Worker(threading.Thread):
+    """Поток, выполняющий чтения или записи до истечения времени теста."""
+
+    def __init__(self, path, profile, deadline, rows, writer, pool=None):
+        super().__init__(daemon=True)
+        self.path = path
+        self.profile = profile
+        self.pool = pool
+        self.deadline = deadline
+        self.rows = rows
+        self.writer = writer
+        self.operations = 0
+        self.errors = 0
+
+    def connect(self):
+        return open_connection(self.path, self.profile['pragmas'])
+
+    def run_once(self, connection):
+        if self.writer:
+            with connection:
+                connection.execute(
+                    'INSERT INTO post (title, text, pub_date) '
+                    "VALUES (?, ?, datetime('now'))",
+                    ('Новый пост', 'Текст ' * 50),
+                )
+        else:
+            offset = random.randrange(max(self.rows - PAGE_SIZE, 1))
+            connection.execute(
+                'SELECT id, title, text, pub_date FROM post '
+                'ORDER BY pub_date DESC LIMIT ? OFFSET ?',
+                (PAGE_SIZE, offset),
+            ).fetchall()
+
+    def run(self):
+        connection = self.connect() if self.profile['persistent'] else None
+        while time.monotonic() < self.deadline:
+            if connection is not None:
+                current = connection
+            elif self.pool is not None:
+                current = self.pool.acquire()
+            else:
+                current = self.connect()
+            try:
+                self.run_once(current)
+                self.operations += 1
+            except sqlite3.OperationalError:
+                self.errors += 1
+            finally:
+                if self.pool is not None:
+                    self.pool.release(current)
+                elif connection is None:
+                    current.close()
+        if connection is not None:
+            connection.close()
+
+
+def run_profile(path, profile, readers, writers, duration, rows):
+    """Прогоняет сценарий для профиля и возвращает число операций в секунду."""
+    deadline = time.monotonic() + duration
+    pool = None
+    if profile['pooled']:
+        pool = ConnectionPool(
+            functools.partial(open_connection, path, profile['pragmas']),
+            max_size=max(readers + writers, 1), timeout=duration,
+        )
+    workers = [
+        Worker(path, profile, deadline, rows, writer=index < writers,
+               pool=pool)
+        for index in range(readers + writers)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    if pool is not None:
+        pool.close_all()
+    return {
+        'reads': sum(w.operations for w in workers if not w.writer) / duration,
+        'writes': sum(w.operations for w in workers if w.writer) / duration,
+        'errors': sum(w.errors for w in workers),
+    }
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность SQLite при параллельных '
+            'чтениях и записях в профилях development, production и pooled.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8,
+                            help='Количество потоков-читателей.')
+        parser.add_argument('--writers', type=int, default=2,
+                            help='Количество потоков-писателей.')
+        parser.add_argument('--duration', type=float, default=5.0,
+                            help='Длительность прогона профиля, секунды.')
+        parser.add_argument('--rows', type=int, default=10000,
+                            help='Количество записей в тестовой таблице.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"профиль":<12} {"чтений/с":>10} {"записей/с":>10} '
+            f'{"ошибок":>8}'
+        )
+        for name, profile in PROFILES.items():
+            with tempfile.TemporaryDirectory() as directory:
+                path = str(Path(directory) / 'benchmark.sqlite3')
+                create_database(path, options['rows'])
+                result = run_profile(
+                    path, profile, options['readers'], options['writers'],
+                    options['duration'], options['rows'],
+                )
+            self.stdout.write(
+                f'{name:<12} {result["reads"]:>10.0f} '
+                f'{result["writes"]:>10.0f} {result["errors"]:>8}'
+            )
@@ -0,0 +1,115 @@
+"""
+Перенос данных между двумя базами из DATABASES.
+
+Целевая база должна быть заранее создана миграциями
+(`python manage.py migrate --database=<target>`). Выбранные таблицы
+целевой базы очищаются и заполняются строками исходной. Если перенос
+прервался, повторный запуск продолжает его с контрольной точки
+(по умолчанию `BACKUP_DIR/copy-<source>-<target>.json`).
+
+Запуск:
+    python manage.py copy_data default new --chunk-size 5000
+    python manage.py copy_data default new --models blog auth.user
+"""
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.transfer import CHUNK_SIZE, Checkpoint, Transfer, select_models
+
+
+class Command(BaseCommand):
+    help = ('Копирует таблицы из одной базы в другую порциями с контрольными '
+            'точками и проверкой сумм.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='Псевдоним исходной базы.')
+        parser.add_argument('target', help='Псевдоним целевой базы.')
+        parser.add_argument(
+            '--models', nargs='+', default=(),
+            help='Приложения или модели для переноса, например blog '
+                 'auth.user; по умолчанию все.',
+        )
+        parser.add_argument(
+            '--exclude', nargs='+', default=(),
+            help='Приложения или модели, которые не нужно переносить.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Сколько строк копировать за одну порцию.',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл контрольной точки; по умолчанию '
+                 'copy-<source>-<target>.json в BACKUP_DIR.',
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Забыть контрольную точку и начать перенос заново.',
+        )
+        parser.add_argument(
+            '--no-verify', action='store_false', dest='verify',
+            help='Не сверять суммы порций после переноса.',
+        )
+
+    def handle(self, *args, **options):
+        source, target = options['source'], options['target']
+        for alias in (source, target):
+            if alias not in connections:
+                raise CommandError(f'База {alias!r} не описана в DATABASES.')
+        if source == target:
+            raise CommandError('Исходная и целевая базы совпадают.')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size должен быть больше 0.')
+
+        path = Path(options['checkpoint'] or (
+            Path(settings.BACKUP_DIR) / f'copy-{source}-{target}.json'
+        ))
+        if options['restart'] and path.exists():
+            path.unlink()
+        checkpoint = Checkpoint(path)
+        if checkpoint.state:
+            self.stdout.write(f'Продолжаем перенос с контрольной точки {path}')
+
+        models = select_models(
+            source, target, options['models'], options['exclude']
+        )
+        if not models:
+            raise CommandError('Нет моделей для переноса.')
+        transfer = Transfer(
+            source, target, checkpoint, options['chunk_size'],
+            progress=self.report,
+        )
+        self.copied = {}
+        started = time.monotonic()
+        transfer.copy(models)
+        elapsed = time.monotonic() - started
+        total = sum(self.copied.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Скопировано {total} строк за {elapsed:.1f} с.'
+        ))
+
+        if options['verify']:
+            self.verify(transfer, models)
+
+    def verify(self, transfer, models):
+        mismatches = transfer.verify(models)
+        for model, first_pk, last_pk in mismatches:
+            self.stderr.write(
+                f'{model._meta.label}: не совпадают строки с pk '
+                f'{first_pk}..{"" if last_pk is None else last_pk}'
+            )
+        if mismatches:
+            raise CommandError(
+                'Данные в базах различаются. Повторите перенос с --restart.'
+            )
+        self.stdout.write(self.style.SUCCESS('Суммы порций совпадают.'))
+
+    def report(self, model, rows):
+        label = model._meta.label
+        self.copied[label] = self.copied.get(label, 0) + rows
+        if rows:
+            self.stdout.write(f'{label}: {self.copied[label]}')
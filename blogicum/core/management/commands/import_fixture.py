@@ -0,0 +1,254 @@
+"""
+Потоковая загрузка фикстур в формате `dumpdata` (JSON или NDJSON).
+
+В отличие от `loaddata`, команда не держит файл в памяти и не сохраняет
+объекты по одному с сигналами: записи читаются потоком, собираются
+в пачки по моделям и вставляются через `bulk_create`. Каждые
+`--transaction-size` записей транзакция фиксируется. С `--defer-indexes`
+вторичные индексы SQLite удаляются на время загрузки и строятся заново
+в конце — один проход по таблице быстрее, чем обновление индекса на
+каждую вставку.
+
+Как и `loaddata`, команда обновляет записи, первичные ключи которых уже
+есть в базе (например, права и типы контента после `migrate`), а с
+`--ignore-conflicts` оставляет их как есть. В итогах вставленные,
+обновлённые и пропущенные записи считаются отдельно.
+
+Запуск:
+    python manage.py import_fixture db.json --batch-size 2000 --defer-indexes
+"""
+import time
+from collections import Counter, defaultdict
+from itertools import islice
+
+from django.core import serializers
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+
+from core.fixtures import iter_records
+
+LOOKUP_SIZE = 500  # Сколько ключей проверять одним запросом IN (...)
+
+
+def drop_secondary_indexes(connection):
+    """
+    Удаляет неуникальные индексы SQLite и возвращает SQL для их создания.
+
+    Уникальные индексы остаются: без них не работают проверки
+    уникальности и `ignore_conflicts`.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+            "AND sql IS NOT NULL AND sql NOT LIKE 'CREATE UNIQUE%'"
+        )
+        indexes = cursor.fetchall()
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX "{name}"')
+    return [sql for _, sql in indexes]
+
+
+def link_fields(model):
+    """Возвращает два внешних ключа промежуточной модели ManyToMany."""
+    return [field for field in model._meta.concrete_fields
+            if field.is_relation]
+
+
+def instance_key(model, instance):
+    """Ключ записи: первичный ключ или пара ссылок промежуточной модели."""
+    if model._meta.auto_created:
+        return tuple(getattr(instance, field.attname)
+                     for field in link_fields(model))
+    return instance.pk
+
+
+def existing_keys(model, instances, using):
+    """Возвращает ключи записей пачки, которые уже есть в базе."""
+    manager = model._base_manager.using(using)
+    keys = {instance_key(model, instance) for instance in instances}
+    keys.discard(None)
+    found = set()
+    if model._meta.auto_created:
+        first, second = link_fields(model)
+        ids = sorted({key[0] for key in keys})
+        for start in range(0, len(ids), LOOKUP_SIZE):
+            found.update(manager.filter(**{
+                f'{first.attname}__in': ids[start:start + LOOKUP_SIZE],
+            }).values_list(first.attname, second.attname))
+    else:
+        pks = sorted(keys)
+        for start in range(0, len(pks), LOOKUP_SIZE):
+            found.update(manager.filter(
+                pk__in=pks[start:start + LOOKUP_SIZE]
+            ).values_list('pk', flat=True))
+    return found & keys
+
+
+def create_indexes(connection, statements):
+    """Создаёт индексы, удалённые перед загрузкой."""
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+class Command(BaseCommand):
+    help = ('Загружает фикстуру JSON или NDJSON потоком, вставляя записи '
+            'пачками через bulk_create.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл фикстуры (.json, .ndjson, .gz).',
+        )
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Псевдоним базы из DATABASES.',
+        )
+        parser.add_argument(
+            '--format', choices=('json', 'ndjson'),
+            help='Формат файла; по умолчанию определяется по расширению.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько объектов одной модели вставлять за раз.',
+        )
+        parser.add_argument(
+            '--transaction-size', type=int, default=50000,
+            help='Сколько записей загружать в одной транзакции.',
+        )
+        parser.add_argument(
+            '--defer-indexes', action='store_true',
+            help='Удалить вторичные индексы SQLite на время загрузки.',
+        )
+        parser.add_argument(
+            '--ignore-conflicts', action='store_true',
+            help='Пропускать записи, которые уже есть в базе.',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['transaction_size'] < 1:
+            raise CommandError('Размеры пачки и транзакции должны быть > 0.')
+        self.using = options['database']
+        self.batch_size = options['batch_size']
+        self.ignore_conflicts = options['ignore_conflicts']
+        self.counts = Counter()
+        self.updated = Counter()
+        self.skipped = Counter()
+        connection = connections[self.using]
+        objects = serializers.deserialize(
+            'python', iter_records(options['path'], options['format']),
+            using=self.using, ignorenonexistent=True,
+        )
+
+        started = time.monotonic()
+        with connection.constraint_checks_disabled():
+            deferred = []
+            if options['defer_indexes'] and connection.vendor == 'sqlite':
+                deferred = drop_secondary_indexes(connection)
+            try:
+                while True:
+                    chunk = list(islice(objects, options['transaction_size']))
+                    if not chunk:
+                        break
+                    with transaction.atomic(using=self.using):
+                        self.load_chunk(chunk)
+                    self.report(started)
+            finally:
+                if deferred:
+                    index_started = time.monotonic()
+                    create_indexes(connection, deferred)
+                    self.stdout.write(
+                        f'Восстановлено индексов: {len(deferred)} за '
+                        f'{time.monotonic() - index_started:.1f} с.'
+                    )
+
+        models = {*self.counts, *self.updated, *self.skipped}
+        table_names = [model._meta.db_table for model in models]
+        connection.check_constraints(table_names=table_names)
+        sequence_sql = connection.ops.sequence_reset_sql(no_style(), models)
+        if sequence_sql:
+            with connection.cursor() as cursor:
+                for sql in sequence_sql:
+                    cursor.execute(sql)
+
+        elapsed = time.monotonic() - started
+        for model in sorted(models, key=lambda model: model._meta.label):
+            self.stdout.write(
+                f'{model._meta.label}: вставлено {self.counts[model]}, '
+                f'обновлено {self.updated[model]}, '
+                f'пропущено {self.skipped[model]}'
+            )
+        total = sum(self.counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено {total} записей за {elapsed:.1f} с '
+            f'({total / max(elapsed, 1e-9):.0f} записей/с), обновлено '
+            f'{sum(self.updated.values())}, пропущено '
+            f'{sum(self.skipped.values())}.'
+        ))
+
+    def load_chunk(self, chunk):
+        """Группирует записи по моделям и вставляет их пачками."""
+        buffers = defaultdict(list)
+        for deserialized in chunk:
+            instance = deserialized.object
+            model = type(instance)
+            if not router.allow_migrate_model(self.using, model):
+                continue
+            buffers[model].append(instance)
+            for name, pks in (deserialized.m2m_data or {}).items():
+                field = model._meta.get_field(name)
+                through = field.remote_field.through
+                buffers[through].extend(
+                    through(**{
+                        f'{field.m2m_field_name()}_id': instance.pk,
+                        f'{field.m2m_reverse_field_name()}_id': pk,
+                    })
+                    for pk in pks
+                )
+            if len(buffers[model]) >= self.batch_size:
+                self.flush(model, buffers.pop(model))
+        for model, instances in buffers.items():
+            if instances:
+                self.flush(model, instances)
+
+    def flush(self, model, instances):
+        """Вставляет новые записи, а уже существующие обновляет."""
+        manager = model._base_manager.using(self.using)
+        existing = existing_keys(model, instances, self.using)
+        new, old = [], []
+        for instance in instances:
+            if instance_key(model, instance) in existing:
+                old.append(instance)
+            else:
+                new.append(instance)
+        if new:
+            keyless = any(instance_key(model, instance) is None
+                          for instance in new)
+            before = manager.count() if keyless else 0
+            manager.bulk_create(
+                new, batch_size=self.batch_size,
+                ignore_conflicts=self.ignore_conflicts,
+            )
+            if not self.ignore_conflicts:
+                inserted = len(new)
+            elif keyless:
+                inserted = manager.count() - before
+            else:
+                inserted = len(existing_keys(model, new, self.using))
+            self.counts[model] += inserted
+            self.skipped[model] += len(new) - inserted
+        if old and (self.ignore_conflicts or model._meta.auto_created):
+            self.skipped[model] += len(old)
+        elif old:
+            fields = [field.name for field in model._meta.concrete_fields
+                      if not field.primary_key]
+            manager.bulk_update(old, fields, batch_size=self.batch_size)
+            self.updated[model] += len(old)
+
+    def report(self, started):
+        total = sum(self.counts.values())
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'Загружено {total} записей '
+            f'({total / max(elapsed, 1e-9):.0f} записей/с).'
+        )
@@ -0,0 +1,55 @@
+"""
+Сводка отчётов tracemalloc по представлениям.
+
+Запуск:
+    python manage.py memory_report
+    python manage.py memory_report --view blog:post_detail --top 20
+"""
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.memory import read_reports, summarize
+
+
+def kib(value):
+    return f'{value / 1024:,.1f} КиБ'
+
+
+class Command(BaseCommand):
+    help = ('Показывает прирост и пик памяти по представлениям из отчётов '
+            'tracemalloc.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*',
+            help='Файлы отчётов; по умолчанию все из TRACEMALLOC_DIR.',
+        )
+        parser.add_argument('--view', help='Показать одно представление.')
+        parser.add_argument(
+            '--top', type=int, default=5,
+            help='Сколько строк проекта показывать для представления.',
+        )
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or sorted(
+            Path(settings.TRACEMALLOC_DIR).glob('memory-*.jsonl')
+        )
+        reports = read_reports(paths)
+        if options['view']:
+            reports = [
+                report for report in reports
+                if report['view'] == options['view']
+            ]
+        if not reports:
+            raise CommandError('Отчётов tracemalloc не найдено.')
+        for view in summarize(reports, options['top']):
+            self.stdout.write(
+                f'{view["view"]}: запросов {view["requests"]}, '
+                f'прирост в среднем {kib(view["net_mean"])}, '
+                f'максимум {kib(view["net_max"])}, '
+                f'пик {kib(view["peak_max"])}'
+            )
+            for line, size in view['project_lines']:
+                self.stdout.write(f'    {kib(size):>14}  {line}')
@@ -0,0 +1,22 @@
+"""
+Выдаёт токен для профилирования запроса в продакшене.
+
+Запуск:
+    python manage.py profile_token
+    curl -H "X-Blogicum-Profile: <токен>" https://blogicum.example/
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.profiling import make_token
+
+
+class Command(BaseCommand):
+    help = ('Выводит подписанный токен заголовка, включающего cProfile '
+            'для запроса.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{settings.PROFILE_HEADER}: {make_token()}')
+        self.stderr.write(
+            f'Токен действует {settings.PROFILE_TOKEN_MAX_AGE} с.'
+        )
@@ -0,0 +1,257 @@
+"""
+Команда сборки урезанной таблицы стилей Bootstrap.
+
+Команда просматривает все шаблоны из каталога `templates/`, собирает
+используемые в них CSS-классы и HTML-теги и оставляет в `bootstrap.min.css`
+только те селекторы, которые действительно могут сработать на страницах.
+Дополнительно собирается критический CSS для шапки и карточки поста:
+он встраивается прямо в `base.html`, чтобы первая отрисовка не ждала
+загрузки внешней таблицы стилей.
+
+Запуск:
+    python manage.py purge_css
+"""
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+SOURCE_CSS = 'css/bootstrap.min.css'  # Исходная таблица стилей
+PURGED_CSS = 'css/bootstrap.purged.min.css'  # Урезанная таблица стилей
+CRITICAL_TEMPLATE = 'includes/critical_css.html'  # Шаблон со встроенным CSS
+
+# Шаблоны, которые видны на первом экране любой страницы.
+CRITICAL_TEMPLATES = (
+    'base.html',
+    'includes/header.html',
+    'includes/post_card.html',
+    'includes/category_link.html',
+)
+
+# Классы, которые django_bootstrap5 добавляет при отрисовке форм и кнопок:
+# в наших шаблонах их не видно, но на страницах они есть.
+SAFELIST_CLASSES = frozenset((
+    'alert', 'alert-danger', 'alert-dismissible', 'btn', 'btn-close',
+    'btn-primary', 'col-auto', 'disabled', 'form-check', 'form-check-input',
+    'form-check-label', 'form-control', 'form-label', 'form-select',
+    'form-text', 'has-validation', 'input-group', 'input-group-text',
+    'invalid-feedback', 'is-invalid', 'is-valid', 'list-unstyled', 'mb-3',
+    'mt-1', 'row', 'text-danger',
+))
+
+# Теги, которые выводят формы django_bootstrap5, и корневые элементы.
+SAFELIST_TAGS = frozenset((
+    'body', 'button', 'form', 'html', 'input', 'label', 'legend', 'option',
+    'select', 'textarea',
+))
+
+TEMPLATE_TAG_RE = re.compile(r'{%.*?%}|{{.*?}}|{#.*?#}', re.DOTALL)
+CLASS_ATTR_RE = re.compile(r'class\s*=\s*"([^"]*)"|class\s*=\s*\'([^\']*)\'')
+HTML_TAG_RE = re.compile(r'<([a-zA-Z][a-zA-Z0-9]*)')
+CLASS_NAME_RE = re.compile(r'^-?[_a-zA-Z][\w-]*$')
+SELECTOR_CLASS_RE = re.compile(r'\.((?:\\.|[\w-])+)')
+SELECTOR_TAG_RE = re.compile(r'(?:^|[\s>+~])([a-zA-Z][a-zA-Z0-9]*)')
+SELECTOR_NOISE_RE = re.compile(
+    r'\[[^\]]*\]|:not\([^)]*\)|::?[\w-]+(?:\([^)]*\))?'
+)
+KEYFRAMES_RE = re.compile(r'@(?:-webkit-)?keyframes\s+([\w-]+)')
+
+
+def collect_usage(paths):
+    """
+    Собирает CSS-классы и HTML-теги, которые встречаются в шаблонах.
+
+    Теги шаблонизатора внутри атрибута `class` вырезаются, а литеральные
+    классы из веток `{% if %}` сохраняются.
+    """
+    classes, tags = set(), set()
+    for path in paths:
+        source = Path(path).read_text(encoding='utf-8')
+        for match in CLASS_ATTR_RE.finditer(source):
+            value = TEMPLATE_TAG_RE.sub(' ', match.group(1) or match.group(2))
+            classes.update(
+                name for name in value.split() if CLASS_NAME_RE.match(name)
+            )
+        tags.update(tag.lower() for tag in HTML_TAG_RE.findall(source))
+    return classes, tags
+
+
+def _find_block_end(css, start):
+    """Возвращает позицию закрывающей скобки блока, открытого перед start."""
+    depth, pos, quote = 1, start, None
+    while pos < len(css):
+        char = css[pos]
+        if quote:
+            if char == '\\':
+                pos += 1
+            elif char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return pos
+        pos += 1
+    raise CommandError('Некорректный CSS: не закрыт блок правил.')
+
+
+def parse_css(css):
+    """
+    Разбирает CSS на список правил.
+
+    Каждое правило — пара (заголовок, тело). Для `@media` и `@supports`
+    тело — список вложенных правил, для остальных — строка деклараций.
+    """
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)
+    rules, pos = [], 0
+    while pos < len(css):
+        brace = css.find('{', pos)
+        semicolon = css.find(';', pos)
+        if brace == -1 and semicolon == -1:
+            break
+        if semicolon != -1 and (brace == -1 or semicolon < brace):
+            # Правила без блока (`@charset`, `@import`) не нужны.
+            pos = semicolon + 1
+            continue
+        prelude = css[pos:brace].strip()
+        end = _find_block_end(css, brace + 1)
+        body = css[brace + 1:end]
+        if prelude.startswith(('@media', '@supports')):
+            rules.append((prelude, parse_css(body)))
+        else:
+            rules.append((prelude, body.strip()))
+        pos = end + 1
+    return rules
+
+
+def split_selectors(prelude):
+    """Делит список селекторов по запятым верхнего уровня."""
+    parts, depth, current = [], 0, ''
+    for char in prelude:
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        if char == ',' and depth == 0:
+            parts.append(current.strip())
+            current = ''
+        else:
+            current += char
+    parts.append(current.strip())
+    return [part for part in parts if part]
+
+
+def selector_is_used(selector, classes, tags):
+    """
+    Проверяет, может ли селектор сработать на наших страницах.
+
+    Селектор нужен, если все его классы и теги встречаются в шаблонах.
+    Селекторы без классов и тегов (`*`, `:root`, атрибуты) сохраняются.
+    """
+    for name in SELECTOR_CLASS_RE.findall(selector):
+        if name.replace('\\', '') not in classes:
+            return False
+    bare = SELECTOR_NOISE_RE.sub(' ', SELECTOR_CLASS_RE.sub(' ', selector))
+    return all(tag.lower() in tags for tag in SELECTOR_TAG_RE.findall(bare))
+
+
+def purge_rules(rules, classes, tags):
+    """Оставляет в списке правил только используемые селекторы."""
+    kept = []
+    for prelude, body in rules:
+        if isinstance(body, list):
+            nested = purge_rules(body, classes, tags)
+            if nested:
+                kept.append((prelude, nested))
+        elif prelude.startswith('@'):
+            kept.append((prelude, body))
+        else:
+            selectors = [
+                selector for selector in split_selectors(prelude)
+                if selector_is_used(selector, classes, tags)
+            ]
+            if selectors:
+                kept.append((','.join(selectors), body))
+    return _drop_unused_keyframes(kept)
+
+
+def _drop_unused_keyframes(rules):
+    """Удаляет анимации, на которые не ссылается ни одно оставшееся правило."""
+    declarations = render_css(
+        [rule for rule in rules if not KEYFRAMES_RE.match(rule[0])]
+    )
+    kept = []
+    for prelude, body in rules:
+        match = KEYFRAMES_RE.match(prelude)
+        if match and not re.search(
+                r'[\s:,]' + re.escape(match.group(1)) + r'\b', declarations):
+            continue
+        kept.append((prelude, body))
+    return kept
+
+
+def render_css(rules):
+    """Собирает список правил обратно в минифицированный CSS."""
+    chunks = []
+    for prelude, body in rules:
+        if isinstance(body, list):
+            body = render_css(body)
+        chunks.append(f'{prelude}{{{body}}}')
+    return ''.join(chunks)
+
+
+class Command(BaseCommand):
+    help = ('Собирает урезанную таблицу стилей Bootstrap и критический CSS '
+            'для встраивания в base.html.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--static-dir', default=settings.STATICFILES_DIRS[0],
+            help='Каталог статики с исходной таблицей стилей.',
+        )
+        parser.add_argument(
+            '--templates-dir', default=settings.TEMPLATES_DIR,
+            help='Каталог шаблонов, которые нужно просканировать.',
+        )
+
+    def handle(self, *args, **options):
+        static_dir = Path(options['static_dir'])
+        templates_dir = Path(options['templates_dir'])
+        source_path = static_dir / SOURCE_CSS
+        if not source_path.exists():
+            raise CommandError(f'Не найден файл {source_path}.')
+        source = source_path.read_text(encoding='utf-8')
+        rules = parse_css(source)
+
+        templates = sorted(templates_dir.rglob('*.html'))
+        classes, tags = collect_usage(templates)
+        purged = render_css(purge_rules(
+            rules, classes | SAFELIST_CLASSES, tags | SAFELIST_TAGS
+        ))
+        # Кодировку и лицензионный комментарий переносим без изменений.
+        banner = re.match(r'(?:@charset[^;]*;)?\s*(?:/\*!.*?\*/)?',
+                          source, re.DOTALL)
+        header = banner.group(0).strip()
+        (static_dir / PURGED_CSS).write_text(header + purged, encoding='utf-8')
+
+        critical_classes, critical_tags = collect_usage(
+            templates_dir / name for name in CRITICAL_TEMPLATES
+        )
+        critical = render_css(purge_rules(
+            rules, critical_classes, critical_tags | {'html', 'body'}
+        ))
+        (templates_dir / CRITICAL_TEMPLATE).write_text(
+            '{# Файл собран командой purge_css, не редактируйте вручную. #}\n'
+            f'<style>{critical}</style>\n',
+            encoding='utf-8',
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{PURGED_CSS}: {len(source)} -> {len(header + purged)} байт, '
+            f'критический CSS: {len(critical)} байт '
+            f'({len(templates)} шаблонов, {len(classes)} классов).'
+        ))
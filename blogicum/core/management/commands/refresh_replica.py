@@ -0,0 +1,41 @@
+"""
+Команда обновления локальных реплик SQLite.
+
+Реплики из `settings.DATABASE_REPLICAS` перезаписываются копией основной
+базы через online backup API. С параметром `--interval` команда работает
+непрерывно и обновляет реплики с заданным периодом.
+
+Запуск:
+    python manage.py refresh_replica --interval 5
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.backup import refresh_replica
+
+
+class Command(BaseCommand):
+    help = 'Обновляет локальные реплики SQLite копией основной базы.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Период обновления в секундах; 0 — обновить один раз.',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError(
+                'Реплики не настроены: задайте BLOGICUM_DB_REPLICAS=local.'
+            )
+        while True:
+            for alias in settings.DATABASE_REPLICAS:
+                elapsed = refresh_replica(alias)
+                self.stdout.write(
+                    f'Реплика {alias} обновлена за {elapsed:.3f} с.'
+                )
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
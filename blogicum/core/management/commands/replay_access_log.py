@@ -0,0 +1,187 @@
+"""
+Воспроизведение журнала запросов и сравнение задержек двух версий.
+
+Сценарий сравнения:
+    git checkout main
+    python manage.py replay_access_log --speed 2 --output main.json
+    git checkout feature
+    python manage.py replay_access_log --speed 2 --output feature.json
+    python manage.py replay_access_log --compare main.json feature.json
+
+Запросы пользователей и сотрудников отправляются от имени учётных
+записей replay-user и replay-staff, которые команда создаёт сама.
+Войти под ними по паролю нельзя: пароль неиспользуемый, а клиенты
+получают готовую сессию, как `Client.force_login` в тестах. replay-staff
+не суперпользователь: он получает только права на просмотр моделей,
+страницы которых есть в журнале. После прогона сессии удаляются,
+а учётные записи отключаются.
+"""
+import json
+from importlib import import_module
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model,
+)
+from django.contrib.auth.models import Permission
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from core.access_log import compare, read_log, replay, summarize
+from core.http_bench import Client, serve
+
+User = get_user_model()
+
+
+def session_store(session_key=None):
+    return import_module(settings.SESSION_ENGINE).SessionStore(session_key)
+
+
+def login_session(user):
+    """Создаёт сессию вошедшего пользователя и возвращает её ключ."""
+    session = session_store()
+    session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return session.session_key
+
+
+def view_permissions(entries):
+    """Права на просмотр моделей, страницы которых сотрудники открывали."""
+    routes = {
+        entry['route'] for entry in entries
+        if entry['user_class'] == 'staff'
+        and entry['route'].startswith('admin:')
+    }
+    query = Q(pk__in=[])
+    for model in apps.get_models():
+        opts = model._meta
+        prefix = f'admin:{opts.app_label}_{opts.model_name}_'
+        if any(route.startswith(prefix) for route in routes):
+            query |= Q(content_type__app_label=opts.app_label,
+                       codename=f'view_{opts.model_name}')
+    return Permission.objects.filter(query)
+
+
+class Command(BaseCommand):
+    help = ('Проигрывает журнал запросов AccessLogMiddleware и сравнивает '
+            'задержки по маршрутам между прогонами.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'logs', nargs='*',
+            help='Файлы журнала; по умолчанию все файлы ACCESS_LOG_DIR.',
+        )
+        parser.add_argument(
+            '--speed', type=float, default=1.0,
+            help='1 — исходный темп, 2 — вдвое быстрее, 0 — без пауз.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=8,
+            help='Сколько запросов может выполняться одновременно.',
+        )
+        parser.add_argument(
+            '--url',
+            help='Адрес запущенного сервера; по умолчанию сервер '
+                 'запускается в этом процессе.',
+        )
+        parser.add_argument(
+            '--output', help='Куда записать задержки прогона (JSON).',
+        )
+        parser.add_argument(
+            '--compare', nargs=2, metavar=('BASE', 'NEW'),
+            help='Сравнить два сохранённых прогона вместо воспроизведения.',
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Допустимый рост p50 и p95, доля от базового прогона.',
+        )
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            return self.compare(*options['compare'], options['threshold'])
+        paths = options['logs'] or sorted(
+            Path(settings.ACCESS_LOG_DIR).glob('access-*.tsv')
+        )
+        entries = read_log(paths)
+        if not entries:
+            raise CommandError('Журнал запросов пуст.')
+        if options['speed'] < 0 or options['workers'] < 1:
+            raise CommandError('Скорость и число потоков должны быть > 0.')
+
+        server, base_url = None, options['url']
+        if base_url is None:
+            from blogicum.wsgi import application
+            server, base_url = serve(application)
+        try:
+            results = replay(
+                entries, self.clients(base_url.rstrip('/'), entries),
+                options['speed'], options['workers'],
+            )
+        finally:
+            self.log_out()
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+        for route, summary in summarize(results).items():
+            self.stdout.write(
+                f'{route:<28} {summary["requests"]:>6} '
+                f'p50 {summary["p50"]:>8.2f}  p95 {summary["p95"]:>8.2f}  '
+                f'p99 {summary["p99"]:>8.2f} мс  ошибок {summary["errors"]}'
+            )
+        if options['output']:
+            Path(options['output']).write_text(
+                json.dumps(results, ensure_ascii=False), encoding='utf-8'
+            )
+
+    def clients(self, base_url, entries=()):
+        """Клиенты для анонимных запросов, пользователей и сотрудников."""
+        clients = {'anonymous': Client(base_url)}
+        self.users, self.sessions = [], []
+        for user_class, is_staff in (('user', False), ('staff', True)):
+            user, _ = User.objects.update_or_create(
+                username=f'replay-{user_class}',
+                defaults={'is_staff': is_staff, 'is_superuser': False,
+                          'is_active': True},
+            )
+            if user.has_usable_password():
+                user.set_unusable_password()
+                user.save(update_fields=['password'])
+            if is_staff:
+                user.user_permissions.set(view_permissions(entries))
+            session_key = login_session(user)
+            self.users.append(user.pk)
+            self.sessions.append(session_key)
+            clients[user_class] = Client(base_url)
+            clients[user_class].set_cookie(
+                settings.SESSION_COOKIE_NAME, session_key
+            )
+        return clients
+
+    def log_out(self):
+        """Удаляет сессии прогона и отключает учётные записи."""
+        for session_key in getattr(self, 'sessions', ()):
+            session_store(session_key).delete()
+        User.objects.filter(pk__in=getattr(self, 'users', ())).update(
+            is_active=False
+        )
+
+    def compare(self, base_path, new_path, threshold):
+        base, new = (
+            json.loads(Path(path).read_text(encoding='utf-8'))
+            for path in (base_path, new_path)
+        )
+        regressions = 0
+        for route, metric, old, current, change, regression in compare(
+                base, new, threshold):
+            mark = '  регрессия' if regression else ''
+            self.stdout.write(
+                f'{route:<28} {metric}  {old:>8.2f} -> {current:>8.2f} мс '
+                f'({change:+.0%}){mark}'
+            )
+            regressions += regression
+        if regressions:
+            raise CommandError(f'Найдено регрессий: {regressions}.')
@@ -0,0 +1,154 @@
+"""
+Профилирование памяти запросов через tracemalloc.
+
+Режим включается настройкой `TRACEMALLOC_ENABLED`: tracemalloc
+замедляет выделение памяти, поэтому в продакшене его включают на время
+расследования. `MemoryProfilerMiddleware` для доли
+`TRACEMALLOC_SAMPLE_RATE` запросов делает снимок до и после
+представления и дописывает в `TRACEMALLOC_DIR/memory-ГГГГММДД.jsonl`
+строку с именем представления, чистым приростом памяти, пиком за время
+запроса и самыми крупными местами выделения — строками кода проекта
+и строками, где память выделена фактически.
+
+tracemalloc общий для процесса, поэтому снимки делает только один
+запрос за раз, а выделения соседних потоков тоже попадают в отчёт.
+Сводку по представлениям строит команда `memory_report`.
+"""
+import json
+import random
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from core.nplusone import is_project_code, relative_path
+
+FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+    tracemalloc.Filter(False, '<unknown>'),
+    # Собственные выделения инструментов core, в том числе потока
+    # выборочного профилировщика, — шум для отчёта
+    tracemalloc.Filter(False, str(Path(__file__).parent / '*')),
+)
+
+
+def attribute(before, after, limit):
+    """
+    Прирост памяти между снимками по местам выделения.
+
+    Возвращает (прирост в байтах, строки выделения, строки проекта):
+    строка проекта — ближайший к выделению кадр из кода проекта.
+    """
+    lines, project = Counter(), Counter()
+    total = 0
+    for stat in after.filter_traces(FILTERS).compare_to(
+            before.filter_traces(FILTERS), 'traceback'):
+        if not stat.size_diff:
+            continue
+        total += stat.size_diff
+        frames = stat.traceback
+        top = frames[-1]
+        lines[f'{relative_path(top.filename)}:{top.lineno}'] += \
+            stat.size_diff
+        for frame in reversed(frames):
+            if is_project_code(frame.filename):
+                project[f'{relative_path(frame.filename)}:'
+                        f'{frame.lineno}'] += stat.size_diff
+                break
+    return total, lines.most_common(limit), project.most_common(limit)
+
+
+class MemoryProfilerMiddleware:
+    """Снимки tracemalloc до и после выбранных запросов."""
+
+    def __init__(self, get_response):
+        if not settings.TRACEMALLOC_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.directory = Path(settings.TRACEMALLOC_DIR)
+        self.lock = threading.Lock()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(settings.TRACEMALLOC_FRAMES)
+
+    def __call__(self, request):
+        if random.random() >= settings.TRACEMALLOC_SAMPLE_RATE \
+                or not self.lock.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            return self.profile(request)
+        finally:
+            self.lock.release()
+
+    def profile(self, request):
+        before = tracemalloc.take_snapshot()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        response = self.get_response(request)
+        _, peak = tracemalloc.get_traced_memory()
+        total, lines, project = attribute(
+            before, tracemalloc.take_snapshot(), settings.TRACEMALLOC_TOP
+        )
+        match = request.resolver_match
+        self.write({
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'view': match.view_name if match else '-',
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'net_bytes': total,
+            'peak_bytes': peak - current,
+            'lines': lines,
+            'project_lines': project,
+        })
+        return response
+
+    def write(self, report):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / time.strftime('memory-%Y%m%d.jsonl')
+        with open(path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(report, ensure_ascii=False) + '\n')
+
+
+def read_reports(paths):
+    reports = []
+    for path in paths:
+        with open(path, encoding='utf-8') as file:
+            reports.extend(json.loads(line) for line in file if line.strip())
+    return reports
+
+
+def summarize(reports, limit=10):
+    """
+    Сводка по представлениям от самых прожорливых: число запросов,
+    средний и максимальный прирост, максимальный пик и строки проекта
+    с наибольшим суммарным приростом.
+    """
+    views = {}
+    for report in reports:
+        view = views.setdefault(report['view'], {
+            'requests': 0, 'net_total': 0, 'net_max': 0, 'peak_max': 0,
+            'project_lines': Counter(),
+        })
+        view['requests'] += 1
+        view['net_total'] += report['net_bytes']
+        view['net_max'] = max(view['net_max'], report['net_bytes'])
+        view['peak_max'] = max(view['peak_max'], report['peak_bytes'])
+        view['project_lines'].update(dict(report['project_lines']))
+    summary = [
+        {
+            'view': name,
+            'requests': view['requests'],
+            'net_mean': view['net_total'] // view['requests'],
+            'net_max': view['net_max'],
+            'peak_max': view['peak_max'],
+            'project_lines': view['project_lines'].most_common(limit),
+        }
+        for name, view in views.items()
+    ]
+    summary.sort(key=lambda view: view['peak_max'], reverse=True)
+    return summary
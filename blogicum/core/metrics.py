@@ -0,0 +1,349 @@
+"""
+Метрики запросов в текстовом формате Prometheus.
+
+`MetricsMiddleware` для каждого представления (`blog:index`,
+`blog:post_detail`, ...) считает запросы и наполняет гистограммы
+времени ответа, числа SQL-запросов и размера ответа. Счётчики живут
+в памяти процесса (`REGISTRY`) и обновляются под блокировкой.
+
+Воркеров обычно несколько, поэтому при заданном `METRICS_DIR` каждый
+процесс раз в `METRICS_FLUSH_INTERVAL` секунд записывает свой снимок
+в отдельный файл, а страница /staff/metrics/ складывает снимки всех
+процессов. Без `METRICS_DIR` страница показывает только свой процесс.
+Снимки, не обновлявшиеся `METRICS_MAX_AGE` секунд, удаляются.
+
+Страница доступна сотрудникам и сборщику метрик с заголовком
+`Authorization: Bearer <METRICS_TOKEN>`. Адрес клиента не проверяется:
+за обратным прокси на том же сервере все запросы пришли бы с 127.0.0.1.
+
+Кроме запросов в снимок попадают прерывания `QueryGuardMiddleware`,
+состояние пулов соединений SQLite и записи журналов, отброшенные
+при переполненной очереди.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from core import query_guard
+from core.backends.sqlite3.pool import pool_metrics
+from core.log import log_metrics
+
+# Имя метрики: (тип, описание, границы корзин гистограммы)
+METRICS = {
+    'blogicum_requests_total': (
+        'counter', 'HTTP-запросы по представлениям и кодам ответа.', None,
+    ),
+    'blogicum_request_duration_seconds': (
+        'histogram', 'Время ответа представления, секунды.',
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    ),
+    'blogicum_request_queries': (
+        'histogram', 'Число SQL-запросов на HTTP-запрос.',
+        (1, 2, 5, 10, 20, 50, 100),
+    ),
+    'blogicum_response_size_bytes': (
+        'histogram', 'Размер тела ответа, байты.',
+        (1024, 4096, 16384, 65536, 262144, 1048576),
+    ),
+    'blogicum_query_guard_aborts_total': (
+        'counter', 'SQL-запросы, прерванные по бюджету времени.', None,
+    ),
+    'blogicum_db_pool_events_total': (
+        'counter', 'События пулов соединений SQLite.', None,
+    ),
+    'blogicum_db_pool_connections': (
+        'gauge', 'Соединения пулов SQLite по состояниям.', None,
+    ),
+    'blogicum_log_dropped_total': (
+        'counter', 'Записи журналов, отброшенные при полной очереди.', None,
+    ),
+}
+
+
+def _key(labels):
+    return tuple(sorted(labels.items()))
+
+
+class Registry:
+    """Счётчики и гистограммы одного процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._histograms = {}
+
+    def inc(self, name, labels, value=1):
+        with self._lock:
+            self._counters[name, _key(labels)] += value
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        with self._lock:
+            histogram = self._histograms.setdefault(
+                (name, _key(labels)),
+                {'buckets': [0] * len(buckets), 'sum': 0.0, 'count': 0},
+            )
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram['buckets'][index] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def snapshot(self):
+        """
+        Снимок для записи в файл: {'counters': [...], 'gauges': [...],
+        'histograms': [...]}, метки — словари.
+        """
+        with self._lock:
+            counters = [
+                [name, dict(labels), value]
+                for (name, labels), value in self._counters.items()
+            ]
+            histograms = [
+                [name, dict(labels), dict(histogram, buckets=list(
+                    histogram['buckets']
+                ))]
+                for (name, labels), histogram in self._histograms.items()
+            ]
+        counters += [
+            ['blogicum_query_guard_aborts_total', {'view': view}, count]
+            for view, count in query_guard.ABORTS.items()
+        ]
+        gauges = []
+        for alias, pool in pool_metrics().items():
+            for state in ('in_use', 'idle'):
+                gauges.append(['blogicum_db_pool_connections',
+                               {'alias': alias, 'state': state}, pool[state]])
+            counters += [
+                ['blogicum_db_pool_events_total',
+                 {'alias': alias, 'event': event}, pool[event]]
+                for event in pool
+                if event not in ('in_use', 'idle', 'max_size')
+            ]
+        counters += [
+            ['blogicum_log_dropped_total', {'file': name}, dropped]
+            for name, dropped in log_metrics().items()
+        ]
+        return {'pid': os.getpid(), 'counters': counters, 'gauges': gauges,
+                'histograms': histograms}
+
+
+REGISTRY = Registry()
+
+
+class FileStore:
+    """
+    Снимки процессов в каталоге: файл на процесс.
+
+    С max_age файлы, которые не обновлялись дольше max_age секунд,
+    при чтении удаляются: так из суммы уходят завершившиеся воркеры.
+    Живой, но простаивающий воркер перезапишет свой файл при следующем
+    сбросе.
+    """
+
+    def __init__(self, directory, max_age=None):
+        self.directory = Path(directory)
+        self.max_age = max_age
+        self.path = self.directory / (
+            f'{os.getpid()}-{uuid.uuid4().hex[:8]}.json'
+        )
+
+    def write(self, snapshot):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_suffix('.tmp')
+        temporary.write_text(json.dumps(snapshot), encoding='utf-8')
+        os.replace(temporary, self.path)
+
+    def is_stale(self, path):
+        if not self.max_age or path == self.path:
+            return False
+        return path.stat().st_mtime < time.time() - self.max_age
+
+    def read_all(self):
+        snapshots = []
+        for path in self.directory.glob('*.json'):
+            try:
+                if self.is_stale(path):
+                    path.unlink()
+                    continue
+                snapshots.append(json.loads(path.read_text(encoding='utf-8')))
+            except (OSError, ValueError):
+                continue  # Файл удалён или ещё не дописан
+        return snapshots
+
+
+def _is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def merge(snapshots):
+    """
+    Складывает снимки процессов.
+
+    Счётчики и гистограммы суммируются по всем файлам, в том числе
+    завершившихся воркеров; мгновенные значения — только у живых.
+    """
+    counters, gauges, histograms = defaultdict(float), defaultdict(float), {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            counters[name, _key(labels)] += value
+        if _is_alive(snapshot['pid']):
+            for name, labels, value in snapshot['gauges']:
+                gauges[name, _key(labels)] += value
+        for name, labels, histogram in snapshot['histograms']:
+            total = histograms.setdefault((name, _key(labels)), {
+                'buckets': [0] * len(histogram['buckets']),
+                'sum': 0.0, 'count': 0,
+            })
+            for index, count in enumerate(histogram['buckets']):
+                total['buckets'][index] += count
+            total['sum'] += histogram['sum']
+            total['count'] += histogram['count']
+    return counters, gauges, histograms
+
+
+def _labels(labels, **extra):
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ''
+    escaped = (
+        str(value).replace('\\', r'\\').replace('"', r'\"')
+        .replace('\n', r'\n')
+        for _, value in items
+    )
+    return '{' + ','.join(
+        f'{name}="{value}"' for (name, _), value in zip(items, escaped)
+    ) + '}'
+
+
+def _number(value):
+    return repr(int(value)) if float(value).is_integer() else repr(value)
+
+
+def render(snapshots):
+    """Текстовый формат Prometheus для сложенных снимков."""
+    counters, gauges, histograms = merge(snapshots)
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        if kind == 'histogram':
+            for (metric, labels), histogram in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                for bound, count in zip(buckets, histogram['buckets']):
+                    lines.append(f'{name}_bucket'
+                                 f'{_labels(labels, le=bound)} {count}')
+                lines.append(f'{name}_bucket{_labels(labels, le="+Inf")} '
+                             f'{histogram["count"]}')
+                lines.append(f'{name}_sum{_labels(labels)} '
+                             f'{_number(histogram["sum"])}')
+                lines.append(f'{name}_count{_labels(labels)} '
+                             f'{histogram["count"]}')
+            continue
+        values = counters if kind == 'counter' else gauges
+        for (metric, labels), value in sorted(values.items()):
+            if metric == name:
+                lines.append(f'{name}{_labels(labels)} {_number(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+class Exporter:
+    """
+    Периодически сбрасывает снимок процесса в общий каталог.
+
+    snapshot — функция, возвращающая снимок; по умолчанию метрики
+    запросов из `REGISTRY`. max_age — см. `FileStore`.
+    """
+
+    def __init__(self, directory, interval, snapshot=None, max_age=None):
+        self.store = FileStore(directory, max_age) if directory else None
+        self.interval = interval
+        self.snapshot = snapshot or REGISTRY.snapshot
+        self._flushed = 0.0
+
+    def flush(self, force=False):
+        if self.store is None:
+            return
+        now = time.monotonic()
+        if force or now - self._flushed >= self.interval:
+            self._flushed = now
+            self.store.write(self.snapshot())
+
+    def collect(self):
+        """Снимки всех процессов (или только текущего без каталога)."""
+        if self.store is None:
+            return [self.snapshot()]
+        self.flush(force=True)
+        return self.store.read_all()
+
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def get_exporter():
+    global _exporter
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = Exporter(settings.METRICS_DIR,
+                                 settings.METRICS_FLUSH_INTERVAL,
+                                 max_age=settings.METRICS_MAX_AGE)
+        return _exporter
+
+
+class QueryCount:
+    """Обёртка выполнения запросов, считающая их."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """Записывает метрики каждого запроса в реестр процесса."""
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryCount()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(queries)
+                )
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+        match = request.resolver_match
+        view = {'view': match.view_name if match else '-'}
+        REGISTRY.inc('blogicum_requests_total', dict(
+            view, method=request.method, status=response.status_code,
+        ))
+        REGISTRY.observe('blogicum_request_duration_seconds', view, duration)
+        REGISTRY.observe('blogicum_request_queries', view, queries.count)
+        if not response.streaming:
+            REGISTRY.observe('blogicum_response_size_bytes', view,
+                             len(response.content))
+        get_exporter().flush()
+        return response
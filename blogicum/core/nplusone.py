@@ -0,0 +1,186 @@
+"""
+Поиск запросов N+1 при разработке.
+
+`NPlusOneMiddleware` приводит каждый SQL-запрос к отпечатку — тексту
+без параметров и литералов — и ищет отпечатки, которые за один
+HTTP-запрос выполнились не меньше `NPLUSONE_THRESHOLD` раз с разными
+параметрами. Обычно это ленивая загрузка связанного объекта в цикле,
+например `{{ comment.author.username }}` без select_related.
+
+Для каждого запроса запоминается, откуда он вызван: строка шаблона
+(узел, который отрисовывался) и ближайший кадр кода проекта. Сводка
+по HTTP-запросу пишется в журнал `core.nplusone` одним сообщением
+и сохраняется в `request.nplusone` для тестов.
+"""
+import logging
+import os
+import re
+import sys
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Node
+
+logger = logging.getLogger(__name__)
+
+STRING = re.compile(r"'(?:[^']|'')*'")
+NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+VALUES_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+SPACES = re.compile(r'\s+')
+SHOWN_ORIGINS = 3  # Сколько мест вызова показывать для группы
+CORE_DIR = str(Path(__file__).parent)
+BACKEND_UTILS = os.path.join('django', 'db', 'backends', 'utils.py')
+WRAPPER_ARGUMENTS = ('execute', 'sql', 'params', 'many', 'context')
+
+
+def fingerprint(sql):
+    """Текст запроса без параметров, литералов и длины списков IN."""
+    sql = STRING.sub('?', sql.replace('%s', '?'))
+    sql = NUMBER.sub('?', sql)
+    sql = VALUES_LIST.sub('(?)', sql)
+    return SPACES.sub(' ', sql).strip()
+
+
+def relative_path(filename):
+    """Путь относительно BASE_DIR для файлов проекта."""
+    try:
+        return str(Path(filename).relative_to(settings.BASE_DIR))
+    except ValueError:
+        return filename
+
+
+def is_project_code(filename):
+    """Код проекта, кроме инструментов из core, оборачивающих запросы."""
+    return (
+        filename.startswith(str(settings.BASE_DIR))
+        and not filename.startswith(CORE_DIR)
+        and 'site-packages' not in filename
+    )
+
+
+def is_execute_wrapper(code):
+    """Метод `__call__` обёртки выполнения запросов Django."""
+    return (code.co_name == '__call__'
+            and code.co_varnames[1:code.co_argcount] == WRAPPER_ARGUMENTS)
+
+
+def query_caller(frame):
+    """
+    Первый кадр над выполнением SQL в `django/db/backends/utils.py`.
+
+    Всё, что ниже, — цепочка обёрток выполнения запросов, где бы они
+    ни были объявлены. Если кадра выполнения в стеке нет, возвращается
+    исходный кадр.
+    """
+    caller = frame
+    while caller is not None \
+            and not caller.f_code.co_filename.endswith(BACKEND_UTILS):
+        caller = caller.f_back
+    if caller is None:
+        return frame
+    while caller is not None \
+            and caller.f_code.co_filename.endswith(BACKEND_UTILS):
+        caller = caller.f_back
+    return caller
+
+
+def find_origin(frame):
+    """
+    Возвращает (строка шаблона, кадр кода проекта) для запроса.
+
+    Идёт по стеку от места выполнения запроса наружу, пропуская обёртки
+    выполнения запросов, и берёт первый отрисовываемый узел шаблона
+    и первый кадр из кода проекта.
+    """
+    template = code = None
+    frame = query_caller(frame)
+    while frame is not None and (template is None or code is None):
+        node = frame.f_locals.get('self')
+        if template is None and frame.f_code.co_name == 'render_annotated' \
+                and isinstance(node, Node) and node.origin is not None:
+            template = (f'{relative_path(node.origin.name)}:'
+                        f'{node.token.lineno}')
+        filename = frame.f_code.co_filename
+        if code is None and is_project_code(filename) \
+                and not is_execute_wrapper(frame.f_code):
+            code = (f'{relative_path(filename)}:{frame.f_lineno} '
+                    f'в {frame.f_code.co_name}')
+        frame = frame.f_back
+    return template, code
+
+
+class QueryRecorder:
+    """Обёртка выполнения запросов, группирующая их по отпечаткам."""
+
+    def __init__(self):
+        self.total = 0
+        self.groups = defaultdict(lambda: {
+            'count': 0, 'params': set(), 'origins': Counter(),
+        })
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total += 1
+        group = self.groups[fingerprint(sql)]
+        group['count'] += 1
+        group['params'].add(repr(params))
+        group['origins'][find_origin(sys._getframe(1))] += 1
+        return execute(sql, params, many, context)
+
+    def suspects(self, threshold):
+        """Группы, похожие на N+1, от самых частых."""
+        found = [
+            dict(group, sql=sql)
+            for sql, group in self.groups.items()
+            if group['count'] >= threshold and len(group['params']) > 1
+        ]
+        return sorted(found, key=lambda group: -group['count'])
+
+
+def format_report(title, total, suspects):
+    """Сводка по одному HTTP-запросу."""
+    lines = [
+        f'N+1 в {title}: SQL-запросов {total}, '
+        f'подозрительных групп {len(suspects)}'
+    ]
+    for group in suspects:
+        lines.append(f'  {group["count"]}× {group["sql"]}')
+        for (template, code), count in group['origins'].most_common(
+                SHOWN_ORIGINS):
+            lines.append(f'      {count}× шаблон {template or "—"}, '
+                         f'код {code or "—"}')
+    return '\n'.join(lines)
+
+
+class NPlusOneMiddleware:
+    """
+    Ищет запросы N+1 при разработке и на стенде.
+
+    Включается настройкой `NPLUSONE_ENABLED` (по умолчанию равна DEBUG).
+    """
+
+    def __init__(self, get_response):
+        if not settings.NPLUSONE_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(recorder)
+                )
+            response = self.get_response(request)
+        request.nplusone = recorder.suspects(settings.NPLUSONE_THRESHOLD)
+        if request.nplusone:
+            match = request.resolver_match
+            title = (f'{match.view_name if match else "-"} '
+                     f'({request.method} {request.get_full_path()})')
+            logger.warning(
+                format_report(title, recorder.total, request.nplusone)
+            )
+        return response
@@ -0,0 +1,382 @@
+"""
+Панели django-debug-toolbar с внутренностями блога.
+
+Подключаются в `DEBUG_TOOLBAR_PANELS` после стандартных:
+    - `TemplateQueriesPanel` — SQL-запросы по шаблонам, в которых они
+      выполнены: видно, что `includes/post_card.html` или
+      `includes/comments.html` начал ходить в базу на каждый пост;
+    - `CacheLayersPanel` — попадания и промахи по слоям кэша: по каждому
+      кэшу из `CACHES` и по кэшу загрузчика шаблонов;
+    - `PaginatorPanel` — цена подсчёта объектов пагинаторами;
+    - `DuplicateLoadsPanel` — строки, загруженные из базы в объекты
+      моделей больше одного раза за запрос.
+
+Перехват пагинатора, загрузчика шаблонов и создания объектов моделей
+ставится один раз при запуске и только при DEBUG (`install_hooks`).
+Перехватчики пишут в панель текущего запроса из контекстной переменной,
+а без неё сразу передают управление исходному коду.
+"""
+import sys
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from debug_toolbar.panels import Panel
+from django.conf import settings
+from django.core.cache import caches
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models.signals import post_init
+from django.template import engines
+from django.template.loaders.cached import Loader as CachedLoader
+from django.utils.functional import cached_property
+
+from core.nplusone import find_origin
+
+OUTSIDE_TEMPLATES = '(вне шаблонов)'
+TEMPLATE_LOADER_LAYER = 'загрузчик шаблонов'
+TOP_DUPLICATES = 5  # Сколько самых частых повторов показывать для модели
+
+
+class ActivePanel(Panel):
+    """Панель, доступная перехватчикам на время обработки запроса."""
+
+    active = None  # ContextVar в подклассе
+
+    @classmethod
+    def ready(cls):
+        if settings.DEBUG:
+            install_hooks()
+
+    def process_request(self, request):
+        token = self.active.set(self)
+        try:
+            return super().process_request(request)
+        finally:
+            self.active.reset(token)
+
+
+class SqlLog:
+    """Обёртка выполнения запросов, запоминающая SQL и время."""
+
+    def __init__(self):
+        self.queries = []  # (SQL, секунды)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+
+    @contextmanager
+    def capture(self):
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(self))
+            yield self
+
+
+class TemplateQueryRecorder:
+    """Обёртка выполнения запросов, группирующая их по шаблонам."""
+
+    def __init__(self):
+        self.total = 0
+        self.templates = defaultdict(lambda: {
+            'count': 0, 'time': 0.0, 'lines': Counter(),
+        })
+
+    def __call__(self, execute, sql, params, many, context):
+        origin, _ = find_origin(sys._getframe(1))
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            name, _, line = (origin or OUTSIDE_TEMPLATES).rpartition(':')
+            entry = self.templates[name or OUTSIDE_TEMPLATES]
+            entry['count'] += 1
+            entry['time'] += time.perf_counter() - started
+            if line.isdigit():
+                entry['lines'][int(line)] += 1
+            self.total += 1
+
+
+class TemplateQueriesPanel(Panel):
+    """SQL-запросы по шаблонам, при отрисовке которых они выполнены."""
+
+    title = 'SQL-запросы по шаблонам'
+    nav_title = 'SQL по шаблонам'
+    template = 'core/panels/template_queries.html'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.recorder = TemplateQueryRecorder()
+
+    @property
+    def nav_subtitle(self):
+        stats = self.get_stats()
+        if not stats:
+            return ''
+        return (f'{stats["in_templates"]} из {stats["total"]} '
+                f'запросов в шаблонах')
+
+    def process_request(self, request):
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(self.recorder)
+                )
+            return super().process_request(request)
+
+    def generate_stats(self, request, response):
+        rows = [
+            {
+                'template': name,
+                'count': entry['count'],
+                'time_ms': round(1000 * entry['time'], 2),
+                'lines': sorted(entry['lines'].items()),
+            }
+            for name, entry in self.recorder.templates.items()
+        ]
+        rows.sort(key=lambda row: -row['count'])
+        outside = self.recorder.templates.get(OUTSIDE_TEMPLATES)
+        self.record_stats({
+            'rows': rows,
+            'total': self.recorder.total,
+            'in_templates': (self.recorder.total
+                             - (outside['count'] if outside else 0)),
+        })
+
+
+class CacheLayersPanel(ActivePanel):
+    """Попадания и промахи по слоям кэша."""
+
+    active = ContextVar('cache_layers_panel', default=None)
+    title = 'Кэш по слоям'
+    template = 'core/panels/cache_layers.html'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.layers = {f'cache:{alias}': self.new_layer()
+                       for alias in settings.CACHES}
+
+    @property
+    def nav_subtitle(self):
+        stats = self.get_stats()
+        if not stats:
+            return ''
+        return f'попаданий {stats["hits"]}, промахов {stats["misses"]}'
+
+    @staticmethod
+    def new_layer():
+        return {'hits': 0, 'misses': 0, 'time': 0.0}
+
+    def record(self, layer, hits, misses, elapsed):
+        entry = self.layers.setdefault(layer, self.new_layer())
+        entry['hits'] += hits
+        entry['misses'] += misses
+        entry['time'] += elapsed
+
+    @contextmanager
+    def instrument_cache(self, alias):
+        """
+        Подменяет чтения кэша `alias` этого потока.
+
+        Прежние атрибуты экземпляра (например, обёртки стандартной панели
+        кэша) восстанавливаются при выходе.
+        """
+        cache = caches[alias]
+        layer = f'cache:{alias}'
+        saved = {name: vars(cache).get(name) for name in ('get', 'get_many')}
+        original_get, original_get_many = cache.get, cache.get_many
+        nested = []  # Непустой, пока get вызывается изнутри get_many
+
+        def get(key, default=None, version=None):
+            started = time.perf_counter()
+            value = original_get(key, default, version)
+            if not nested:
+                hit = value is not default
+                self.record(layer, hit, not hit,
+                            time.perf_counter() - started)
+            return value
+
+        def get_many(keys, version=None):
+            keys = list(keys)
+            started = time.perf_counter()
+            nested.append(True)
+            try:
+                values = original_get_many(keys, version=version)
+            finally:
+                nested.pop()
+            self.record(layer, len(values), len(keys) - len(values),
+                        time.perf_counter() - started)
+            return values
+
+        cache.get, cache.get_many = get, get_many
+        try:
+            yield
+        finally:
+            for name, method in saved.items():
+                if method is None:
+                    delattr(cache, name)
+                else:
+                    setattr(cache, name, method)
+
+    def process_request(self, request):
+        with ExitStack() as stack:
+            for alias in settings.CACHES:
+                stack.enter_context(self.instrument_cache(alias))
+            return super().process_request(request)
+
+    def generate_stats(self, request, response):
+        rows = [
+            dict(entry, layer=layer, time_ms=round(1000 * entry['time'], 3))
+            for layer, entry in self.layers.items()
+        ]
+        self.record_stats({
+            'rows': rows,
+            'hits': sum(row['hits'] for row in rows),
+            'misses': sum(row['misses'] for row in rows),
+            'template_cache': template_cache_enabled(),
+        })
+
+
+class PaginatorPanel(ActivePanel):
+    """Число объектов, посчитанное пагинаторами, и его цена."""
+
+    active = ContextVar('paginator_panel', default=None)
+    title = 'Подсчёт страниц'
+    nav_title = 'Пагинатор'
+    template = 'core/panels/paginator.html'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.counts = []
+
+    @property
+    def nav_subtitle(self):
+        stats = self.get_stats()
+        if not stats or not stats['counts']:
+            return ''
+        return f'COUNT {stats["time_ms"]} мс'
+
+    def measure(self, paginator, count):
+        """Вызывает исходный `Paginator.count` и запоминает его цену."""
+        started = time.perf_counter()
+        with SqlLog().capture() as log:
+            result = count(paginator)
+        model = getattr(paginator.object_list, 'model', None)
+        self.counts.append({
+            'source': (model._meta.label if model is not None
+                       else type(paginator.object_list).__name__),
+            'count': result,
+            'per_page': paginator.per_page,
+            'time_ms': round(1000 * (time.perf_counter() - started), 3),
+            'queries': [
+                {'sql': sql, 'time_ms': round(1000 * elapsed, 3)}
+                for sql, elapsed in log.queries
+            ],
+        })
+        return result
+
+    def generate_stats(self, request, response):
+        self.record_stats({
+            'counts': self.counts,
+            'time_ms': round(sum(entry['time_ms']
+                                 for entry in self.counts), 3),
+        })
+
+
+class DuplicateLoadsPanel(ActivePanel):
+    """Одни и те же строки, загруженные в объекты моделей повторно."""
+
+    active = ContextVar('duplicate_loads_panel', default=None)
+    title = 'Повторные загрузки объектов'
+    nav_title = 'Повторные загрузки'
+    template = 'core/panels/duplicate_loads.html'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.loads = defaultdict(Counter)  # Модель -> pk -> число загрузок
+
+    @property
+    def nav_subtitle(self):
+        stats = self.get_stats()
+        if not stats:
+            return ''
+        return f'повторов {stats["duplicates"]}'
+
+    def record(self, model, pk):
+        self.loads[model._meta.label][pk] += 1
+
+    def generate_stats(self, request, response):
+        rows = []
+        for model, counter in self.loads.items():
+            loads = sum(counter.values())
+            rows.append({
+                'model': model,
+                'loads': loads,
+                'distinct': len(counter),
+                'duplicates': loads - len(counter),
+                'top': [(pk, count) for pk, count
+                        in counter.most_common(TOP_DUPLICATES) if count > 1],
+            })
+        rows.sort(key=lambda row: (-row['duplicates'], -row['loads']))
+        self.record_stats({
+            'rows': rows,
+            'duplicates': sum(row['duplicates'] for row in rows),
+        })
+
+
+def template_cache_enabled():
+    """Кэширует ли загруженные шаблоны хоть один движок."""
+    return any(
+        isinstance(loader, CachedLoader)
+        for engine in engines.all() if hasattr(engine, 'engine')
+        for loader in engine.engine.template_loaders
+    )
+
+
+def count_objects(paginator, count=Paginator.__dict__['count'].real_func):
+    panel = PaginatorPanel.active.get()
+    if panel is None:
+        return count(paginator)
+    return panel.measure(paginator, count)
+
+
+def get_template(loader, template_name, skip=None,
+                 original=CachedLoader.get_template):
+    panel = CacheLayersPanel.active.get()
+    if panel is None:
+        return original(loader, template_name, skip)
+    hit = loader.cache_key(template_name, skip) in loader.get_template_cache
+    started = time.perf_counter()
+    try:
+        return original(loader, template_name, skip)
+    finally:
+        panel.record(TEMPLATE_LOADER_LAYER, hit, not hit,
+                     time.perf_counter() - started)
+
+
+def record_load(sender, instance, **kwargs):
+    panel = DuplicateLoadsPanel.active.get()
+    if panel is not None and instance.pk is not None:
+        panel.record(sender, instance.pk)
+
+
+_installed = False
+
+
+def install_hooks():
+    """Ставит перехватчики пагинатора, загрузчика и моделей один раз."""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    count = cached_property(count_objects)
+    count.__set_name__(Paginator, 'count')
+    Paginator.count = count
+    CachedLoader.get_template = get_template
+    post_init.connect(record_load, weak=False,
+                      dispatch_uid='core.panels.record_load')
@@ -0,0 +1,162 @@
+"""
+Профилирование отдельных запросов через cProfile.
+
+`ProfilingMiddleware` обрабатывает запрос (представление вместе
+с отрисовкой шаблона) под cProfile, если:
+    - в заголовке `PROFILE_HEADER` передан подписанный токен — его
+      выдаёт команда `profile_token`, он действует
+      `PROFILE_TOKEN_MAX_AGE` секунд;
+    - сотрудник добавил к адресу параметр `?_profile=1`;
+    - запрос попал в выборку `PROFILE_SAMPLE_RATE`.
+
+Профили сохраняются в `PROFILE_DIR` файлами `.prof` (их можно открыть
+в snakeviz или pstats) рядом с `.json` с данными запроса. Хранятся
+последние `PROFILE_RING_SIZE` профилей, более старые удаляются.
+Список профилей и самые дорогие функции показывает страница
+/staff/profiles/.
+"""
+import cProfile
+import io
+import json
+import pstats
+import random
+import re
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+
+from core.access_log import user_class
+
+SALT = 'core.profiling'
+QUERY_PARAMETER = '_profile'
+SORT_KEYS = ('cumulative', 'tottime', 'calls')
+NAME = re.compile(r'^\d{8}-\d{6}-\d{6}-[0-9a-f]{4}$')
+
+
+def make_token():
+    """Подписанный токен для заголовка профилирования."""
+    return signing.TimestampSigner(salt=SALT).sign('profile')
+
+
+def check_token(token):
+    try:
+        signing.TimestampSigner(salt=SALT).unsign(
+            token, max_age=settings.PROFILE_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def get_trigger(request):
+    """Причина профилировать запрос: header, staff, sample или None."""
+    token = request.headers.get(settings.PROFILE_HEADER)
+    if token and check_token(token):
+        return 'header'
+    user = getattr(request, 'user', None)
+    if QUERY_PARAMETER in request.GET and user is not None \
+            and user.is_staff:
+        return 'staff'
+    if random.random() < settings.PROFILE_SAMPLE_RATE:
+        return 'sample'
+    return None
+
+
+class ProfileRing:
+    """Кольцо из последних size профилей в каталоге."""
+
+    def __init__(self, directory, size):
+        self.directory = Path(directory)
+        self.size = size
+
+    def names(self):
+        """Имена профилей от новых к старым."""
+        if not self.directory.exists():
+            return []
+        return sorted(
+            (path.stem for path in self.directory.glob('*.prof')),
+            reverse=True,
+        )
+
+    def save(self, profiler, meta):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        now = time.time()
+        # Имена упорядочены по времени до микросекунды
+        name = (time.strftime('%Y%m%d-%H%M%S-', time.localtime(now))
+                + f'{int(now * 1e6) % 1000000:06d}-{uuid.uuid4().hex[:4]}')
+        profiler.dump_stats(self.directory / f'{name}.prof')
+        (self.directory / f'{name}.json').write_text(
+            json.dumps(dict(meta, name=name), ensure_ascii=False),
+            encoding='utf-8',
+        )
+        for old in self.names()[self.size:]:
+            for suffix in ('.prof', '.json'):
+                (self.directory / f'{old}{suffix}').unlink(missing_ok=True)
+        return name
+
+    def path(self, name):
+        """Путь к файлу профиля или None для чужого имени."""
+        path = self.directory / f'{name}.prof'
+        if NAME.match(name) and path.exists():
+            return path
+        return None
+
+    def meta(self, name):
+        try:
+            return json.loads(
+                (self.directory / f'{name}.json').read_text(encoding='utf-8')
+            )
+        except (OSError, ValueError):
+            return {'name': name}
+
+    def captures(self):
+        return [self.meta(name) for name in self.names()]
+
+    def top(self, name, sort='cumulative', limit=40):
+        """Текстовая таблица pstats с limit самыми дорогими функциями."""
+        output = io.StringIO()
+        stats = pstats.Stats(str(self.path(name)), stream=output)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+
+def get_ring():
+    return ProfileRing(settings.PROFILE_DIR, settings.PROFILE_RING_SIZE)
+
+
+class ProfilingMiddleware:
+    """
+    Профилирует выбранные запросы.
+
+    Ставится последним: профиль охватывает разбор адреса, process_view
+    остальных слоёв, представление, отрисовку шаблона и обычную обработку
+    исключений Django, в том числе их process_exception.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trigger = get_trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        # Исключения представления Django превращает в ответ внутри
+        # get_response, поэтому ответ есть всегда
+        response = profiler.runcall(self.get_response, request)
+        match = request.resolver_match
+        get_ring().save(profiler, {
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'method': request.method,
+            'path': request.get_full_path(),
+            'view': match.view_name if match else '-',
+            'user_class': user_class(getattr(request, 'user', None)),
+            'trigger': trigger,
+            'status': response.status_code,
+            'duration': round(1000 * (time.perf_counter() - started), 2),
+        })
+        return response
@@ -0,0 +1,112 @@
+"""
+Бюджеты количества SQL-запросов для представлений.
+
+Класс представления объявляет `query_budget` — сколько запросов к базе
+ему разрешено сделать за один HTTP-запрос, включая загрузку сессии
+и пользователя. Бюджет не зависит от размера страницы: лента из десяти
+постов и лента из ста должны укладываться в одно и то же число, иначе
+в шаблоне появился запрос на каждую карточку (N+1).
+
+Бюджет проверяется двумя способами:
+    - `assert_query_budget` в тестах — запрос тестовым клиентом,
+      AssertionError со списком запросов при превышении;
+    - `QueryBudgetMiddleware` при разработке — исключение
+      `QueryBudgetExceeded` и страница с отладочной информацией.
+"""
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.urls import resolve
+
+
+class QueryBudgetExceeded(Exception):
+    """Представление выполнило больше запросов, чем разрешает бюджет."""
+
+
+def get_query_budget(view_func):
+    """Возвращает бюджет запросов представления или None."""
+    view_class = getattr(view_func, 'view_class', None)
+    return getattr(view_class or view_func, 'query_budget', None)
+
+
+class QueryCounter:
+    """Обёртка выполнения запросов, запоминающая их SQL."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def describe(self):
+        return '\n'.join(
+            f'{number}. {sql}'
+            for number, sql in enumerate(self.queries, start=1)
+        )
+
+
+def count_queries(counter):
+    """Подключает счётчик ко всем базам из DATABASES."""
+    stack = ExitStack()
+    for alias in connections:
+        stack.enter_context(connections[alias].execute_wrapper(counter))
+    return stack
+
+
+def assert_query_budget(client, path, method='get', data=None, budget=None):
+    """
+    Выполняет запрос тестовым клиентом и проверяет бюджет запросов.
+
+    По умолчанию бюджет берётся у представления, обслуживающего path.
+    Возвращает ответ, чтобы тест мог проверить и его.
+    """
+    if budget is None:
+        budget = get_query_budget(resolve(path.split('?')[0]).func)
+    assert budget is not None, f'У представления {path} нет query_budget.'
+    counter = QueryCounter()
+    with count_queries(counter):
+        response = getattr(client, method)(path, data or {})
+    assert len(counter) <= budget, (
+        f'{path}: выполнено {len(counter)} SQL-запросов при бюджете '
+        f'{budget}:\n{counter.describe()}'
+    )
+    return response
+
+
+class QueryBudgetMiddleware:
+    """
+    Проверяет бюджеты запросов при разработке.
+
+    Включается настройкой `QUERY_BUDGET_ENFORCE` (по умолчанию равна
+    DEBUG). Ставится раньше сессий, аутентификации и остальных слоёв,
+    обращающихся к базе, чтобы учитывать и их запросы.
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_BUDGET_ENFORCE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        request.query_budget = None
+        with count_queries(counter):
+            response = self.get_response(request)
+        budget = request.query_budget
+        if budget is not None and len(counter) > budget:
+            match = request.resolver_match
+            raise QueryBudgetExceeded(
+                f'{match.view_name if match else request.path}: '
+                f'{len(counter)} SQL-запросов при бюджете {budget}:\n'
+                f'{counter.describe()}'
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = get_query_budget(view_func)
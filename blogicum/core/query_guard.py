@@ -0,0 +1,154 @@
+"""
+Ограничение времени SQL-запросов в рамках одного HTTP-запроса.
+
+Тяжёлый поиск в админке или запрос далёкой страницы `?page=` способен
+надолго занять SQLite и задержать остальных воркеров. `QueryGuardMiddleware`
+выдаёт каждому HTTP-запросу бюджет времени на SQL и через progress handler
+модуля `sqlite3` прерывает запрос к базе, который вышел за бюджет.
+Посетитель получает страницу 503, администратор — сообщение об ошибке.
+
+Бюджет выбирается в таком порядке:
+    - атрибут `query_time_budget` у класса представления;
+    - `QUERY_TIME_BUDGETS[<имя маршрута>]`, например 'blog:index';
+    - `QUERY_TIME_BUDGETS[<пространство имён>]`, например 'admin';
+    - `QUERY_TIME_BUDGET` — значение по умолчанию, 0 выключает защиту.
+"""
+import sqlite3
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import OperationalError, connections
+from django.shortcuts import redirect
+
+from pages.views import service_unavailable
+
+# Через сколько инструкций виртуальной машины SQLite проверять бюджет
+PROGRESS_INSTRUCTIONS = 1000
+
+# Количество прерванных запросов по имени маршрута
+ABORTS = Counter()
+
+
+def get_time_budget(resolver_match, view_func=None):
+    """Возвращает бюджет времени SQL для представления в секундах."""
+    view_class = getattr(view_func, 'view_class', None)
+    budget = getattr(view_class, 'query_time_budget', None)
+    if budget is not None:
+        return budget
+    budgets = settings.QUERY_TIME_BUDGETS
+    if resolver_match is not None:
+        if resolver_match.view_name in budgets:
+            return budgets[resolver_match.view_name]
+        if resolver_match.namespace in budgets:
+            return budgets[resolver_match.namespace]
+    return settings.QUERY_TIME_BUDGET
+
+
+class QueryGuard:
+    """
+    Учёт времени SQL одного HTTP-запроса.
+
+    Объект служит одновременно обёрткой выполнения запросов Django
+    (считает потраченное время) и progress handler'ом SQLite (прерывает
+    запрос, когда бюджет исчерпан).
+    """
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.spent = 0.0
+        self.started = None
+        self.tripped = False
+        self._raw_connections = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        connection = context['connection']
+        if connection.vendor == 'sqlite' and self.budget:
+            raw = connection.connection
+            if raw not in self._raw_connections:
+                raw.set_progress_handler(
+                    self.check_progress, PROGRESS_INSTRUCTIONS
+                )
+                self._raw_connections.add(raw)
+        # Признак прерывания относится только к последнему SQL-запросу
+        self.tripped = False
+        self.started = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.spent += time.monotonic() - self.started
+            self.started = None
+
+    def check_progress(self):
+        """Возвращает 1, чтобы SQLite прервал запрос, вышедший за бюджет."""
+        if self.started is None or not self.budget:
+            return 0
+        if self.spent + time.monotonic() - self.started > self.budget:
+            self.tripped = True
+            return 1
+        return 0
+
+    def disarm(self):
+        """Выключает бюджет до конца HTTP-запроса, снимает progress handler."""
+        self.budget = 0
+        self.release()
+
+    def release(self):
+        """Снимает progress handler с соединений, чтобы они шли дальше."""
+        for raw in self._raw_connections:
+            try:
+                raw.set_progress_handler(None, 0)
+            except sqlite3.ProgrammingError:
+                pass  # Соединение уже закрыто
+        self._raw_connections.clear()
+
+
+class QueryGuardMiddleware:
+    """Прерывает SQL-запросы, превысившие бюджет времени HTTP-запроса."""
+
+    def __init__(self, get_response):
+        if not settings.QUERY_TIME_BUDGET and not settings.QUERY_TIME_BUDGETS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        guard = QueryGuard(get_time_budget(None))
+        request.query_guard = guard
+        with ExitStack() as stack:
+            for alias in settings.QUERY_GUARD_DATABASES:
+                stack.enter_context(connections[alias].execute_wrapper(guard))
+            try:
+                return self.get_response(request)
+            finally:
+                guard.release()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_guard.budget = get_time_budget(
+            request.resolver_match, view_func
+        )
+
+    def process_exception(self, request, exception):
+        guard = getattr(request, 'query_guard', None)
+        if not isinstance(exception, OperationalError) or not guard \
+                or not guard.tripped:
+            return None
+        match = request.resolver_match
+        ABORTS[match.view_name if match else request.path_info] += 1
+        budget = guard.budget
+        # Ответ-заглушке тоже нужна база (сессия, пользователь в шапке),
+        # поэтому исчерпанный бюджет больше не должен её прерывать
+        guard.disarm()
+        if match and match.namespace == 'admin' \
+                and match.url_name != 'index':
+            messages.error(
+                request,
+                f'Запрос к базе данных выполнялся дольше {budget} с '
+                'и был прерван. Уточните условия поиска или фильтры.',
+            )
+            return redirect('admin:index')
+        response = service_unavailable(request)
+        response['Retry-After'] = '5'
+        return response
@@ -0,0 +1,211 @@
+"""
+Сводная статистика SQL-запросов в духе pg_stat_statements.
+
+`QueryStatsMiddleware` приводит каждый SQL-запрос к отпечатку (см.
+`core.nplusone.fingerprint`) и копит по нему число вызовов, суммарное,
+минимальное и максимальное время, число строк и представления, из
+которых запрос выполнялся. Строки SELECT считаются по мере чтения
+курсора, для изменений берётся rowcount.
+
+Статистика живёт в памяти процесса. С `QUERY_STATS_DIR` процессы раз
+в `QUERY_STATS_FLUSH_INTERVAL` секунд сбрасывают снимки в каталог,
+а отчёт складывает их — так статистика переживает перезапуск воркеров.
+Отчёт для сотрудников: /staff/queries/, в JSON — ?format=json.
+"""
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from core.metrics import Exporter
+from core.nplusone import fingerprint
+
+SORT_KEYS = ('total', 'mean', 'calls', 'rows')
+TOP_VIEWS = 3  # Сколько представлений показывать для запроса
+
+
+class RowCounter:
+    """Курсор базы, считающий прочитанные строки."""
+
+    def __init__(self, cursor, entry):
+        self._cursor = cursor
+        self.entry = entry
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        for row in self._cursor:
+            STATS.add_rows(self.entry, 1)
+            yield row
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            STATS.add_rows(self.entry, 1)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        STATS.add_rows(self.entry, len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        STATS.add_rows(self.entry, len(rows))
+        return rows
+
+
+class StatementStats:
+    """Счётчики по отпечаткам запросов одного процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._statements = {}
+
+    def record(self, sql, elapsed, view):
+        """Учитывает вызов и возвращает запись отпечатка."""
+        key = fingerprint(sql)
+        with self._lock:
+            entry = self._statements.get(key)
+            if entry is None:
+                entry = self._statements[key] = {
+                    'calls': 0, 'total': 0.0, 'min': elapsed,
+                    'max': elapsed, 'rows': 0, 'views': Counter(),
+                }
+            entry['calls'] += 1
+            entry['total'] += elapsed
+            entry['min'] = min(entry['min'], elapsed)
+            entry['max'] = max(entry['max'], elapsed)
+            entry['views'][view] += 1
+        return entry
+
+    def add_rows(self, entry, count):
+        with self._lock:
+            entry['rows'] += count
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+
+    def snapshot(self):
+        with self._lock:
+            statements = {
+                sql: dict(entry, views=dict(entry['views']))
+                for sql, entry in self._statements.items()
+            }
+        return {'pid': os.getpid(), 'statements': statements}
+
+
+STATS = StatementStats()
+
+
+def merge(snapshots):
+    """Складывает снимки процессов по отпечаткам."""
+    merged = {}
+    for snapshot in snapshots:
+        for sql, entry in snapshot['statements'].items():
+            total = merged.setdefault(sql, {
+                'calls': 0, 'total': 0.0, 'min': entry['min'],
+                'max': entry['max'], 'rows': 0, 'views': Counter(),
+            })
+            total['calls'] += entry['calls']
+            total['total'] += entry['total']
+            total['min'] = min(total['min'], entry['min'])
+            total['max'] = max(total['max'], entry['max'])
+            total['rows'] += entry['rows']
+            total['views'].update(entry['views'])
+    return merged
+
+
+def report(snapshots, sort='total', limit=None):
+    """
+    Строки отчёта от самых дорогих: отпечаток, вызовы, время в мс,
+    строки и самые частые представления.
+    """
+    rows = [
+        {
+            'sql': sql,
+            'calls': entry['calls'],
+            'total_ms': round(1000 * entry['total'], 3),
+            'mean_ms': round(1000 * entry['total'] / entry['calls'], 3),
+            'min_ms': round(1000 * entry['min'], 3),
+            'max_ms': round(1000 * entry['max'], 3),
+            'rows': entry['rows'],
+            'views': entry['views'].most_common(TOP_VIEWS),
+        }
+        for sql, entry in merge(snapshots).items()
+    ]
+    key = {'total': 'total_ms', 'mean': 'mean_ms'}.get(sort, sort)
+    rows.sort(key=lambda row: row[key], reverse=True)
+    return rows[:limit]
+
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def get_exporter():
+    global _exporter
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = Exporter(settings.QUERY_STATS_DIR,
+                                 settings.QUERY_STATS_FLUSH_INTERVAL,
+                                 STATS.snapshot)
+        return _exporter
+
+
+class QueryStatsCollector:
+    """Обёртка выполнения запросов одного HTTP-запроса."""
+
+    def __init__(self, request):
+        self.request = request
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            match = self.request.resolver_match
+            entry = STATS.record(
+                sql, time.perf_counter() - started,
+                match.view_name if match else '-',
+            )
+            self.count_rows(context['cursor'], entry)
+
+    @staticmethod
+    def count_rows(wrapper, entry):
+        cursor = wrapper.cursor
+        if cursor is None:
+            return  # Курсор уже закрыт
+        if cursor.description is None:
+            STATS.add_rows(entry, max(cursor.rowcount, 0))
+        elif isinstance(cursor, RowCounter):
+            cursor.entry = entry
+        else:
+            wrapper.cursor = RowCounter(cursor, entry)
+
+
+class QueryStatsMiddleware:
+    """Копит статистику SQL-запросов, если `QUERY_STATS_ENABLED`."""
+
+    def __init__(self, get_response):
+        if not settings.QUERY_STATS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        collector = QueryStatsCollector(request)
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(collector)
+                )
+            response = self.get_response(request)
+        get_exporter().flush()
+        return response
@@ -0,0 +1,144 @@
+"""
+Маршрутизаторы баз данных проекта.
+
+`BookkeepingRouter` выносит служебные таблицы с частой записью (сессии)
+в отдельную базу `settings.BOOKKEEPING_DATABASE`, чтобы запись контента
+не стояла в очереди за обновлением сессий. Переносить можно только
+приложения без внешних ключей на модели основной базы: удаляя
+пользователя, Django ищет связанные записи в базе пользователя, и таблицы
+там не окажется.
+
+`ReplicaRouter` отправляет чтения (ленты, страницы постов и профилей)
+на реплики из `settings.DATABASE_REPLICAS`, а записи — в основную базу.
+Чтобы пользователь сразу видел то, что только что написал, запрос
+«прилипает» к основной базе, если в нём была запись или если запись
+была недавно (об этом помнит cookie, которую ставит
+`ReplicaPinningMiddleware`).
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = 'replica_pin'  # Cookie, удерживающая чтения на основной базе
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+_pinned = ContextVar('replica_pinned', default=False)
+_written = ContextVar('replica_written', default=False)
+
+
+def pin_to_primary():
+    """Направляет все дальнейшие чтения текущего запроса в основную базу."""
+    _pinned.set(True)
+    _written.set(True)
+
+
+def is_pinned():
+    """Проверяет, закреплён ли текущий запрос за основной базой."""
+    return _pinned.get()
+
+
+class BookkeepingRouter:
+    """Маршрутизатор служебных приложений из `settings.BOOKKEEPING_APPS`."""
+
+    def _database(self, app_label):
+        if app_label in settings.BOOKKEEPING_APPS:
+            return settings.BOOKKEEPING_DATABASE
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._database(model._meta.app_label)
+
+    def db_for_write(self, model, **hints):
+        return self._database(model._meta.app_label)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Служебные записи могут хранить ключи объектов основной базы.
+        if not settings.BOOKKEEPING_DATABASE:
+            return None
+        if {obj1._meta.app_label, obj2._meta.app_label} & set(
+                settings.BOOKKEEPING_APPS):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        database = settings.BOOKKEEPING_DATABASE
+        if not database:
+            return None
+        if app_label in settings.BOOKKEEPING_APPS:
+            return db == database
+        if db == database:
+            return False
+        return None
+
+
+class ReplicaRouter:
+    """Маршрутизатор: чтение с реплик, запись в основную базу."""
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or is_pinned():
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        instance = hints.get('instance')
+        database = instance._state.db if instance is not None else None
+        if database and database != DEFAULT_DB_ALIAS \
+                and database not in settings.DATABASE_REPLICAS:
+            # Объект из другой базы (миграции, перенос данных): Django
+            # запишет связанный объект туда же, откуда взят этот.
+            return None
+        pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема реплик повторяет основную базу вместе с данными.
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaPinningMiddleware:
+    """
+    Закрепляет запросы пользователя за основной базой после записи.
+
+    Небезопасные запросы (POST и т. п.) и запросы с cookie закрепления
+    сразу читают из основной базы. Если во время запроса была запись,
+    ответ получает cookie на `REPLICA_PIN_SECONDS` секунд — за это время
+    реплика успевает догнать основную базу.
+    Middleware должна стоять раньше `SessionMiddleware` и
+    `AuthenticationMiddleware`, чтобы закрепление касалось и чтений
+    сессии и пользователя.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned_token = _pinned.set(
+            request.method not in SAFE_METHODS
+            or PIN_COOKIE in request.COOKIES
+        )
+        written_token = _written.set(False)
+        try:
+            response = self.get_response(request)
+            if _written.get():
+                response.set_cookie(
+                    PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                    httponly=True, samesite='Lax',
+                )
+        finally:
+            _pinned.reset(pinned_token)
+            _written.reset(written_token)
+        return response
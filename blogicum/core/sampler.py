@@ -0,0 +1,228 @@
+"""
+Постоянно работающий выборочный профилировщик.
+
+В каждом воркере фоновый поток раз в `SAMPLER_INTERVAL` секунд снимает
+стеки потоков, которые сейчас обрабатывают запрос, и копит их в виде
+collapsed stacks по имени представления. Раз в `SAMPLER_FLUSH_INTERVAL`
+секунд накопленное дописывается в файл `SAMPLER_DIR/samples-
+ГГГГММДДЧЧ-<pid>.folded`, готовый для flamegraph.pl или speedscope:
+
+    blog:index;blog/views.py:get;...;[includes/post_card.html];... 12
+
+Стек обрезается по `BaseHandler._get_response`, поэтому начинается
+с представления. Отрисовка шаблонов видна отдельными кадрами
+с именем шаблона в квадратных скобках.
+
+Профилировщик следит за своей стоимостью: если снятие стеков занимает
+больше `SAMPLER_MAX_OVERHEAD` времени, интервал удваивается, а когда
+стоимость падает ниже половины допустимой — уменьшается вдвое, но не
+ниже `SAMPLER_INTERVAL`. В каталоге хранятся последние
+`SAMPLER_MAX_FILES` файлов, более старые удаляются.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.template.base import Template
+
+logger = logging.getLogger(__name__)
+
+ROOT_FUNCTION = '_get_response'  # Кадр обработчика Django, выше — сервер
+MAX_DEPTH = 128  # Сколько кадров стека учитывать
+MAX_INTERVAL = 1.0  # Предел роста интервала при большой стоимости
+
+
+_labels = {}  # Подписи кадров по объектам кода
+
+
+def frame_label(code):
+    """Подпись кадра вида `blog/views.py:get`."""
+    label = _labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        marker = 'site-packages' + os.sep
+        if marker in filename:
+            filename = filename.split(marker, 1)[1]
+        else:
+            base = str(settings.BASE_DIR) + os.sep
+            if filename.startswith(base):
+                filename = filename[len(base):]
+        label = _labels[code] = f'{filename}:{code.co_name}'
+    return label
+
+
+def collapse(frame):
+    """Стек от представления к текущему кадру через ';'."""
+    labels = []
+    while frame is not None and len(labels) < MAX_DEPTH:
+        code = frame.f_code
+        if code.co_name == ROOT_FUNCTION:
+            break
+        if code.co_name == 'render':
+            template = frame.f_locals.get('self')
+            if isinstance(template, Template) and template.name:
+                labels.append(f'[{template.name}]')
+        labels.append(frame_label(code))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class Sampler:
+    """Снимает стеки зарегистрированных потоков и копит их по маршрутам."""
+
+    def __init__(self, directory, interval, flush_interval,
+                 max_overhead=0.01, max_files=500):
+        self.directory = Path(directory)
+        self.base_interval = self.interval = interval
+        self.max_files = max_files
+        self.flush_interval = flush_interval
+        self.max_overhead = max_overhead
+        self.active = {}  # Идентификатор потока -> имя представления
+        self.stacks = defaultdict(Counter)
+        self.samples = 0
+        self.pid = None
+        self._lock = threading.Lock()
+        self._spent = 0.0
+        self._window_started = time.monotonic()
+
+    def sample(self):
+        """Один снимок стеков всех потоков, обрабатывающих запросы."""
+        started = time.perf_counter()
+        frames = sys._current_frames()
+        with self._lock:
+            for ident, view in list(self.active.items()):
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.stacks[view][collapse(frame)] += 1
+                    self.samples += 1
+        self._spent += time.perf_counter() - started
+
+    def overhead(self):
+        """Доля времени, потраченная на снимки с последнего сброса."""
+        elapsed = time.monotonic() - self._window_started
+        return self._spent / elapsed if elapsed else 0.0
+
+    def flush(self):
+        """Дописывает накопленные стеки в файл и начинает новое окно."""
+        with self._lock:
+            stacks, self.stacks = self.stacks, defaultdict(Counter)
+        overhead = self.overhead()
+        if overhead > self.max_overhead:
+            self.interval = min(2 * self.interval, MAX_INTERVAL)
+        elif overhead < self.max_overhead / 2:
+            # Разовая пауза (например, сборка мусора) не должна навсегда
+            # снижать частоту снимков
+            self.interval = max(self.interval / 2, self.base_interval)
+        self._spent, self._window_started = 0.0, time.monotonic()
+        if not stacks:
+            return None
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / time.strftime(
+            f'samples-%Y%m%d%H-{os.getpid()}.folded'
+        )
+        new_file = not path.exists()
+        with open(path, 'a', encoding='utf-8') as file:
+            for view, counter in stacks.items():
+                for stack, count in counter.items():
+                    file.write(f'{view};{stack} {count}\n')
+        if new_file:
+            self.prune()
+        logger.info('Стеки записаны в %s, стоимость %.2f%%, интервал %.3f с',
+                    path, 100 * overhead, self.interval)
+        return path
+
+    def prune(self):
+        """Удаляет самые старые файлы сверх `max_files`."""
+        paths = sorted(self.directory.glob('samples-*.folded'),
+                       key=lambda path: path.name, reverse=True)
+        for old in paths[self.max_files:]:
+            old.unlink(missing_ok=True)
+
+    def run(self):
+        next_flush = time.monotonic() + self.flush_interval
+        while True:
+            time.sleep(self.interval)
+            self.sample()
+            if time.monotonic() >= next_flush:
+                next_flush = time.monotonic() + self.flush_interval
+                try:
+                    self.flush()
+                except OSError:
+                    logger.exception('Не удалось записать стеки')
+
+    def start(self):
+        """Запускает поток; после fork воркера — заново."""
+        if self.pid == os.getpid():
+            return
+        if self.pid is not None:
+            # Копия из родителя: стеки уже его, блокировка могла остаться
+            # захваченной его потоком
+            self._lock = threading.Lock()
+            self.stacks = defaultdict(Counter)
+            self.samples = 0
+            self._spent, self._window_started = 0.0, time.monotonic()
+        self.pid = os.getpid()
+        self.active.clear()
+        threading.Thread(target=self.run, name='stack-sampler',
+                         daemon=True).start()
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler():
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = Sampler(
+                settings.SAMPLER_DIR, settings.SAMPLER_INTERVAL,
+                settings.SAMPLER_FLUSH_INTERVAL,
+                settings.SAMPLER_MAX_OVERHEAD, settings.SAMPLER_MAX_FILES,
+            )
+        _sampler.start()
+        return _sampler
+
+
+def restart_after_fork():
+    """
+    Перезапускает профилировщик в процессе, созданном fork'ом.
+
+    При `gunicorn --preload` middleware загружается в мастере, и воркеры
+    получают копию профилировщика без потока.
+    """
+    global _sampler_lock
+    _sampler_lock = threading.Lock()
+    if _sampler is not None and _sampler.pid is not None:
+        _sampler.start()
+
+
+os.register_at_fork(after_in_child=restart_after_fork)
+
+
+class SamplerMiddleware:
+    """Отмечает потоки, обрабатывающие запросы, для профилировщика."""
+
+    def __init__(self, get_response):
+        if not settings.SAMPLER_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sampler = get_sampler()
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            self.sampler.active.pop(threading.get_ident(), None)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        self.sampler.active[threading.get_ident()] = (
+            match.view_name if match else request.path
+        )
@@ -0,0 +1,140 @@
+"""
+Журнал медленных SQL-запросов с планом выполнения.
+
+`SlowQueryMiddleware` замеряет каждый SQL-запрос HTTP-запроса. Запрос
+дольше `SLOW_QUERY_THRESHOLD` секунд записывается в журнал
+`core.slow_queries` вместе с параметрами, именем представления
+и выводом `EXPLAIN QUERY PLAN`. Отдельно помечаются полный просмотр
+таблицы (SCAN без индекса) и временное B-дерево для сортировки или
+группировки — так видно, что запрос ленты перестал попадать в индекс.
+"""
+import logging
+import re
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?!.* USING )')
+TEMP_B_TREE = re.compile(r'^USE TEMP B-TREE FOR (.+)$')
+# Подзапросы, которые SQLite строит сам: их просмотр не полный скан таблицы
+SUBQUERY = re.compile(r'^(?:CO-ROUTINE|MATERIALIZE) (\w+)')
+EXPLAINABLE = ('SELECT', 'WITH')
+
+
+def explain(connection, sql, params):
+    """
+    Строки плана (глубина, описание) или пустой список.
+
+    EXPLAIN выполняется курсором драйвера в обход `connection.cursor()`:
+    обёртки выполнения запросов (бюджеты, N+1, метрики, статистика) его
+    не видят и не учитывают.
+    """
+    if connection.vendor != 'sqlite' \
+            or not sql.lstrip().upper().startswith(EXPLAINABLE):
+        return []
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    depth = {0: -1}
+    plan = []
+    for node, parent, _, detail in rows:
+        depth[node] = depth.get(parent, -1) + 1
+        plan.append((depth[node], detail))
+    return plan
+
+
+def plan_flags(plan):
+    """Пометки о полном просмотре таблиц и временных B-деревьях."""
+    subqueries = {'CONSTANT'}
+    subqueries.update(
+        match.group(1) for match in (
+            SUBQUERY.match(detail) for _, detail in plan
+        ) if match
+    )
+    flags = []
+    for _, detail in plan:
+        match = FULL_SCAN.match(detail)
+        if match and match.group(1) not in subqueries:
+            flags.append(f'FULL SCAN {match.group(1)}')
+        match = TEMP_B_TREE.match(detail)
+        if match:
+            flags.append(f'TEMP B-TREE {match.group(1)}')
+    return flags
+
+
+class SlowQueryLogger:
+    """Обёртка выполнения запросов одного HTTP-запроса."""
+
+    def __init__(self, request, threshold):
+        self.request = request
+        self.threshold = threshold
+        self._explaining = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if self._explaining:
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            if elapsed >= self.threshold:
+                self.report(context['connection'], sql, params, many,
+                            elapsed)
+
+    def report(self, connection, sql, params, many, elapsed):
+        plan = []
+        if not many:
+            self._explaining = True
+            try:
+                plan = explain(connection, sql, params)
+            except DatabaseError as error:
+                plan = [(0, f'EXPLAIN не выполнен: {error}')]
+            finally:
+                self._explaining = False
+        match = self.request.resolver_match
+        view = match.view_name if match else self.request.path
+        flags = plan_flags(plan)
+        lines = [
+            f'Медленный запрос {1000 * elapsed:.1f} мс в {view}'
+            + (f' [{", ".join(flags)}]' if flags else ''),
+            f'SQL: {sql}',
+            f'Параметры: {params!r}',
+        ]
+        if plan:
+            lines.append('План:')
+            lines += [f'  {"  " * depth}{detail}' for depth, detail in plan]
+        logger.warning('\n'.join(lines), extra={
+            'view': view, 'duration_ms': round(1000 * elapsed, 2),
+            'sql': sql, 'flags': flags,
+        })
+
+
+class SlowQueryMiddleware:
+    """
+    Пишет в журнал SQL-запросы дольше `SLOW_QUERY_THRESHOLD` секунд.
+
+    Нулевой порог отключает промежуточный слой.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_THRESHOLD:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        wrapper = SlowQueryLogger(request, settings.SLOW_QUERY_THRESHOLD)
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(wrapper)
+                )
+            return self.get_response(request)
@@ -0,0 +1,123 @@
+"""
+Разбивка времени запроса для заголовка Server-Timing.
+
+`ServerTimingMiddleware` заводит на время HTTP-запроса `RequestStats`
+и кладёт его в контекстную переменную `STATS`. Туда пишут:
+    - обёртка выполнения запросов — время и число SQL-запросов;
+    - шаблонный движок `core.backends.templates.DjangoTemplates` —
+      время отрисовки шаблонов верхнего уровня, например
+      `blog/index.html`;
+    - кэш `core.cache.InstrumentedLocMemCache` — попадания и промахи.
+
+Итог уходит в заголовок ответа `Server-Timing` (его показывают
+инструменты разработчика браузера) и доступен шаблонам как
+`server_timing` через контекстный процессор. Когда
+`SERVER_TIMING_ENABLED` выключен, промежуточный слой не подключается,
+а движок и кэш проверяют только пустую контекстную переменную (если её
+не заполнил журнал запросов `core.log`).
+"""
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+STATS = ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    """Счётчики одного HTTP-запроса."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_time = 0.0
+        self.sql_count = 0
+        self.templates = []  # (имя шаблона, секунды) в порядке отрисовки
+        self.cache_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            self.sql_count += 1
+
+    @contextmanager
+    def template(self, name):
+        """Учитывает отрисовку; вложенные шаблоны входят во внешний."""
+        self._depth += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if not self._depth:
+                self.templates.append(
+                    (name, time.perf_counter() - started)
+                )
+
+    def cache_lookup(self, hit, elapsed):
+        self.cache_time += elapsed
+        if hit:
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+
+    @property
+    def template_time(self):
+        return sum(elapsed for _, elapsed in self.templates)
+
+    def header(self):
+        """Значение заголовка Server-Timing, длительности в мс."""
+        metrics = [
+            f'db;dur={1000 * self.sql_time:.1f};'
+            f'desc="SQL: {self.sql_count}"',
+        ]
+        metrics += [
+            f'tpl;dur={1000 * elapsed:.1f};desc="{name}"'
+            for name, elapsed in self.templates
+        ]
+        metrics.append(
+            f'cache;dur={1000 * self.cache_time:.1f};'
+            f'desc="hit {self.cache_hits} miss {self.cache_misses}"'
+        )
+        metrics.append(
+            f'total;dur={1000 * (time.perf_counter() - self.started):.1f}'
+        )
+        return ', '.join(metrics)
+
+
+def current_stats():
+    """Счётчики текущего запроса или None, если замер выключен."""
+    return STATS.get()
+
+
+class ServerTimingMiddleware:
+    """Добавляет к ответу заголовок Server-Timing."""
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats()
+        request.server_timing = stats
+        token = STATS.set(stats)
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(stats)
+                    )
+                response = self.get_response(request)
+        finally:
+            STATS.reset(token)
+        response['Server-Timing'] = stats.header()
+        return response
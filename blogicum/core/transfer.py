@@ -0,0 +1,257 @@
+"""
+Перенос данных между базами из DATABASES.
+
+Таблицы копируются в порядке зависимостей по внешним ключам: сначала
+пользователи и категории, затем посты, затем комментарии. Каждая таблица
+читается порциями по первичному ключу (`pk > последний`), порция
+вставляется в целевую базу одним `executemany` в своей транзакции.
+
+Перенос с нуля начинается с очистки выбранных таблиц целевой базы.
+После каждой порции в файл контрольной точки записываются последний
+первичный ключ и сумма SHA-256 строк порции. Прерванный перенос
+продолжается с места остановки, а по окончании суммы порций заново
+считаются в обеих базах и сравниваются с записанными.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from django.apps import apps
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, router, transaction
+
+CHUNK_SIZE = 1000  # Сколько строк копировать за одну порцию
+
+
+def copy_order(models):
+    """
+    Сортирует модели так, чтобы таблицы шли после тех, на которые ссылаются.
+
+    Циклические зависимости не мешают переносу — проверки внешних ключей
+    на время копирования отключены, — поэтому такие модели просто
+    добавляются в конец.
+    """
+    models = list(models)
+    pending = {
+        model: {
+            field.related_model for field in model._meta.concrete_fields
+            if field.is_relation and field.related_model is not model
+            and field.related_model in models
+        }
+        for model in models
+    }
+    ordered = []
+    while pending:
+        ready = [
+            model for model, depends in pending.items()
+            if not depends - set(ordered)
+        ] or list(pending)[:1]
+        for model in ready:
+            ordered.append(model)
+            del pending[model]
+    return ordered
+
+
+def select_models(source, target, labels=(), exclude=()):
+    """
+    Возвращает модели для переноса в порядке копирования.
+
+    labels и exclude — метки приложений ('blog') или моделей ('blog.post');
+    пустой labels означает все модели, таблицы которых есть в обеих базах.
+    """
+    def matches(model, names):
+        opts = model._meta
+        return opts.app_label in names or opts.label_lower in names
+
+    models = [
+        model for model in apps.get_models(include_auto_created=True)
+        if model._meta.managed and not model._meta.proxy
+        and router.allow_migrate_model(source, model)
+        and router.allow_migrate_model(target, model)
+        and (not labels or matches(model, labels))
+        and not matches(model, exclude)
+    ]
+    return copy_order(models)
+
+
+def _queryset(model, alias):
+    attnames = [field.attname for field in model._meta.concrete_fields]
+    return model._base_manager.using(alias).order_by('pk').values_list(
+        *attnames
+    )
+
+
+def _pk_index(model):
+    return model._meta.concrete_fields.index(model._meta.pk)
+
+
+def insert_rows(alias, model, attnames, rows):
+    """
+    Вставляет строки в таблицу модели одним executemany.
+
+    rows — кортежи значений полей в порядке attnames. В отличие от
+    `bulk_create`, здесь не создаются объекты моделей и не заполняются
+    заново поля с `auto_now_add`, поэтому даты создания сохраняются.
+    """
+    connection = connections[alias]
+    quote = connection.ops.quote_name
+    fields = [model._meta.get_field(attname) for attname in attnames]
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(model._meta.db_table),
+        ', '.join(quote(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    params = [
+        [
+            field.get_db_prep_save(value, connection)
+            for field, value in zip(fields, row)
+        ]
+        for row in rows
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def checksum(rows):
+    """Возвращает сумму SHA-256 строк, не зависящую от базы данных."""
+    digest = hashlib.sha256()
+    for row in rows:
+        digest.update(json.dumps(row, cls=DjangoJSONEncoder).encode())
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+class Checkpoint:
+    """
+    Файл контрольной точки переноса.
+
+    Для каждой модели хранит последний скопированный первичный ключ,
+    признак завершения и список порций [первый pk, последний pk, сумма].
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.state = {}
+        if self.path.exists():
+            self.state = json.loads(self.path.read_text(encoding='utf-8'))
+
+    def table(self, model):
+        return self.state.setdefault(
+            model._meta.label_lower,
+            {'last_pk': None, 'done': False, 'chunks': []},
+        )
+
+    def save(self):
+        """Записывает файл атомарно, чтобы сбой не оставил его обрезанным."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.path.with_name(self.path.name + '.partial')
+        temp.write_text(
+            json.dumps(self.state, cls=DjangoJSONEncoder, indent=1),
+            encoding='utf-8',
+        )
+        os.replace(temp, self.path)
+
+
+class Transfer:
+    """Копирование моделей из базы source в базу target."""
+
+    def __init__(self, source, target, checkpoint, chunk_size=CHUNK_SIZE,
+                 progress=None):
+        self.source = source
+        self.target = target
+        self.checkpoint = checkpoint
+        self.chunk_size = chunk_size
+        self.progress = progress or (lambda model, rows: None)
+
+    def flush_target(self, models):
+        """Очищает таблицы целевой базы перед переносом с нуля."""
+        connection = connections[self.target]
+        tables = [model._meta.db_table for model in models]
+        sql_list = connection.ops.sql_flush(
+            no_style(), tables, reset_sequences=True, allow_cascade=True
+        )
+        connection.ops.execute_sql_flush(sql_list)
+
+    def delete_after(self, model, pk):
+        """
+        Удаляет из целевой базы строки с первичным ключом больше pk,
+        а при pk=None — все строки таблицы.
+        """
+        connection = connections[self.target]
+        quote = connection.ops.quote_name
+        sql, params = f'DELETE FROM {quote(model._meta.db_table)}', []
+        if pk is not None:
+            sql += f' WHERE {quote(model._meta.pk.column)} > %s'
+            params.append(pk)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+    def copy(self, models):
+        """Копирует модели по порядку, продолжая с контрольной точки."""
+        connection = connections[self.target]
+        if not self.checkpoint.state:
+            self.flush_target(models)
+        with connection.constraint_checks_disabled():
+            for model in models:
+                self.copy_model(model)
+        connection.check_constraints(
+            table_names=[model._meta.db_table for model in models]
+        )
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+
+    def copy_model(self, model):
+        table = self.checkpoint.table(model)
+        if table['done']:
+            return
+        # Порция могла попасть в базу, но не в контрольную точку
+        self.delete_after(model, table['last_pk'])
+        attnames = [field.attname for field in model._meta.concrete_fields]
+        pk_index = _pk_index(model)
+        queryset = _queryset(model, self.source)
+        while True:
+            chunk = queryset
+            if table['last_pk'] is not None:
+                chunk = chunk.filter(pk__gt=table['last_pk'])
+            rows = list(chunk[:self.chunk_size])
+            if rows:
+                with transaction.atomic(using=self.target):
+                    insert_rows(self.target, model, attnames, rows)
+                first_pk, last_pk = rows[0][pk_index], rows[-1][pk_index]
+                table['chunks'].append([first_pk, last_pk, checksum(rows)])
+                table['last_pk'] = last_pk
+            table['done'] = len(rows) < self.chunk_size
+            self.checkpoint.save()
+            self.progress(model, len(rows))
+            if table['done']:
+                return
+
+    def verify(self, models):
+        """
+        Пересчитывает суммы порций в обеих базах.
+
+        Возвращает список расхождений вида (модель, первый pk, последний pk);
+        пустой список означает, что данные совпадают.
+        """
+        mismatches = []
+        for model in models:
+            table = self.checkpoint.table(model)
+            for first_pk, last_pk, expected in table['chunks']:
+                for alias in (self.source, self.target):
+                    rows = _queryset(model, alias).filter(
+                        pk__gte=first_pk, pk__lte=last_pk
+                    )
+                    if checksum(rows) != expected:
+                        mismatches.append((model, first_pk, last_pk))
+                        break
+            for alias in (self.source, self.target):
+                tail = model._base_manager.using(alias)
+                if table['last_pk'] is not None:
+                    tail = tail.filter(pk__gt=table['last_pk'])
+                if tail.exists():
+                    mismatches.append((model, table['last_pk'], None))
+                    break
+        return mismatches
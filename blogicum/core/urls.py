@@ -0,0 +1,14 @@
+"""Маршруты служебных страниц."""
+from django.urls import path
+
+from . import views
+
+app_name = 'core'
+
+urlpatterns = [
+    path('profiles/', views.profile_list, name='profile_list'),
+    path('profiles/<str:name>/', views.profile_detail,
+         name='profile_detail'),
+    path('metrics/', views.metrics, name='metrics'),
+    path('queries/', views.query_report, name='query_report'),
+]
@@ -0,0 +1,82 @@
+"""
+Служебные страницы: профили и статистика SQL для сотрудников, метрики
+для сборщика.
+"""
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
+from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+
+from core.metrics import get_exporter, render as render_metrics
+from core import query_stats
+from core.profiling import SORT_KEYS, get_ring
+
+
+@staff_member_required
+def profile_list(request):
+    """Список сохранённых профилей запросов."""
+    return render(request, 'core/profiles.html', {
+        'captures': get_ring().captures(),
+    })
+
+
+@staff_member_required
+def profile_detail(request, name):
+    """Самые дорогие функции профиля; ?sort=cumulative|tottime|calls."""
+    ring = get_ring()
+    path = ring.path(name)
+    if path is None:
+        raise Http404
+    if request.GET.get('download'):
+        return FileResponse(open(path, 'rb'), as_attachment=True,
+                            filename=path.name)
+    sort = request.GET.get('sort')
+    if sort not in SORT_KEYS:
+        sort = SORT_KEYS[0]
+    return render(request, 'core/profile.html', {
+        'capture': ring.meta(name),
+        'sort': sort,
+        'sort_keys': SORT_KEYS,
+        'stats': ring.top(name, sort),
+    })
+
+
+def has_metrics_token(request):
+    """Передан ли `METRICS_TOKEN` в заголовке Authorization: Bearer."""
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    return bool(settings.METRICS_TOKEN) and scheme.lower() == 'bearer' \
+        and constant_time_compare(token, settings.METRICS_TOKEN)
+
+
+def metrics(request):
+    """Метрики всех процессов в текстовом формате Prometheus."""
+    if not request.user.is_staff and not has_metrics_token(request):
+        raise PermissionDenied
+    return HttpResponse(
+        render_metrics(get_exporter().collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+@staff_member_required
+def query_report(request):
+    """
+    Статистика SQL по отпечаткам; ?sort=total|mean|calls|rows,
+    ?format=json отдаёт все строки отчёта в JSON.
+    """
+    sort = request.GET.get('sort')
+    if sort not in query_stats.SORT_KEYS:
+        sort = query_stats.SORT_KEYS[0]
+    snapshots = query_stats.get_exporter().collect()
+    if request.GET.get('format') == 'json':
+        return JsonResponse(
+            {'statements': query_stats.report(snapshots, sort)},
+            json_dumps_params={'ensure_ascii': False, 'indent': 2},
+        )
+    return render(request, 'core/queries.html', {
+        'statements': query_stats.report(snapshots, sort, limit=100),
+        'sort': sort,
+        'sort_keys': query_stats.SORT_KEYS,
+    })
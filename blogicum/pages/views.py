@@ -43,3 +43,11 @@ def internal_error(request, *args, **kwargs):
     """
 
     return render(request, 'pages/500.html', status=500)
+
+
+def service_unavailable(request, *args, **kwargs):
+    """Обработка 503 ошибки (Сервис временно недоступен).
+    Возвращает шаблон 'pages/503.html' с кодом статуса 503,
+    который отображается, когда сервер не успел обработать запрос.
+    """
+    return render(request, 'pages/503.html', status=503)
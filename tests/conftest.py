@@ -1,3 +1,6 @@
+import copy
+import logging
+import logging.config
 import os
 import re
 import time
@@ -41,6 +44,28 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True, scope="session")
+def log_dir(tmp_path_factory):
+    """Журналы тестов пишутся во временный каталог, а не в blogicum/logs."""
+    from django.conf import settings
+
+    directory = tmp_path_factory.mktemp("logs")
+    for handler in logging.getLogger("blogicum.access").handlers:
+        getattr(handler, "stop", handler.close)()
+    config = copy.deepcopy(settings.LOGGING)
+    config["handlers"]["access"]["filename"] = directory / "access.jsonl"
+    logging.config.dictConfig(config)
+    with override_settings(
+            LOG_DIR=directory,
+            LOGGING=config,
+            SAMPLER_DIR=directory / "samples",
+            TRACEMALLOC_DIR=directory / "memory",
+    ):
+        yield directory
+    for handler in logging.getLogger("blogicum.access").handlers:
+        getattr(handler, "stop", handler.close)()
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -0,0 +1,91 @@
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import resolve
+
+from core.access_log import (
+    compare, read_log, redact_path, redact_query, replay,
+)
+from core.http_bench import Client
+from core.management.commands.replay_access_log import Command
+
+
+@pytest.mark.django_db(transaction=True)
+def test_access_log_capture_and_replay(
+        tmp_path, client, live_server, post_with_published_location):
+    with override_settings(ACCESS_LOG_SAMPLE_RATE=1, ACCESS_LOG_DIR=tmp_path):
+        assert client.get('/?page=1').status_code == HTTPStatus.OK
+        client.get('/posts/0/')
+    entries = read_log(sorted(tmp_path.glob('access-*.tsv')))
+    assert [
+        (entry['route'], entry['query'], entry['user_class'], entry['status'])
+        for entry in entries
+    ] == [
+        ('blog:index', 'page=1', 'anonymous', 200),
+        ('blog:post_detail', '', 'anonymous', 404),
+    ], 'Убедитесь, что журнал запросов записывает маршрут, query и код.'
+
+    results = replay(
+        entries, {'anonymous': Client(live_server.url)}, speed=0
+    )
+    assert len(results['blog:index']['latencies']) == 1
+    assert results['blog:post_detail']['errors'] == 0, (
+        'Убедитесь, что ожидаемый по журналу код 404 не считается ошибкой.'
+    )
+
+
+def test_compare_flags_slower_routes():
+    base = {'blog:index': {'latencies': [10, 10, 10], 'errors': 0}}
+    new = {'blog:index': {'latencies': [20, 20, 20], 'errors': 0}}
+    flagged = [
+        row[1] for row in compare(base, new, threshold=0.2) if row[-1]
+    ]
+    assert flagged == ['p50', 'p95']
+    assert not any(row[-1] for row in compare(base, base))
+
+
+@pytest.mark.django_db
+def test_access_log_redacts_tokens(tmp_path, client):
+    with override_settings(ACCESS_LOG_SAMPLE_RATE=1, ACCESS_LOG_DIR=tmp_path):
+        client.get('/?page=2&token=secret-value')
+    entries = read_log(sorted(tmp_path.glob('access-*.tsv')))
+    assert entries[0]['query'] == 'page=2&token=REDACTED', (
+        'Убедитесь, что секретные параметры query не попадают в журнал.'
+    )
+    assert redact_query('page=2') == 'page=2'
+    path = '/auth/reset/MQ/abc-0123456789abcdef/'
+    assert redact_path(path, resolve(path)) == (
+        '/auth/reset/REDACTED/REDACTED/'
+    ), 'Убедитесь, что токен сброса пароля в пути не попадает в журнал.'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_replay_clients_use_sessions_without_password(live_server):
+    command = Command()
+    clients = command.clients(live_server.url, [
+        {'route': 'admin:blog_post_changelist', 'user_class': 'staff'},
+    ])
+    assert clients['staff'].request('/admin/blog/post/') == HTTPStatus.OK, (
+        'Убедитесь, что клиент сотрудника входит в систему без пароля '
+        'и может открыть страницы админки из журнала.'
+    )
+    assert clients['staff'].request('/admin/blog/category/') == (
+        HTTPStatus.FORBIDDEN
+    )
+    staff = get_user_model().objects.get(username='replay-staff')
+    assert not staff.has_usable_password(), (
+        'Убедитесь, что у учётных записей воспроизведения нет пароля, '
+        'под которым можно войти.'
+    )
+    assert staff.is_staff and not staff.is_superuser
+
+    command.log_out()
+    assert clients['staff'].request('/admin/') == HTTPStatus.FOUND, (
+        'Убедитесь, что после прогона сессии учётных записей '
+        'воспроизведения недействительны.'
+    )
+    assert not get_user_model().objects.filter(
+        username__startswith='replay-', is_active=True
+    ).exists()
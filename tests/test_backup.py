@@ -0,0 +1,45 @@
+import gzip
+import sqlite3
+
+from core.backup import create_snapshot, rotate_snapshots, verify_snapshot
+
+
+def make_database(path, rows=500):
+    with sqlite3.connect(path) as connection:
+        connection.execute('CREATE TABLE post (title TEXT)')
+        connection.executemany(
+            'INSERT INTO post VALUES (?)',
+            ((f'Пост {i}' * 20,) for i in range(rows)),
+        )
+    return str(path)
+
+
+def test_create_snapshot(tmp_path):
+    source = make_database(tmp_path / 'db.sqlite3')
+    snapshot = create_snapshot(
+        source, tmp_path / 'backups', 'default', pages=2, sleep=0
+    )
+    assert snapshot.name.endswith('.sqlite3.gz')
+    assert verify_snapshot(snapshot), (
+        'Убедитесь, что рядом со снимком сохраняется верная сумма SHA-256.'
+    )
+    restored = tmp_path / 'restored.sqlite3'
+    restored.write_bytes(gzip.decompress(snapshot.read_bytes()))
+    with sqlite3.connect(restored) as connection:
+        count = connection.execute('SELECT count(*) FROM post').fetchone()[0]
+    assert count == 500, 'Убедитесь, что снимок содержит все данные базы.'
+    assert list((tmp_path / 'backups').glob('*.partial')) == []
+
+
+def test_rotate_snapshots(tmp_path):
+    source = make_database(tmp_path / 'db.sqlite3', rows=1)
+    snapshots = [
+        create_snapshot(source, tmp_path, 'default', compress=False)
+        for _ in range(3)
+    ]
+    removed = rotate_snapshots(tmp_path, 'default', keep=2)
+    assert removed == snapshots[:1], (
+        'Убедитесь, что при ротации удаляются самые старые снимки.'
+    )
+    assert not snapshots[0].with_name(snapshots[0].name + '.sha256').exists()
+    assert all(path.exists() for path in snapshots[1:])
@@ -0,0 +1,60 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+
+from blog.benchmark import (
+    build_scenarios, compare, percentile, run_scenario, summarize,
+)
+from blog.synthetic import Generator
+
+
+def test_compare_flags_regressions():
+    baseline = {'1000:index': {
+        'wall_p50': 10.0, 'wall_p95': 20.0, 'sql_time_p50': 2.0,
+        'render_p50': 5.0, 'queries_max': 3,
+    }}
+    results = {'1000:index': {
+        'wall_p50': 15.0, 'wall_p95': 21.0, 'sql_time_p50': 2.5,
+        'render_p50': 5.0, 'queries_max': 4,
+    }}
+    regressions = {
+        metric for _, metric, _, _ in compare(results, baseline, 0.2)
+    }
+    assert regressions == {'wall_p50', 'queries_max'}, (
+        'Убедитесь, что регрессией считается рост времени выше порога '
+        'и любой рост числа запросов, но не мелкие колебания.'
+    )
+    assert compare(results, {}) == []
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile([], 95) == 0.0
+
+
+@pytest.mark.django_db
+def test_run_scenarios_on_generated_data():
+    Generator(timezone.now(), seed=1).generate(
+        users=5, categories=2, locations=3, posts=40, comments=200
+    )
+    scenarios = {
+        scenario.name: scenario for scenario in build_scenarios('password')
+    }
+    samples = run_scenario(scenarios['post_detail'], 'password', repeat=3)
+    summary = summarize(samples)
+    assert summary['statuses'] == [200]
+    assert summary['queries_max'] > 0
+    assert summary['render_p50'] > 0, (
+        'Убедитесь, что замеряется время отрисовки шаблона.'
+    )
+    samples = run_scenario(scenarios['create_post'], 'password', repeat=2)
+    assert {sample.status for sample in samples} == {302}
+
+
+def test_missing_baseline_fails(tmp_path):
+    with pytest.raises(CommandError, match='Нет базовой линии'):
+        call_command('benchmark_views', '--sizes', '10',
+                     '--baseline', str(tmp_path / 'missing.json'))
@@ -0,0 +1,117 @@
+import io
+import json
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connections
+
+from blog.models import Category, Comment, Post
+from core.transfer import Checkpoint, Transfer, copy_order, select_models
+
+ALIASES = ('copy_source', 'copy_target')
+
+
+@pytest.fixture
+def sqlite_files(tmp_path, django_db_blocker):
+    """Две отдельные базы SQLite с применёнными миграциями."""
+    for alias in ALIASES:
+        connections.databases[alias] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': str(tmp_path / f'{alias}.sqlite3'),
+        }
+    with django_db_blocker.unblock():
+        for alias in ALIASES:
+            call_command('migrate', database=alias, verbosity=0)
+        yield
+        for alias in ALIASES:
+            connections[alias].close()
+            del connections[alias]
+            del connections.databases[alias]
+
+
+def fill_source(posts=25):
+    source = ALIASES[0]
+    author = get_user_model().objects.db_manager(source).create_user(
+        'author', password='password'
+    )
+    category = Category.objects.using(source).create(
+        title='Путешествия', description='Описание', slug='travel'
+    )
+    Post.objects.using(source).bulk_create(
+        Post(title=f'Пост {i}', text='Текст', pub_date='2023-01-01T00:00Z',
+             author=author, category=category)
+        for i in range(posts)
+    )
+    Comment.objects.using(source).bulk_create(
+        Comment(text='Комментарий', post=post, author=author)
+        for post in Post.objects.using(source)
+    )
+
+
+def test_copy_order_puts_referenced_tables_first():
+    order = copy_order([Comment, Post, get_user_model(), Category])
+    assert order.index(Post) > order.index(Category)
+    assert order.index(Post) > order.index(get_user_model())
+    assert order.index(Comment) > order.index(Post), (
+        'Убедитесь, что таблицы копируются в порядке зависимостей.'
+    )
+
+
+def test_copy_data_between_sqlite_files(sqlite_files, tmp_path):
+    fill_source()
+    checkpoint = tmp_path / 'checkpoint.json'
+    call_command(
+        'copy_data', *ALIASES, '--chunk-size', '10',
+        '--checkpoint', str(checkpoint), stdout=io.StringIO(),
+    )
+    target = ALIASES[1]
+    assert Post.objects.using(target).count() == 25
+    assert Comment.objects.using(target).filter(
+        author__username='author'
+    ).count() == 25, 'Убедитесь, что связанные строки переносятся целиком.'
+    state = json.loads(checkpoint.read_text())
+    assert len(state['blog.post']['chunks']) == 3
+
+    Post.objects.using(target).filter(pk=5).update(title='Изменён')
+    with pytest.raises(CommandError):
+        call_command(
+            'copy_data', *ALIASES, '--checkpoint', str(checkpoint),
+            stdout=io.StringIO(), stderr=io.StringIO(),
+        )
+
+
+def test_copy_data_keeps_default_checkpoint_in_backup_dir(
+        sqlite_files, tmp_path, settings):
+    fill_source(posts=1)
+    settings.BACKUP_DIR = tmp_path / 'backups'
+    call_command('copy_data', *ALIASES, stdout=io.StringIO())
+    path = settings.BACKUP_DIR / 'copy-copy_source-copy_target.json'
+    assert path.exists(), (
+        'Убедитесь, что контрольная точка по умолчанию пишется в BACKUP_DIR, '
+        'а не рядом с исходным кодом.'
+    )
+
+
+def test_copy_resumes_from_checkpoint(sqlite_files, tmp_path):
+    fill_source()
+    source, target = ALIASES
+    checkpoint = Checkpoint(tmp_path / 'checkpoint.json')
+    models = select_models(source, target, labels=('auth.user', 'blog'))
+    transfer = Transfer(source, target, checkpoint, chunk_size=10)
+
+    def interrupt(model, rows):
+        if model is Post:
+            raise KeyboardInterrupt
+
+    transfer.progress = interrupt
+    with pytest.raises(KeyboardInterrupt):
+        transfer.copy(models)
+    assert Post.objects.using(target).count() == 10
+
+    transfer = Transfer(source, target, Checkpoint(checkpoint.path), 10)
+    transfer.copy(models)
+    assert Post.objects.using(target).count() == 25, (
+        'Убедитесь, что перенос продолжается с контрольной точки.'
+    )
+    assert transfer.verify(models) == []
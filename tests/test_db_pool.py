@@ -0,0 +1,99 @@
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.db.utils import ConnectionHandler
+
+from core.backends.sqlite3.pool import ConnectionPool, PoolTimeout
+
+N_THREADS = 32
+N_ITERATIONS = 50
+POOL_SIZE = 4
+
+
+def make_pool(tmp_path, **options):
+    path = str(tmp_path / 'pool.sqlite3')
+    return ConnectionPool(
+        lambda: sqlite3.connect(path, check_same_thread=False), **options
+    )
+
+
+def test_pool_stress(tmp_path):
+    pool = make_pool(tmp_path, max_size=POOL_SIZE, timeout=10)
+    peak, lock = [0], threading.Lock()
+
+    def work(_):
+        for _ in range(N_ITERATIONS):
+            connection = pool.acquire()
+            with lock:
+                peak[0] = max(peak[0], pool.metrics()['in_use'])
+            connection.execute('SELECT 1').fetchone()
+            pool.release(connection)
+
+    with ThreadPoolExecutor(N_THREADS) as executor:
+        list(executor.map(work, range(N_THREADS)))
+
+    metrics = pool.metrics()
+    assert peak[0] <= POOL_SIZE, (
+        'Убедитесь, что пул не выдаёт больше `max_size` соединений.'
+    )
+    assert metrics['created'] <= POOL_SIZE
+    assert metrics['created'] + metrics['reused'] == N_THREADS * N_ITERATIONS
+    assert metrics['in_use'] == 0 and metrics['idle'] == metrics['created']
+    pool.close_all()
+
+
+def test_pool_timeout(tmp_path):
+    pool = make_pool(tmp_path, max_size=1, timeout=0.05)
+    connection = pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    pool.release(connection)
+    assert pool.acquire() is connection
+
+
+def test_pool_drops_idle_and_broken_connections(tmp_path):
+    pool = make_pool(tmp_path, max_size=2, max_idle=0.05,
+                     health_check_interval=0)
+    broken = pool.acquire()
+    pool.release(broken)
+    broken.close()
+    fresh = pool.acquire()
+    assert fresh is not broken
+    assert pool.metrics()['failed_health_checks'] == 1
+    pool.release(fresh)
+    time.sleep(0.1)
+    assert pool.acquire() is not fresh
+    assert pool.metrics()['expired'] == 1, (
+        'Убедитесь, что соединения, простоявшие дольше `max_idle`, '
+        'закрываются.'
+    )
+
+
+def test_backend_returns_connections_to_pool(tmp_path, django_db_blocker):
+    handler = ConnectionHandler({
+        'default': {
+            'ENGINE': 'core.backends.sqlite3',
+            'NAME': str(tmp_path / 'db.sqlite3'),
+            'OPTIONS': {'pool': {'max_size': POOL_SIZE}},
+        },
+    })
+
+    def request(_):
+        connection = handler['default']
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        connection.close()
+        return connection.pool
+
+    with django_db_blocker.unblock(), ThreadPoolExecutor(N_THREADS) as pool:
+        pools = set(pool.map(request, range(N_THREADS * 4)))
+    assert len(pools) == 1
+    metrics = pools.pop().metrics()
+    assert metrics['created'] <= POOL_SIZE, (
+        'Убедитесь, что бэкенд `core.backends.sqlite3` берёт соединения '
+        'из пула и возвращает их туда при закрытии.'
+    )
+    assert metrics['in_use'] == 0
@@ -0,0 +1,28 @@
+from django.db.utils import ConnectionHandler
+
+
+def test_production_backend_pragmas(tmp_path, django_db_blocker):
+    handler = ConnectionHandler({
+        'default': {
+            'ENGINE': 'core.backends.sqlite3',
+            'NAME': str(tmp_path / 'db.sqlite3'),
+            'OPTIONS': {'pragmas': {'cache_size': -1024}},
+        },
+    })
+    connection = handler['default']
+    pragmas = {}
+    with django_db_blocker.unblock(), connection.cursor() as cursor:
+        for name in ('journal_mode', 'synchronous', 'cache_size',
+                     'busy_timeout'):
+            cursor.execute(f'PRAGMA {name}')
+            pragmas[name] = cursor.fetchone()[0]
+    connection.close()
+    assert pragmas == {
+        'journal_mode': 'wal',
+        'synchronous': 1,
+        'cache_size': -1024,
+        'busy_timeout': 5000,
+    }, (
+        'Убедитесь, что бэкенд `core.backends.sqlite3` включает WAL, '
+        '`synchronous=NORMAL`, `busy_timeout` и учитывает PRAGMA из OPTIONS.'
+    )
@@ -0,0 +1,99 @@
+import pytest
+from debug_toolbar.toolbar import DebugToolbar
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache, caches
+from django.core.paginator import Paginator
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+
+from core.panels import install_hooks
+
+
+def run_toolbar(get_response):
+    """Обрабатывает запрос панелями отладки, как DebugToolbarMiddleware."""
+    install_hooks()
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    toolbar = DebugToolbar(request, get_response)
+    for panel in toolbar.enabled_panels:
+        panel.enable_instrumentation()
+    try:
+        response = toolbar.process_request(request)
+    finally:
+        for panel in reversed(toolbar.enabled_panels):
+            panel.disable_instrumentation()
+    for panel in reversed(toolbar.enabled_panels):
+        panel.generate_stats(request, response)
+    return toolbar
+
+
+def render_feed(request):
+    from blog.models import Post
+    page = Paginator(Post.objects.order_by('pk'), 5).page(1)
+    cache.set('debug-panels-key', 'value')
+    cache.get('debug-panels-key')
+    cache.get('debug-panels-missing')
+    return HttpResponse(''.join(
+        render_to_string('includes/post_card.html', {'post': post})
+        for post in page
+    ))
+
+
+@pytest.mark.django_db
+def test_blog_panels(many_posts_with_published_locations):
+    toolbar = run_toolbar(render_feed)
+
+    stats = toolbar.get_panel_by_id('TemplateQueriesPanel').get_stats()
+    card = next(row for row in stats['rows']
+                if row['template'].endswith('includes/post_card.html'))
+    assert card['count'] >= 5 and card['lines'], (
+        'Убедитесь, что панель относит запросы связанных объектов '
+        'к шаблону post_card.html и его строкам.'
+    )
+    assert stats['total'] > stats['in_templates'] > 0
+
+    stats = toolbar.get_panel_by_id('CacheLayersPanel').get_stats()
+    layer = next(row for row in stats['rows']
+                 if row['layer'] == 'cache:default')
+    assert (layer['hits'], layer['misses']) == (1, 1), (
+        'Убедитесь, что панель считает попадания и промахи кэша default.'
+    )
+    assert 'get' not in vars(caches['default']), (
+        'Убедитесь, что после запроса чтения кэша восстановлены.'
+    )
+
+    stats = toolbar.get_panel_by_id('PaginatorPanel').get_stats()
+    assert len(stats['counts']) == 1
+    count = stats['counts'][0]
+    assert count['source'] == 'blog.Post' and count['count'] == 20
+    assert [query['sql'].split()[1] for query in count['queries']] == [
+        'COUNT(*)'
+    ], 'Убедитесь, что панель показывает SQL подсчёта пагинатора.'
+
+    stats = toolbar.get_panel_by_id('DuplicateLoadsPanel').get_stats()
+    users = next(row for row in stats['rows']
+                 if row['model'] == 'auth.User')
+    assert users['loads'] == 5 and users['duplicates'] == 4, (
+        'Убедитесь, что панель замечает автора, загруженного для каждого '
+        'поста заново.'
+    )
+    assert users['top'] == [(many_posts_with_published_locations[0]
+                             .author.pk, 5)]
+
+
+@pytest.mark.django_db
+def test_panels_render(post_with_published_location):
+    toolbar = run_toolbar(render_feed)
+    for panel_id in ('TemplateQueriesPanel', 'CacheLayersPanel',
+                     'PaginatorPanel', 'DuplicateLoadsPanel'):
+        panel = toolbar.get_panel_by_id(panel_id)
+        assert panel.nav_subtitle and panel.content, (
+            f'Убедитесь, что панель {panel_id} отрисовывается.'
+        )
+
+
+def test_hooks_idle_without_toolbar():
+    install_hooks()
+    paginator = Paginator(list(range(7)), 3)
+    assert paginator.count == 7 and paginator.num_pages == 3
@@ -0,0 +1,56 @@
+import gzip
+import io
+import json
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+EXPORT_URL = '/admin/blog/post/export/'
+
+
+@pytest.mark.django_db
+def test_export_blog_writes_ndjson(
+        tmp_path, many_posts_with_published_locations, comment_to_a_post):
+    output = tmp_path / 'blog.ndjson.gz'
+    call_command(
+        'export_blog', '--output', str(output), '--chunk-size', '3',
+        stderr=io.StringIO(),
+    )
+    with gzip.open(output, 'rt', encoding='utf-8') as file:
+        records = [json.loads(line) for line in file]
+    posts = [record for record in records if record['model'] == 'blog.post']
+    comments = [
+        record for record in records if record['model'] == 'blog.comment'
+    ]
+    assert len(posts) == len(many_posts_with_published_locations) + 1, (
+        'Убедитесь, что команда `export_blog` выгружает все посты, '
+        'даже если они не помещаются в одну порцию чтения.'
+    )
+    assert [record['pk'] for record in posts] == sorted(
+        record['pk'] for record in posts
+    )
+    assert comments[0]['fields']['post'] == comment_to_a_post.post_id
+
+
+@pytest.mark.django_db
+def test_export_endpoint_streams_for_staff_only(
+        admin_client, user_client, comment_to_a_post):
+    response = admin_client.get(EXPORT_URL, {'models': 'comments'})
+    assert response.status_code == HTTPStatus.OK
+    assert response.streaming, 'Убедитесь, что выгрузка отдаётся потоком.'
+    lines = b''.join(response.streaming_content).decode().splitlines()
+    assert [json.loads(line)['pk'] for line in lines] == [
+        comment_to_a_post.pk
+    ]
+
+    response = admin_client.get(EXPORT_URL, {'gzip': '1'})
+    data = gzip.decompress(b''.join(response.streaming_content))
+    assert len(data.decode().splitlines()) == 2
+
+    assert admin_client.get(
+        EXPORT_URL, {'models': 'users'}
+    ).status_code == HTTPStatus.BAD_REQUEST
+    assert user_client.get(EXPORT_URL).status_code == HTTPStatus.FOUND, (
+        'Убедитесь, что выгрузка доступна только через админку.'
+    )
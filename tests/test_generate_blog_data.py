@@ -0,0 +1,51 @@
+import io
+from datetime import datetime, timezone
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import Count, Max
+
+from blog.models import Category, Comment, Location, Post
+
+NOW = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def generate():
+    call_command(
+        'generate_blog_data', '--users', '20', '--categories', '5',
+        '--locations', '10', '--posts', '400', '--comments', '2000',
+        '--seed', '7', '--now', NOW.isoformat(), '--chunk-size', '150',
+        stdout=io.StringIO(),
+    )
+    return list(Post.objects.order_by('pk').values_list(
+        'title', 'pub_date', 'author__username', 'is_published'
+    ))
+
+
+@pytest.mark.django_db
+def test_generate_blog_data_is_deterministic():
+    first = generate()
+    assert Comment.objects.count() == 2000
+    for model in (Comment, Post, Category, Location, get_user_model()):
+        model.objects.all().delete()
+    assert generate() == first, (
+        'Убедитесь, что при одинаковом seed генератор создаёт '
+        'одинаковые данные.'
+    )
+
+
+@pytest.mark.django_db
+def test_generate_blog_data_is_realistic():
+    generate()
+    assert Post.objects.filter(pub_date__gt=NOW).exists(), (
+        'Убедитесь, что генератор создаёт отложенные посты.'
+    )
+    assert Post.objects.filter(is_published=False).exists()
+    assert not Comment.objects.filter(post__pub_date__gt=NOW).exists()
+    busiest = Post.objects.annotate(total=Count('comments')).aggregate(
+        busiest=Max('total')
+    )['busiest']
+    assert busiest > 2000 / 400 * 5, (
+        'Убедитесь, что комментарии распределены по постам неравномерно.'
+    )
@@ -0,0 +1,106 @@
+import gzip
+import io
+import json
+
+import pytest
+from django.contrib.auth.models import Permission
+from django.core.management import call_command
+
+from blog.models import Category, Location, Post
+from core.fixtures import iter_json_array, iter_records
+
+RECORDS = [
+    {'model': 'blog.category', 'pk': 1, 'fields': {
+        'title': 'Путешествия', 'description': 'Описание',
+        'slug': 'travel', 'is_published': True,
+        'created_at': '2023-01-01T00:00:00Z',
+    }},
+    {'model': 'blog.location', 'pk': 1, 'fields': {
+        'name': 'Остров', 'is_published': True,
+        'created_at': '2023-01-01T00:00:00Z',
+    }},
+    {'model': 'auth.user', 'pk': 1, 'fields': {
+        'username': 'author', 'password': '!', 'groups': [],
+        'user_permissions': [],
+    }},
+] + [
+    {'model': 'blog.post', 'pk': pk, 'fields': {
+        'title': f'Пост {pk}', 'text': 'Текст',
+        'pub_date': '2023-01-01T00:00:00Z', 'author': 1, 'location': 1,
+        'category': 1, 'is_published': True,
+        'created_at': '2023-01-01T00:00:00Z',
+    }}
+    for pk in range(1, 8)
+]
+
+
+def test_iter_json_array_reads_in_chunks():
+    text = json.dumps(RECORDS, ensure_ascii=False, indent=2)
+    records = list(iter_json_array(io.StringIO(text), chunk_size=7))
+    assert records == RECORDS, (
+        'Убедитесь, что JSON-массив разбирается правильно, даже если '
+        'записи не помещаются в одну порцию чтения.'
+    )
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO(text[:-10]), chunk_size=7))
+
+
+def test_iter_records_reads_gzipped_ndjson(tmp_path):
+    path = tmp_path / 'dump.ndjson.gz'
+    with gzip.open(path, 'wt', encoding='utf-8') as file:
+        for record in RECORDS:
+            file.write(json.dumps(record, ensure_ascii=False) + '\n')
+    assert list(iter_records(path)) == RECORDS
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('defer_indexes', [False, True])
+def test_import_fixture_bulk_loads_records(tmp_path, defer_indexes):
+    path = tmp_path / 'db.json'
+    path.write_text(json.dumps(RECORDS), encoding='utf-8')
+    options = ['--defer-indexes'] if defer_indexes else []
+    call_command(
+        'import_fixture', str(path), '--batch-size', '3',
+        '--transaction-size', '4', *options, stdout=io.StringIO(),
+    )
+    assert Category.objects.count() == 1
+    assert Location.objects.count() == 1
+    assert Post.objects.count() == 7, (
+        'Убедитесь, что команда `import_fixture` загружает все записи '
+        'фикстуры пачками.'
+    )
+    assert Post.objects.filter(author__username='author').count() == 7
+
+
+@pytest.mark.django_db
+def test_import_fixture_into_migrated_database(settings):
+    path = settings.BASE_DIR.parent / 'db.json'
+    permissions = Permission.objects.count()
+    call_command('import_fixture', str(path), stdout=io.StringIO())
+    assert Post.objects.count() == 39, (
+        'Убедитесь, что `import_fixture db.json` работает на базе после '
+        '`migrate`, где права и типы контента уже созданы.'
+    )
+    assert Permission.objects.count() == permissions
+
+    post = Post.objects.get(pk=Post.objects.first().pk)
+    Post.objects.filter(pk=post.pk).update(title='Изменённый заголовок')
+    stdout = io.StringIO()
+    call_command('import_fixture', str(path), stdout=stdout)
+    assert Post.objects.get(pk=post.pk).title == post.title, (
+        'Убедитесь, что записи с существующими ключами обновляются, '
+        'как в `loaddata`.'
+    )
+    assert 'blog.Post: вставлено 0, обновлено 39, пропущено 0' in (
+        stdout.getvalue()
+    )
+
+    stdout = io.StringIO()
+    call_command('import_fixture', str(path), '--ignore-conflicts',
+                 stdout=stdout)
+    assert 'blog.Post: вставлено 0, обновлено 0, пропущено 39' in (
+        stdout.getvalue()
+    ), (
+        'Убедитесь, что с `--ignore-conflicts` пропущенные записи '
+        'не считаются загруженными.'
+    )
@@ -0,0 +1,81 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+
+from blog.loadtest import parse_mix, report, run_client
+from blog.management.commands.load_test import prepare_targets
+from core.http_bench import Client, LoginError
+
+
+def test_parse_mix():
+    assert parse_mix('anonymous_read=3,comment=1') == {
+        'anonymous_read': 3.0, 'comment': 1.0,
+    }
+    with pytest.raises(ValueError):
+        parse_mix('delete_everything=1')
+
+
+def test_report_percentiles_and_errors():
+    samples = [('anonymous_read', i / 1000, 200, None) for i in range(1, 100)]
+    samples.append(('comment', 0.5, 500, 'HTTP 500'))
+    result = report(samples, elapsed=10)
+    assert result['total']['requests'] == 100
+    assert result['total']['throughput'] == 10
+    assert result['operations']['anonymous_read']['p50_ms'] == 50
+    assert result['operations']['comment']['errors'] == {'HTTP 500': 1}, (
+        'Убедитесь, что в отчёте считаются ошибки по операциям.'
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_run_client_against_live_server(
+        live_server, post_with_published_location):
+    targets = prepare_targets(clients=1, password='password')
+    samples = run_client(
+        0, live_server.url, targets,
+        {'anonymous_read': 1, 'user_read': 1, 'comment': 1}, duration=1,
+    )
+    assert {operation for operation, *_ in samples} >= {'anonymous_read'}
+    assert [error for *_, error in samples if error] == [], (
+        'Убедитесь, что клиенты нагрузки входят в систему и отправляют '
+        'формы с CSRF-токеном.'
+    )
+    assert post_with_published_location.comments.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_client_login_fails_without_session(
+        live_server, post_with_published_location):
+    targets = prepare_targets(clients=1, password='password')
+    client = Client(live_server.url)
+    with pytest.raises(LoginError):
+        client.login(targets['login_path'], targets['users'][0], 'wrong')
+    status = client.request(targets['create_path'], {'title': 'Пост'})
+    assert client.redirected_to(targets['login_url']), (
+        'Убедитесь, что клиент видит перенаправление на страницу входа.'
+    )
+    assert 300 <= status < 400
+
+    samples = run_client(
+        0, live_server.url, dict(targets, password='wrong'),
+        {'anonymous_read': 1}, duration=0.1,
+    )
+    assert samples and all(error is None for *_, error in samples)
+    with pytest.raises(LoginError):
+        run_client(0, live_server.url, dict(targets, password='wrong'),
+                   {'comment': 1}, duration=0.1)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('args', [
+    ['--clients', '0'], ['--duration', '0'], ['--mix', 'unknown=1'],
+])
+def test_load_test_validates_arguments_before_writing(
+        args, post_with_published_location):
+    users = get_user_model().objects.count()
+    with pytest.raises(CommandError):
+        call_command('load_test', *args)
+    assert get_user_model().objects.count() == users, (
+        'Убедитесь, что при неверных аргументах `load_test` ничего '
+        'не создаёт в базе.'
+    )
@@ -0,0 +1,36 @@
+import tracemalloc
+
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+
+from core.memory import read_reports
+
+
+@pytest.fixture
+def memory_dir(tmp_path):
+    with override_settings(TRACEMALLOC_ENABLED=True, TRACEMALLOC_DIR=tmp_path,
+                           TRACEMALLOC_SAMPLE_RATE=1):
+        yield tmp_path
+    tracemalloc.stop()
+
+
+@pytest.mark.django_db
+def test_memory_reports(memory_dir, client, capsys, mixer,
+                        post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(5).blend('blog.Comment', post=post)
+    client.get(reverse('blog:post_detail', args=[post.pk]))
+    (report,) = read_reports(memory_dir.glob('memory-*.jsonl'))
+    assert report['view'] == 'blog:post_detail' and report['status'] == 200
+    assert report['peak_bytes'] > 0 and report['lines'], (
+        'Убедитесь, что в отчёт пишутся пик памяти и места выделения.'
+    )
+    assert any(
+        line.startswith(('blog/', 'templates/'))
+        for line, _ in report['project_lines']
+    ), 'Убедитесь, что выделения относятся к строкам кода проекта.'
+
+    call_command('memory_report', '--view', 'blog:post_detail')
+    assert 'blog:post_detail: запросов 1' in capsys.readouterr().out
@@ -0,0 +1,88 @@
+from http import HTTPStatus
+
+import os
+import time
+
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+
+from core.metrics import (
+    REGISTRY, Exporter, FileStore, Registry, get_exporter, render,
+)
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint(client, post_with_published_location):
+    client.get(reverse('blog:index'))
+    with override_settings(METRICS_TOKEN='secret'):
+        response = client.get(reverse('core:metrics'),
+                              HTTP_AUTHORIZATION='Bearer secret')
+    assert response.status_code == HTTPStatus.OK
+    text = response.content.decode()
+    assert 'blogicum_requests_total{method="GET",status="200",' \
+           'view="blog:index"}' in text, (
+               'Убедитесь, что запросы считаются по именам представлений.'
+           )
+    assert 'blogicum_request_duration_seconds_bucket{view="blog:index",' \
+           'le="+Inf"}' in text
+    assert 'blogicum_request_queries_count{view="blog:index"}' in text
+    assert 'blogicum_response_size_bytes_sum{view="blog:index"}' in text
+    assert get_exporter().collect()[0]['counters'] == \
+        REGISTRY.snapshot()['counters']
+
+
+@pytest.mark.django_db
+def test_metrics_access(client, admin_client):
+    url = reverse('core:metrics')
+    with override_settings(METRICS_TOKEN='secret'):
+        for headers in ({}, {'HTTP_AUTHORIZATION': 'Bearer wrong'}):
+            status = client.get(url, **headers).status_code
+            assert status == HTTPStatus.FORBIDDEN, (
+                'Убедитесь, что метрики недоступны без токена сборщика, '
+                'даже с локального адреса.'
+            )
+        assert admin_client.get(url).status_code == HTTPStatus.OK
+    with override_settings(METRICS_TOKEN=None):
+        assert client.get(
+            url, HTTP_AUTHORIZATION='Bearer None'
+        ).status_code == HTTPStatus.FORBIDDEN
+
+
+def test_metrics_merge_processes(tmp_path):
+    for duration in (0.003, 0.2):
+        registry = Registry()
+        registry.inc('blogicum_requests_total', {'view': 'blog:index'})
+        registry.observe('blogicum_request_duration_seconds',
+                         {'view': 'blog:index'}, duration)
+        FileStore(tmp_path).write(registry.snapshot())
+    text = render(FileStore(tmp_path).read_all())
+    assert 'blogicum_requests_total{view="blog:index"} 2' in text, (
+        'Убедитесь, что счётчики процессов складываются.'
+    )
+    assert 'blogicum_request_duration_seconds_bucket{view="blog:index",' \
+           'le="0.005"} 1' in text
+    assert 'blogicum_request_duration_seconds_count{view="blog:index"} 2' \
+        in text
+
+
+def test_exporter_flush_interval(tmp_path):
+    exporter = Exporter(tmp_path, interval=60)
+    exporter.flush()
+    exporter.flush()
+    assert len(list(tmp_path.glob('*.json'))) == 1
+    assert len(exporter.collect()) == 1
+
+
+def test_stale_snapshots_expire(tmp_path):
+    stale = FileStore(tmp_path)
+    stale.write(Registry().snapshot())
+    old = time.time() - 120
+    os.utime(stale.path, (old, old))
+    store = FileStore(tmp_path, max_age=60)
+    store.write(Registry().snapshot())
+    assert len(store.read_all()) == 1, (
+        'Убедитесь, что снимки, не обновлявшиеся METRICS_MAX_AGE секунд, '
+        'не учитываются.'
+    )
+    assert not stale.path.exists()
@@ -0,0 +1,65 @@
+import pytest
+from django.db import connection
+from django.urls import reverse
+
+from blog.benchmark import Sample
+from blog.views import PostDetailView
+from core.nplusone import fingerprint
+
+
+def test_fingerprint_ignores_parameters():
+    assert fingerprint(
+        'SELECT * FROM "auth_user" WHERE "id" = %s LIMIT 21'
+    ) == fingerprint('SELECT * FROM "auth_user" WHERE "id" = 7 LIMIT 21')
+    assert fingerprint("SELECT 1 FROM t WHERE id IN (%s, %s, %s)") == \
+        fingerprint("SELECT 1 FROM t WHERE id IN ('a')")
+
+
+@pytest.mark.django_db
+def test_detects_lazy_comment_authors(
+        client, post_with_published_location, mixer, monkeypatch, caplog):
+    post = post_with_published_location
+    url = reverse('blog:post_detail', args=[post.pk])
+    mixer.cycle(6).blend('blog.Comment', post=post)
+    assert client.get(url).wsgi_request.nplusone == [], (
+        'Убедитесь, что страница поста загружает авторов комментариев '
+        'одним запросом.'
+    )
+
+    monkeypatch.setattr(
+        PostDetailView, 'get_queryset',
+        lambda self: self.get_object().comments.all(),
+    )
+    monkeypatch.setattr(PostDetailView, 'query_budget', None)
+    suspects = client.get(url).wsgi_request.nplusone
+    assert len(suspects) == 1 and suspects[0]['count'] == 6, (
+        'Убедитесь, что ленивая загрузка авторов комментариев '
+        'определяется как N+1.'
+    )
+    assert '"auth_user"' in suspects[0]['sql']
+    (template, code), _ = suspects[0]['origins'].most_common(1)[0]
+    assert template.startswith('templates/includes/comments.html:'), (
+        'Убедитесь, что для N+1 указывается строка шаблона.'
+    )
+    assert 'N+1 в blog:post_detail' in caplog.text
+
+
+@pytest.mark.django_db
+def test_origin_skips_wrappers_outside_core(
+        client, post_with_published_location, mixer, monkeypatch):
+    post = post_with_published_location
+    url = reverse('blog:post_detail', args=[post.pk])
+    mixer.cycle(6).blend('blog.Comment', post=post)
+    monkeypatch.setattr(
+        PostDetailView, 'get_queryset',
+        lambda self: self.get_object().comments.all(),
+    )
+    monkeypatch.setattr(PostDetailView, 'query_budget', None)
+    expected = client.get(url).wsgi_request.nplusone[0]['origins']
+    with connection.execute_wrapper(Sample()):
+        origins = client.get(url).wsgi_request.nplusone[0]['origins']
+    assert origins == expected, (
+        'Убедитесь, что обёртки выполнения запросов вне core не считаются '
+        'местом вызова запроса.'
+    )
+    assert not any('benchmark.py' in (code or '') for _, code in origins)
@@ -0,0 +1,84 @@
+from http import HTTPStatus
+
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+
+from core.profiling import get_ring, make_token
+
+
+@pytest.fixture
+def profile_dir(tmp_path):
+    with override_settings(PROFILE_DIR=tmp_path, PROFILE_RING_SIZE=2):
+        yield tmp_path
+
+
+@pytest.mark.django_db
+def test_profile_triggers(
+        profile_dir, client, user_client, admin_client,
+        post_with_published_location):
+    index = reverse('blog:index')
+    client.get(index)
+    user_client.get(index + '?_profile=1')
+    client.get(index, HTTP_X_BLOGICUM_PROFILE='поддельный')
+    assert get_ring().captures() == [], (
+        'Убедитесь, что запрос профилируется только по подписанному '
+        'заголовку или параметру сотрудника.'
+    )
+
+    client.get(index, HTTP_X_BLOGICUM_PROFILE=make_token())
+    admin_client.get(index + '?_profile=1')
+    captures = get_ring().captures()
+    assert [capture['trigger'] for capture in captures] == ['staff',
+                                                            'header']
+    assert captures[0]['view'] == 'blog:index'
+    assert captures[0]['status'] == HTTPStatus.OK
+
+    admin_client.get(index + '?_profile=1')
+    assert len(list(profile_dir.glob('*.prof'))) == 2, (
+        'Убедитесь, что хранятся только PROFILE_RING_SIZE профилей.'
+    )
+
+
+@pytest.mark.django_db
+def test_profile_pages(profile_dir, admin_client, user_client):
+    admin_client.get(reverse('blog:index') + '?_profile=1')
+    name = get_ring().names()[0]
+    response = admin_client.get(reverse('core:profile_list'))
+    assert name in response.content.decode()
+    detail = reverse('core:profile_detail', args=[name])
+    response = admin_client.get(detail + '?sort=tottime')
+    assert 'function calls' in response.context['stats']
+    assert admin_client.get(
+        reverse('core:profile_detail', args=['..'])
+    ).status_code == HTTPStatus.NOT_FOUND
+    assert user_client.get(detail).status_code == HTTPStatus.FOUND, (
+        'Убедитесь, что профили доступны только сотрудникам.'
+    )
+
+
+@pytest.mark.django_db
+def test_profiled_view_keeps_exception_handling(profile_dir, admin_client):
+    response = admin_client.get(
+        reverse('blog:post_detail', args=[10 ** 6]) + '?_profile=1'
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert get_ring().captures()[0]['status'] == HTTPStatus.NOT_FOUND, (
+        'Убедитесь, что в профиле записан код ответа, который получил '
+        'посетитель.'
+    )
+
+
+@pytest.mark.django_db
+def test_profiled_request_reaches_process_exception(
+        profile_dir, admin_client, monkeypatch, post_with_published_location):
+    from core import query_guard
+    monkeypatch.setattr(query_guard, 'PROGRESS_INSTRUCTIONS', 1)
+    with override_settings(QUERY_TIME_BUDGETS={'blog:index': 1e-9}):
+        response = admin_client.get(reverse('blog:index') + '?_profile=1')
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE, (
+        'Убедитесь, что при профилировании работают process_exception '
+        'других промежуточных слоёв.'
+    )
+    assert get_ring().captures()[0]['status'] == \
+        HTTPStatus.SERVICE_UNAVAILABLE
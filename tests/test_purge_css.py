@@ -0,0 +1,45 @@
+from pathlib import Path
+
+from core.management.commands.purge_css import (
+    collect_usage, parse_css, purge_rules, render_css, selector_is_used,
+)
+
+CSS = (
+    '.navbar{display:flex}.carousel{position:relative}'
+    '.btn:hover,.dropdown-item{color:red}table{width:100%}'
+    '@media (min-width:576px){.navbar{padding:0}.modal{margin:0}}'
+    '@keyframes spin{to{transform:rotate(360deg)}}'
+)
+
+
+def test_collect_usage(tmp_path: Path):
+    template = tmp_path / 'page.html'
+    template.write_text(
+        '<a class="nav-link {% if active %} text-white {% endif %}">'
+        '<p class="{{ css_class }} lead"></p></a>'
+    )
+    classes, tags = collect_usage([template])
+    assert classes == {'nav-link', 'text-white', 'lead'}, (
+        'Убедитесь, что классы собираются из атрибута `class`, '
+        'а теги шаблонизатора из него вырезаются.'
+    )
+    assert tags == {'a', 'p'}
+
+
+def test_selector_is_used():
+    classes, tags = {'card', 'card-body'}, {'div', 'a'}
+    assert selector_is_used('.card>.card-body', classes, tags)
+    assert selector_is_used('a:not([href]):not([class])', classes, tags)
+    assert not selector_is_used('.card .list-group', classes, tags)
+    assert not selector_is_used('table .card', classes, tags)
+
+
+def test_purge_rules():
+    purged = render_css(purge_rules(parse_css(CSS), {'navbar', 'btn'}, set()))
+    assert purged == (
+        '.navbar{display:flex}.btn:hover{color:red}'
+        '@media (min-width:576px){.navbar{padding:0}}'
+    ), (
+        'Убедитесь, что в урезанной таблице стилей остаются только '
+        'используемые селекторы, а пустые блоки и анимации удаляются.'
+    )
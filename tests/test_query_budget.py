@@ -0,0 +1,60 @@
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+
+from core.query_budget import (
+    QueryBudgetExceeded, QueryCounter, assert_query_budget, count_queries,
+)
+
+
+def feed_paths(post):
+    return [
+        reverse('blog:index'),
+        reverse('blog:category_posts', args=[post.category.slug]),
+        reverse('blog:profile', args=[post.author.username]),
+        reverse('blog:post_detail', args=[post.pk]),
+    ]
+
+
+@pytest.mark.django_db
+def test_feeds_fit_query_budget(
+        client, user_client, many_posts_with_published_locations, mixer):
+    post = many_posts_with_published_locations[0]
+    mixer.cycle(12).blend('blog.Comment', post=post)
+    for http_client in (client, user_client):
+        for path in feed_paths(post):
+            assert_query_budget(http_client, path)
+
+
+@pytest.mark.django_db
+def test_feed_queries_do_not_depend_on_page_size(
+        client, post_with_published_location, mixer):
+    post = post_with_published_location
+    counts = []
+    for extra in (0, 9):
+        mixer.cycle(extra).blend(
+            'blog.Post', author=post.author, category=post.category,
+            location=post.location, is_published=True,
+            pub_date=post.pub_date,
+        )
+        mixer.cycle(extra + 1).blend('blog.Comment', post=post)
+        counter = QueryCounter()
+        with count_queries(counter):
+            for path in feed_paths(post):
+                client.get(path)
+        counts.append(len(counter))
+    assert counts[0] == counts[1], (
+        'Убедитесь, что число SQL-запросов лент не растёт вместе с числом '
+        'постов и комментариев на странице.'
+    )
+
+
+@pytest.mark.django_db
+def test_middleware_raises_when_budget_exceeded(
+        client, post_with_published_location):
+    from blog.views import IndexListView
+    with override_settings(QUERY_BUDGET_ENFORCE=True), \
+            pytest.MonkeyPatch.context() as patch:
+        patch.setattr(IndexListView, 'query_budget', 1)
+        with pytest.raises(QueryBudgetExceeded):
+            client.get(reverse('blog:index'))
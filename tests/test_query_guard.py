@@ -0,0 +1,90 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import OperationalError, connection
+from django.test import override_settings
+
+from core import query_guard
+from core.query_guard import ABORTS, QueryGuard
+
+SLOW_SQL = (
+    'WITH RECURSIVE numbers(n) AS '
+    '(SELECT 1 UNION ALL SELECT n + 1 FROM numbers WHERE n < 100000000) '
+    'SELECT count(*) FROM numbers'
+)
+
+
+@pytest.mark.django_db
+def test_query_guard_interrupts_slow_query():
+    guard = QueryGuard(budget=0.05)
+    with connection.execute_wrapper(guard):
+        with pytest.raises(OperationalError), connection.cursor() as cursor:
+            cursor.execute(SLOW_SQL)
+    guard.release()
+    assert guard.tripped, (
+        'Убедитесь, что запрос, вышедший за бюджет времени, прерывается.'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        assert cursor.fetchone() == (1,)
+
+
+@pytest.mark.django_db
+def test_query_guard_middleware_returns_503(
+        client, monkeypatch, post_with_published_location):
+    monkeypatch.setattr(query_guard, 'PROGRESS_INSTRUCTIONS', 1)
+    aborts = ABORTS['blog:index']
+    with override_settings(QUERY_TIME_BUDGETS={'blog:index': 1e-9}):
+        response = client.get('/')
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE, (
+        'Убедитесь, что при превышении бюджета времени SQL '
+        'возвращается страница с кодом 503.'
+    )
+    assert ABORTS['blog:index'] == aborts + 1
+    assert client.get('/').status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_query_guard_trip_applies_to_last_statement_only():
+    guard = QueryGuard(budget=0.05)
+    with connection.execute_wrapper(guard):
+        with pytest.raises(OperationalError), connection.cursor() as cursor:
+            cursor.execute(SLOW_SQL)
+        assert guard.tripped
+        guard.budget = 0
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    guard.release()
+    assert not guard.tripped, (
+        'Убедитесь, что признак прерывания сбрасывается '
+        'для следующего SQL-запроса.'
+    )
+
+
+@pytest.mark.django_db
+@override_settings(QUERY_BUDGET_ENFORCE=False)
+def test_query_guard_returns_503_for_logged_in_user(
+        user_client, monkeypatch, post_with_published_location):
+    monkeypatch.setattr(query_guard, 'PROGRESS_INSTRUCTIONS', 1)
+    with override_settings(QUERY_TIME_BUDGETS={'blog:index': 1e-9}):
+        response = user_client.get('/')
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE, (
+        'Убедитесь, что страница 503 строится без прерываний и для '
+        'залогиненного пользователя.'
+    )
+    assert response['Retry-After'] == '5'
+
+
+@pytest.mark.django_db
+@override_settings(QUERY_BUDGET_ENFORCE=False)
+def test_query_guard_redirects_admin_with_message(admin_client, monkeypatch):
+    monkeypatch.setattr(query_guard, 'PROGRESS_INSTRUCTIONS', 1)
+    with override_settings(QUERY_TIME_BUDGETS={'admin': 1e-9}):
+        response = admin_client.get('/admin/blog/post/')
+    assert response.status_code == HTTPStatus.FOUND, (
+        'Убедитесь, что в админке прерванный запрос приводит к '
+        'перенаправлению на главную страницу админки.'
+    )
+    assert response.url == '/admin/'
+    response = admin_client.get(response.url)
+    assert 'был прерван' in response.content.decode()
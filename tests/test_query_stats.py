@@ -0,0 +1,56 @@
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+from core.metrics import FileStore
+from core.query_stats import STATS, StatementStats, report
+
+
+@pytest.fixture
+def clean_stats():
+    STATS.reset()
+    yield
+    STATS.reset()
+
+
+@pytest.mark.django_db
+def test_query_stats_collected(clean_stats, client, admin_client,
+                               many_posts_with_published_locations):
+    client.get(reverse('blog:index'))
+    client.get(reverse('blog:index'))
+    (feed,) = [
+        statement for statement in report([STATS.snapshot()])
+        if statement['sql'].startswith('SELECT "blog_post"."id"')
+        and ('blog:index', 2) in statement['views']
+    ]
+    assert feed['calls'] == 2, (
+        'Убедитесь, что запросы с разными параметрами складываются по '
+        'отпечатку.'
+    )
+    assert feed['rows'] == 2 * 10, (
+        'Убедитесь, что учитываются строки, прочитанные из курсора.'
+    )
+    assert feed['mean_ms'] <= feed['max_ms']
+
+    url = reverse('core:query_report')
+    assert client.get(url).status_code == HTTPStatus.FOUND, (
+        'Убедитесь, что статистика SQL доступна только сотрудникам.'
+    )
+    response = admin_client.get(url + '?sort=calls')
+    assert response.status_code == HTTPStatus.OK
+    data = admin_client.get(url + '?format=json').json()
+    assert data['statements'][0]['total_ms'] >= \
+        data['statements'][-1]['total_ms']
+
+
+def test_query_stats_merge(tmp_path):
+    for elapsed in (0.001, 0.003):
+        stats = StatementStats()
+        stats.add_rows(stats.record('SELECT * FROM t WHERE id = 1',
+                                    elapsed, 'blog:index'), 1)
+        FileStore(tmp_path).write(stats.snapshot())
+    (row,) = report(FileStore(tmp_path).read_all())
+    assert (row['calls'], row['rows'], row['total_ms'], row['max_ms']) == (
+        2, 2, 4.0, 3.0
+    )
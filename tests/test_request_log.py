@@ -0,0 +1,101 @@
+import json
+import logging
+import os
+import threading
+
+import pytest
+from django.urls import reverse
+
+from core.log import AsyncRotatingFileHandler
+from core.metrics import REGISTRY
+
+
+@pytest.fixture
+def access_log(tmp_path):
+    handler = AsyncRotatingFileHandler(tmp_path / 'access.jsonl',
+                                       max_bytes=2048, backup_count=2)
+    logger = logging.getLogger('blogicum.access')
+    logger.addHandler(handler)
+    yield handler, tmp_path
+    logger.removeHandler(handler)
+    handler.stop()
+
+
+def read_lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+@pytest.mark.django_db
+def test_request_log_fields(access_log, client, post_with_published_location):
+    handler, directory = access_log
+    client.get(reverse('blog:index'))
+    client.get('/posts/0/')
+    handler.stop()
+    index, missing = read_lines(directory / 'access.jsonl')[-2:]
+    assert index['route'] == 'blog:index' and index['status'] == 200
+    assert index['queries'] > 0 and index['bytes'] > 0, (
+        'Убедитесь, что в журнал пишутся число SQL-запросов и размер ответа.'
+    )
+    assert index['user_class'] == 'anonymous'
+    assert index['cache'] == 'none'
+    assert {'duration_ms', 'sql_ms', 'method', 'path'} <= index.keys()
+    assert missing['status'] == 404
+
+
+def test_request_log_rotation_and_overflow(access_log):
+    handler, directory = access_log
+    logger = logging.getLogger('blogicum.access')
+    for number in range(100):
+        logger.info('запись %s', number, extra={'route': 'blog:index'})
+    handler.stop()
+    assert (directory / 'access.jsonl.1').exists(), (
+        'Убедитесь, что журнал ротируется по размеру.'
+    )
+
+    full = AsyncRotatingFileHandler(directory / 'full.jsonl', queue_size=1)
+    full.stop()  # Очередь больше никто не читает
+    full.handle(logging.makeLogRecord({'msg': 'первая'}))
+    full.handle(logging.makeLogRecord({'msg': 'вторая'}))
+    assert full.dropped == 1, (
+        'Убедитесь, что при переполненной очереди запись отбрасывается, '
+        'а не блокирует поток запроса.'
+    )
+
+
+def test_request_log_after_fork(access_log):
+    handler, directory = access_log
+    pid = os.fork()
+    if pid == 0:
+        logging.getLogger('blogicum.access').info('из воркера')
+        handler.stop()
+        os._exit(0)
+    os.waitpid(pid, 0)
+    assert 'из воркера' in (directory / 'access.jsonl').read_text(), (
+        'Убедитесь, что в процессе, созданном fork, журнал запускает '
+        'поток записи заново.'
+    )
+
+
+def test_request_log_starts_on_first_record(tmp_path):
+    directory = tmp_path / 'logs'
+    handler = AsyncRotatingFileHandler(directory / 'access.jsonl')
+    threads = threading.active_count()
+    assert not directory.exists() and handler.listener is None, (
+        'Убедитесь, что каталог журнала и поток записи создаются только '
+        'при первой записи, а не при настройке логирования.'
+    )
+    assert threading.active_count() == threads
+    handler.handle(logging.makeLogRecord({'msg': 'первая'}))
+    handler.stop()
+    assert 'первая' in (directory / 'access.jsonl').read_text()
+
+
+def test_dropped_records_in_metrics(tmp_path):
+    full = AsyncRotatingFileHandler(tmp_path / 'dropped.jsonl', queue_size=1)
+    full.stop()
+    for _ in range(3):
+        full.handle(logging.makeLogRecord({'msg': 'запись'}))
+    counters = REGISTRY.snapshot()['counters']
+    assert ['blogicum_log_dropped_total', {'file': 'dropped.jsonl'}, 2] in (
+        counters
+    ), 'Убедитесь, что отброшенные записи журнала видны в метриках.'
@@ -0,0 +1,143 @@
+import sqlite3
+from contextvars import Context
+
+import pytest
+from django.contrib.admin.models import ADDITION, LogEntry
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import IntegrityError, connections
+from django.test import override_settings
+
+from blog.models import Post
+from core.backup import online_copy
+from core.routers import BookkeepingRouter, ReplicaRouter
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+def test_replica_router_reads_from_replica_until_write():
+    router = ReplicaRouter()
+
+    def route():
+        before = router.db_for_read(Post)
+        write = router.db_for_write(Post)
+        after = router.db_for_read(Post)
+        return before, write, after
+
+    assert Context().run(route) == ('replica', 'default', 'default'), (
+        'Убедитесь, что чтения идут на реплику, записи — в основную базу, '
+        'а после записи запрос читает из основной базы.'
+    )
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+def test_replica_router_disallows_migrations_on_replica():
+    router = ReplicaRouter()
+    assert router.allow_migrate('replica', 'blog') is False
+    assert router.allow_migrate('default', 'blog') is None
+
+
+@override_settings(BOOKKEEPING_DATABASE='bookkeeping')
+def test_bookkeeping_router():
+    router = BookkeepingRouter()
+    assert router.db_for_write(Session) == 'bookkeeping'
+    assert router.db_for_read(Session) == 'bookkeeping'
+    assert router.db_for_write(Post) is None, (
+        'Убедитесь, что записи контента остаются в основной базе.'
+    )
+    assert router.db_for_write(LogEntry) is None, (
+        'Убедитесь, что журнал админки остаётся в основной базе рядом '
+        'с пользователями.'
+    )
+    assert router.allow_migrate('bookkeeping', 'sessions') is True
+    assert router.allow_migrate('default', 'sessions') is False
+    assert router.allow_migrate('bookkeeping', 'admin') is False
+    assert router.allow_migrate('default', 'admin') is None
+    assert router.allow_migrate('default', 'blog') is None
+
+
+@pytest.fixture
+def bookkeeping(tmp_path, django_db_blocker):
+    """Служебная база с выключенными внешними ключами, как в настройках."""
+    connections.databases['bookkeeping'] = {
+        'ENGINE': 'core.backends.sqlite3',
+        'NAME': str(tmp_path / 'bookkeeping.sqlite3'),
+        'OPTIONS': {'pragmas': {'foreign_keys': 'OFF'}},
+    }
+    with django_db_blocker.unblock():
+        with override_settings(BOOKKEEPING_DATABASE='bookkeeping'):
+            call_command('migrate', database='bookkeeping', verbosity=0)
+        yield connections['bookkeeping']
+        connections['bookkeeping'].close()
+        del connections['bookkeeping']
+        del connections.databases['bookkeeping']
+
+
+@pytest.mark.django_db
+def test_sessions_move_to_bookkeeping_database(tmp_path, bookkeeping):
+    session = SessionStore()
+    session['key'] = 'value'
+    session.create()
+    dump = tmp_path / 'sessions.json'
+    call_command('dumpdata', 'sessions', output=str(dump))
+    with override_settings(BOOKKEEPING_DATABASE='bookkeeping'):
+        call_command('loaddata', str(dump), database='bookkeeping',
+                     verbosity=0)
+        assert SessionStore(session.session_key)['key'] == 'value', (
+            'Убедитесь, что сессии переносятся в служебную базу командой '
+            '`loaddata --database=bookkeeping`.'
+        )
+
+
+@pytest.mark.django_db
+def test_user_delete_with_bookkeeping_database(admin_user, bookkeeping):
+    with override_settings(BOOKKEEPING_DATABASE='bookkeeping'):
+        session = SessionStore()
+        session['_auth_user_id'] = str(admin_user.pk)
+        session.create()
+        LogEntry.objects.log_action(
+            admin_user.pk, ContentType.objects.get_for_model(Post).pk,
+            1, 'Пост', ADDITION,
+        )
+        admin_user.delete()
+        assert not LogEntry.objects.exists(), (
+            'Убедитесь, что пользователь удаляется вместе с записями '
+            'журнала админки, когда служебная база включена.'
+        )
+        assert Session.objects.filter(
+            session_key=session.session_key
+        ).exists()
+
+
+def test_bookkeeping_checks_local_foreign_keys(bookkeeping):
+    with bookkeeping.cursor() as cursor:
+        cursor.execute('CREATE TABLE parent (id INTEGER PRIMARY KEY)')
+        cursor.execute(
+            'CREATE TABLE child (id INTEGER PRIMARY KEY, '
+            'parent_id INTEGER REFERENCES parent (id))'
+        )
+        cursor.execute(
+            'CREATE TABLE visit (id INTEGER PRIMARY KEY, '
+            'user_id INTEGER REFERENCES auth_user (id))'
+        )
+        cursor.execute('INSERT INTO child VALUES (1, 42)')
+        cursor.execute('INSERT INTO visit VALUES (1, 42)')
+    with pytest.raises(IntegrityError):
+        bookkeeping.check_constraints(['child'])
+    bookkeeping.check_constraints(['visit'])
+
+
+def test_online_copy(tmp_path):
+    source_path = str(tmp_path / 'source.sqlite3')
+    target_path = str(tmp_path / 'target.sqlite3')
+    with sqlite3.connect(source_path) as source:
+        source.execute('CREATE TABLE post (title TEXT)')
+        source.execute("INSERT INTO post VALUES ('Пост')")
+    online_copy(source_path, target_path, pages=1)
+    with sqlite3.connect(target_path) as target:
+        rows = target.execute('SELECT title FROM post').fetchall()
+    assert rows == [('Пост',)], (
+        'Убедитесь, что реплика содержит копию данных основной базы.'
+    )
@@ -0,0 +1,104 @@
+import os
+import threading
+
+from django.template import Context, Template
+
+from core import sampler as sampler_module
+from core.sampler import Sampler, collapse
+
+
+def test_sampler_collects_template_frames(tmp_path):
+    started, release = threading.Event(), threading.Event()
+
+    def wait():
+        started.set()
+        release.wait(5)
+        return ''
+
+    template = Template('{{ wait }}', name='includes/post_card.html')
+    thread = threading.Thread(
+        target=template.render, args=(Context({'wait': wait}),)
+    )
+    thread.start()
+    started.wait(5)
+    sampler = Sampler(tmp_path, interval=0.01, flush_interval=60)
+    sampler.active[thread.ident] = 'blog:index'
+    sampler.active[-1] = 'blog:profile'  # Поток уже завершился
+    try:
+        for _ in range(3):
+            sampler.sample()
+    finally:
+        release.set()
+        thread.join()
+
+    ((stack, count),) = sampler.stacks['blog:index'].items()
+    assert count == 3 and sampler.samples == 3
+    assert '[includes/post_card.html]' in stack.split(';'), (
+        'Убедитесь, что отрисовка шаблона видна в стеке по имени шаблона.'
+    )
+    assert 'test_sampler.py:wait' in stack
+
+    path = sampler.flush()
+    (line,) = path.read_text().splitlines()
+    assert line.startswith('blog:index;') and line.endswith(' 3'), (
+        'Убедитесь, что стеки пишутся в формате collapsed stacks.'
+    )
+    assert sampler.flush() is None
+
+
+def test_collapse_stops_at_handler():
+    def _get_response():
+        return inner()
+
+    def inner():
+        import sys
+        return collapse(sys._getframe())
+
+    (label,) = _get_response().split(';')
+    assert label.endswith('test_sampler.py:inner')
+
+
+def test_sampler_restarts_after_fork(tmp_path, monkeypatch):
+    sampler = Sampler(tmp_path, interval=60, flush_interval=60)
+    sampler.pid = -1  # Будто запущен в мастере до fork
+    sampler.stacks['blog:index']['stack'] = 1
+    monkeypatch.setattr(sampler_module, '_sampler', sampler)
+    pid = os.fork()
+    if pid == 0:
+        threads = {thread.name for thread in threading.enumerate()}
+        os._exit(0 if 'stack-sampler' in threads
+                 and sampler.pid == os.getpid()
+                 and not sampler.stacks else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0, (
+        'Убедитесь, что в воркере, созданном fork, профилировщик '
+        'запускает свой поток заново и не пишет стеки мастера.'
+    )
+
+
+def test_sampler_interval_recovers_after_overhead_drops(tmp_path):
+    sampler = Sampler(tmp_path, interval=0.01, flush_interval=60)
+    sampler._spent = 60.0  # Окно, почти целиком ушедшее на снимки
+    sampler._window_started -= 60
+    sampler.flush()
+    assert sampler.interval == 0.02
+    for _ in range(3):
+        sampler._window_started -= 60
+        sampler.flush()
+    assert sampler.interval == 0.01, (
+        'Убедитесь, что после падения стоимости интервал возвращается '
+        'к `SAMPLER_INTERVAL`.'
+    )
+
+
+def test_sampler_keeps_last_files(tmp_path):
+    for hour in range(5):
+        (tmp_path / f'samples-20000101{hour:02}-1.folded').write_text('')
+    sampler = Sampler(tmp_path, interval=60, flush_interval=60, max_files=3)
+    sampler.stacks['blog:index']['stack'] = 1
+    path = sampler.flush()
+    names = sorted(path.name for path in tmp_path.glob('*.folded'))
+    assert names == [
+        'samples-2000010103-1.folded', 'samples-2000010104-1.folded',
+        path.name,
+    ], 'Убедитесь, что хранятся только последние `SAMPLER_MAX_FILES` файлов.'
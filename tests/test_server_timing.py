@@ -0,0 +1,36 @@
+import re
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from core.timing import STATS, RequestStats
+
+
+@pytest.mark.django_db
+def test_server_timing_header(client, post_with_published_location):
+    response = client.get(reverse('blog:index'))
+    header = response['Server-Timing']
+    assert re.search(r'db;dur=[\d.]+;desc="SQL: \d+"', header), (
+        'Убедитесь, что Server-Timing содержит время и число SQL-запросов.'
+    )
+    templates = re.findall(r'tpl;dur=[\d.]+;desc="([^"]+)"', header)
+    assert templates == ['blog/index.html'], (
+        'Убедитесь, что Server-Timing учитывает только шаблоны верхнего '
+        'уровня.'
+    )
+    assert 'cache;' in header and 'total;dur=' in header
+    assert isinstance(response.context['server_timing'], RequestStats)
+
+
+def test_cache_hits_and_misses():
+    stats = RequestStats()
+    token = STATS.set(stats)
+    try:
+        cache.set('server-timing-key', 'value')
+        assert cache.get('server-timing-key') == 'value'
+        assert cache.get('server-timing-missing', 'default') == 'default'
+        cache.get_many(['server-timing-key', 'server-timing-missing'])
+    finally:
+        STATS.reset(token)
+    assert (stats.cache_hits, stats.cache_misses) == (2, 2)
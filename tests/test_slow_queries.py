@@ -0,0 +1,60 @@
+import logging
+from http import HTTPStatus
+
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+
+from core.query_budget import QueryCounter, count_queries
+from core.slow_queries import plan_flags
+
+
+def test_plan_flags():
+    plan = [
+        (0, 'SCAN blog_comment'),
+        (0, 'SEARCH blog_post USING INTEGER PRIMARY KEY (rowid=?)'),
+        (0, 'SCAN blog_post USING INDEX blog_post_pub_date'),
+        (0, 'USE TEMP B-TREE FOR ORDER BY'),
+        (0, 'CO-ROUTINE subquery'),
+        (1, 'SCAN subquery'),
+    ]
+    assert plan_flags(plan) == ['FULL SCAN blog_comment',
+                                'TEMP B-TREE ORDER BY']
+
+
+@pytest.mark.django_db
+def test_slow_query_log(client, post_with_published_location, caplog):
+    caplog.set_level(logging.WARNING, logger='core.slow_queries')
+    with override_settings(SLOW_QUERY_THRESHOLD=1e-9):
+        client.get(reverse('blog:index'))
+    records = [
+        record for record in caplog.records
+        if record.name == 'core.slow_queries'
+    ]
+    assert records, 'Убедитесь, что запросы дольше порога попадают в журнал.'
+    feed = [record for record in records if 'blog_post' in record.sql]
+    assert feed and all(record.view == 'blog:index' for record in feed)
+    assert 'План:' in feed[0].getMessage(), (
+        'Убедитесь, что к медленному запросу добавляется EXPLAIN QUERY PLAN.'
+    )
+
+
+@pytest.mark.django_db
+def test_explain_bypasses_execute_wrappers(
+        client, post_with_published_location):
+    url = reverse('blog:index')
+    counts = []
+    for threshold in (60, 1e-9):
+        counter = QueryCounter()
+        with override_settings(SLOW_QUERY_THRESHOLD=threshold), \
+                count_queries(counter):
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            'Убедитесь, что EXPLAIN не расходует бюджет SQL-запросов.'
+        )
+        assert not any('EXPLAIN' in sql for sql in counter.queries)
+        counts.append(len(counter))
+    assert counts[0] == counts[1], (
+        'Убедитесь, что EXPLAIN медленных запросов не виден другим '
+        'обёрткам выполнения запросов.'
+    )